@@ -0,0 +1,183 @@
+"""
+End-to-end latency benchmark against the fake Ollama server
+
+Drives LLMEngine.generate_command, CommandExecutor.execute and
+TerminalMate.process_request non-interactively and reports p50/p95/p99
+latency, throughput and a per-phase breakdown (prompt build, LLM, parse,
+risk, exec). Runs fully offline.
+
+Usage:
+    python -m benchmarks.e2e_bench --requests 50 --token-latency 0.01
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+# Add project root to path so we can import 'core' packages
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import config
+from benchmarks.fake_ollama import FakeOllamaServer
+from utils.stats import summarize
+
+
+# Harmless commands so the exec phase can run for real
+RESPONSES = {
+    "list": "COMMAND: ls -la\nEXPLANATION: Lists all files in the current directory with details.",
+    "disk": "COMMAND: df -h\nEXPLANATION: Shows disk usage for all mounted filesystems.",
+    "where": "COMMAND: pwd\nEXPLANATION: Prints the current working directory.",
+    "who": "COMMAND: whoami\nEXPLANATION: Prints the current user name.",
+    "date": "COMMAND: date\nEXPLANATION: Prints the current date and time.",
+}
+REQUESTS = [
+    "list all files here",
+    "show disk usage",
+    "where am i",
+    "who am i logged in as",
+    "what is the date",
+]
+
+
+def print_table(title, rows):
+    print(f"\n{title}")
+    print(f"  {'phase':<16}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'mean ms':>10}")
+    for name, samples in rows:
+        stats = summarize(samples)
+        print(f"  {name:<16}{stats['p50'] * 1000:>10.2f}{stats['p95'] * 1000:>10.2f}"
+              f"{stats['p99'] * 1000:>10.2f}{stats['mean'] * 1000:>10.2f}")
+
+
+def bench_phases(llm, executor, risk_analyzer, count):
+    """Time each phase of a request separately"""
+    engine = llm.engine
+    phases = {name: [] for name in ("prompt build", "llm", "parse", "risk", "exec", "total")}
+
+    for i in range(count):
+        request = REQUESTS[i % len(REQUESTS)]
+        context = {'current_dir': executor.get_current_directory(), 'os': config.CURRENT_OS,
+                   'shell': config.SHELL_TYPE}
+        start = time.perf_counter()
+
+        t0 = time.perf_counter()
+        messages = engine._build_messages(request, context)
+        phases["prompt build"].append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        response = llm._run(engine._chat(messages))
+        phases["llm"].append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        result = engine._parse_response(response['message']['content'])
+        phases["parse"].append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        risk_analyzer.analyze_command(result['command'])
+        phases["risk"].append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        executor.execute(result['command'])
+        phases["exec"].append(time.perf_counter() - t0)
+
+        phases["total"].append(time.perf_counter() - start)
+
+    print_table(f"Per-phase breakdown ({count} requests)", phases.items())
+
+
+def bench_generate(llm, count, concurrency):
+    """Latency of generate_command alone, and throughput with requests in flight"""
+    latencies = []
+    for i in range(count):
+        t0 = time.perf_counter()
+        llm.generate_command(REQUESTS[i % len(REQUESTS)], use_cache=False)
+        latencies.append(time.perf_counter() - t0)
+    print_table("LLMEngine.generate_command", [("generate", latencies)])
+
+    start = time.perf_counter()
+    futures = []
+    for i in range(count):
+        futures.append(llm.submit_command(REQUESTS[i % len(REQUESTS)], use_cache=False))
+        if len(futures) >= concurrency:
+            futures.pop(0).result()
+    for future in futures:
+        future.result()
+    elapsed = time.perf_counter() - start
+    print(f"  throughput:     {count / elapsed:.1f} req/s with {concurrency} in flight")
+
+
+def bench_process_request(count):
+    """Full TerminalMate.process_request with confirmation answered automatically"""
+    from rich.console import Console
+    import main
+    from safety.confirmation import ConfirmationUI
+
+    class AutoConfirmUI(ConfirmationUI):
+        def _get_confirmation(self, risk_level):
+            return True
+
+    app = main.TerminalMate()
+    quiet = Console(file=io.StringIO(), force_terminal=False)
+    app.console = quiet
+    app.confirmation_ui = AutoConfirmUI()
+    app.confirmation_ui.console = quiet
+
+    latencies = []
+    for i in range(count):
+        t0 = time.perf_counter()
+        app.process_request("!" + REQUESTS[i % len(REQUESTS)])
+        latencies.append(time.perf_counter() - t0)
+    print_table("TerminalMate.process_request", [("request", latencies)])
+
+
+def bench_execute(executor, count):
+    latencies = []
+    for _ in range(count):
+        t0 = time.perf_counter()
+        executor.execute("true")
+        latencies.append(time.perf_counter() - t0)
+    print_table("CommandExecutor.execute ('true')", [("execute", latencies)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end latency benchmark")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--token-latency", type=float, default=0.01)
+    parser.add_argument("--prompt-token-latency", type=float, default=0.0002)
+    parser.add_argument("--load-time", type=float, default=0.5)
+    args = parser.parse_args()
+
+    with FakeOllamaServer(token_latency=args.token_latency, prompt_token_latency=args.prompt_token_latency,
+                          load_time=args.load_time, responses=RESPONSES) as server, \
+            tempfile.TemporaryDirectory() as workdir:
+        config.OLLAMA_HOST = server.url
+        config.CACHE_ENABLED = False
+        config.SEMANTIC_CACHE_ENABLED = False
+        config.HISTORY_ENABLED = False  # Keep runs out of the user's history and its examples out of prompts
+        config.ENABLE_LOGGING = False  # ... and out of the request log that `logs stats` reads
+        config.INPUT_MODE = "basic"
+        os.chdir(workdir)
+
+        from core.llm_engine import LLMEngine
+        from core.executor import CommandExecutor
+        from safety.risk_analyzer import RiskAnalyzer
+
+        llm = LLMEngine()
+        t0 = time.perf_counter()
+        llm.warm_up()
+        print(f"Fake Ollama at {server.url}: model load {time.perf_counter() - t0:.2f}s, "
+              f"{args.token_latency * 1000:.0f}ms/token")
+
+        executor = CommandExecutor()
+        bench_phases(llm, executor, RiskAnalyzer(), args.requests)
+        bench_generate(llm, args.requests, args.concurrency)
+        bench_execute(executor, args.requests)
+        bench_process_request(args.requests)
+
+
+if __name__ == "__main__":
+    main()
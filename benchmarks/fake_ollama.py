@@ -0,0 +1,321 @@
+"""
+Fake Ollama server - a local stand-in for benchmarks and offline runs
+
+Implements the parts of the Ollama HTTP API TerminalMate uses (/api/chat,
+/api/generate, /api/embed, /api/tags, /api/ps, /api/version) with
+configurable model load time, per-token latency and canned responses.
+Prompt evaluation is simulated with prefix reuse like Ollama's KV cache:
+only tokens after the prefix shared with the previous prompt are charged.
+
+Usage:
+    python -m benchmarks.fake_ollama --port 11434 --token-latency 0.02 --load-time 2
+    OLLAMA_HOST=http://127.0.0.1:11434 python main.py
+"""
+import argparse
+import json
+import re
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+DEFAULT_RESPONSE = "COMMAND: echo hello\nEXPLANATION: Prints a greeting to the terminal."
+TOKEN_PATTERN = re.compile(r"\S+\s*|\s+")
+
+
+def tokenize(text):
+    """Split text into word-sized tokens (close enough to a real tokenizer for timing)"""
+    return TOKEN_PATTERN.findall(text)
+
+
+def parse_keep_alive(value, default):
+    """Convert an Ollama keep_alive value ('30m', '10s', 300, -1) to seconds"""
+    if value is None:
+        return default
+    if isinstance(value, (int, float)):
+        return float("inf") if value < 0 else float(value)
+    match = re.fullmatch(r"(-?\d+(?:\.\d+)?)([smh]?)", str(value).strip())
+    if not match:
+        return default
+    amount = float(match.group(1))
+    if amount < 0:
+        return float("inf")
+    return amount * {"": 1, "s": 1, "m": 60, "h": 3600}[match.group(2)]
+
+
+class FakeOllamaServer:
+    def __init__(self, host="127.0.0.1", port=0, token_latency=0.02, prompt_token_latency=0.0005,
+                 load_time=1.0, keep_alive=300, responses=None, default_response=DEFAULT_RESPONSE):
+        """
+        Args:
+            host (str): Interface to bind
+            port (int): Port to bind (0 picks a free port)
+            token_latency (float): Seconds per generated token
+            prompt_token_latency (float): Seconds per evaluated prompt token
+            load_time (float): Seconds to "load" a model that isn't resident
+            keep_alive (float): Default seconds a model stays resident
+            responses (dict): Substring of the user request -> response text
+            default_response (str): Response when nothing in responses matches
+        """
+        self.token_latency = token_latency
+        self.prompt_token_latency = prompt_token_latency
+        self.load_time = load_time
+        self.keep_alive = keep_alive
+        self.responses = responses or {}
+        self.default_response = default_response
+        self.requests = 0
+
+        self._lock = threading.Lock()
+        self._loaded_until = {}  # model -> monotonic expiry
+        self._load_events = {}  # model -> Event set once loading finished
+        self._last_prompt = {}  # model -> tokens of the previous prompt
+
+        server = self
+
+        class Handler(FakeOllamaHandler):
+            fake = server
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="fake-ollama", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def pick_response(self, prompt):
+        """Return the canned response whose key appears in the request"""
+        match = re.search(r"User request: (.*)", prompt)
+        request = (match.group(1) if match else prompt).lower()
+        for key, response in self.responses.items():
+            if key.lower() in request:
+                return response
+        return self.default_response
+
+    def ensure_loaded(self, model, keep_alive):
+        """
+        Simulate loading a model, sharing one load between concurrent requests
+
+        Returns:
+            float: Seconds this request spent waiting for the load
+        """
+        start = time.monotonic()
+        with self._lock:
+            resident = self._loaded_until.get(model, 0) > start
+            event = self._load_events.get(model)
+            loader = not resident and event is None
+            if loader:
+                event = self._load_events[model] = threading.Event()
+
+        if loader:
+            time.sleep(self.load_time)
+            with self._lock:
+                self._loaded_until[model] = time.monotonic() + parse_keep_alive(keep_alive, self.keep_alive)
+                del self._load_events[model]
+                self._last_prompt.pop(model, None)
+            event.set()
+        elif not resident:
+            event.wait()
+
+        with self._lock:
+            self._loaded_until[model] = time.monotonic() + parse_keep_alive(keep_alive, self.keep_alive)
+        return time.monotonic() - start
+
+    def evaluate_prompt(self, model, prompt_tokens):
+        """
+        Charge prompt evaluation for tokens not shared with the previous prompt
+
+        Returns:
+            tuple: (evaluated token count, seconds spent)
+        """
+        with self._lock:
+            previous = self._last_prompt.get(model, [])
+            self._last_prompt[model] = prompt_tokens
+
+        shared = 0
+        for old, new in zip(previous, prompt_tokens):
+            if old != new:
+                break
+            shared += 1
+
+        count = len(prompt_tokens) - shared
+        duration = count * self.prompt_token_latency
+        time.sleep(duration)
+        return count, duration
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    fake = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output clean
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json({"models": [{"name": "fake", "model": "fake", "size": 0}]})
+        elif self.path == "/api/ps":
+            now = time.monotonic()
+            models = [{"name": m, "model": m} for m, until in self.fake._loaded_until.items() if until > now]
+            self._send_json({"models": models})
+        elif self.path == "/api/version":
+            self._send_json({"version": "0.0.0-fake"})
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        self.fake.requests += 1
+
+        if self.path == "/api/chat":
+            prompt = "\n".join(m.get("content", "") for m in body.get("messages", []))
+            self._generate(body, prompt, chat=True)
+        elif self.path == "/api/generate":
+            self._generate(body, body.get("prompt", ""), chat=False)
+        elif self.path in ("/api/embed", "/api/embeddings"):
+            inputs = body.get("input", body.get("prompt", ""))
+            inputs = [inputs] if isinstance(inputs, str) else inputs
+            embeddings = [self._embed(text) for text in inputs]
+            if self.path == "/api/embed":
+                self._send_json({"model": body.get("model"), "embeddings": embeddings})
+            else:
+                self._send_json({"embedding": embeddings[0]})
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def _generate(self, body, prompt, chat):
+        fake = self.fake
+        model = body.get("model", "fake")
+        start = time.monotonic()
+        load = fake.ensure_loaded(model, body.get("keep_alive"))
+
+        # An empty prompt only loads the model, like the real server
+        if not prompt:
+            self._send_json(self._final(model, chat, "", start, load, 0, 0, 0, 0))
+            return
+
+        prompt_count, prompt_duration = fake.evaluate_prompt(model, tokenize(prompt))
+        tokens = tokenize(fake.pick_response(prompt))
+        num_predict = (body.get("options") or {}).get("num_predict")
+        if num_predict:
+            tokens = tokens[:num_predict]
+
+        if body.get("stream", True):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            eval_start = time.monotonic()
+            for token in tokens:
+                time.sleep(fake.token_latency)
+                self._write_chunk(self._partial(model, chat, token))
+            eval_duration = time.monotonic() - eval_start
+            self._write_chunk(self._final(model, chat, "", start, load, prompt_count,
+                                          prompt_duration, len(tokens), eval_duration))
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            eval_duration = len(tokens) * fake.token_latency
+            time.sleep(eval_duration)
+            self._send_json(self._final(model, chat, "".join(tokens), start, load, prompt_count,
+                                        prompt_duration, len(tokens), eval_duration))
+
+        if parse_keep_alive(body.get("keep_alive"), fake.keep_alive) == 0:
+            fake._loaded_until.pop(model, None)
+
+    def _partial(self, model, chat, text):
+        payload = {"model": model, "created_at": _now(), "done": False}
+        if chat:
+            payload["message"] = {"role": "assistant", "content": text}
+        else:
+            payload["response"] = text
+        return payload
+
+    def _final(self, model, chat, text, start, load, prompt_count, prompt_duration, eval_count, eval_duration):
+        payload = self._partial(model, chat, text)
+        payload.update({
+            "done": True,
+            "done_reason": "stop",
+            "total_duration": int((time.monotonic() - start) * 1e9),
+            "load_duration": int(load * 1e9),
+            "prompt_eval_count": prompt_count,
+            "prompt_eval_duration": int(prompt_duration * 1e9),
+            "eval_count": eval_count,
+            "eval_duration": int(eval_duration * 1e9),
+        })
+        return payload
+
+    def _embed(self, text, dim=64):
+        """Deterministic pseudo-embedding so identical inputs get identical vectors"""
+        seed = zlib.crc32(text.encode("utf-8"))
+        return [((seed * (i + 1)) % 1000) / 1000.0 - 0.5 for i in range(dim)]
+
+    def _write_chunk(self, payload):
+        data = (json.dumps(payload) + "\n").encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_json(self, payload, status=200):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fake Ollama server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--token-latency", type=float, default=0.02, help="Seconds per generated token")
+    parser.add_argument("--prompt-token-latency", type=float, default=0.0005, help="Seconds per prompt token")
+    parser.add_argument("--load-time", type=float, default=1.0, help="Seconds to load a model")
+    parser.add_argument("--responses", help="JSON file mapping request substrings to responses")
+    args = parser.parse_args()
+
+    responses = None
+    if args.responses:
+        with open(args.responses) as f:
+            responses = json.load(f)
+
+    server = FakeOllamaServer(args.host, args.port, args.token_latency, args.prompt_token_latency,
+                              args.load_time, responses=responses)
+    print(f"Fake Ollama listening on {server.url} (Ctrl-C to stop)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
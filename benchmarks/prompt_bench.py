@@ -0,0 +1,92 @@
+"""
+Prompt benchmark - prompt-eval tokens and time per request, before and after
+prefix-stable message layout
+
+Requires a running Ollama server with config.LLM_MODEL pulled.
+
+Usage:
+    python -m benchmarks.prompt_bench --rounds 3
+"""
+import argparse
+import os
+import sys
+import timeit
+
+# Add project root to path so we can import 'core' packages
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import ollama
+import config
+from core.llm_engine import LLMEngine, build_system_prompt, build_paths_prompt
+
+
+REQUESTS = [
+    "list all python files",
+    "show disk usage",
+    "find files larger than 100mb",
+    "count lines in all text files",
+    "show the 10 most recently modified files",
+]
+
+
+def legacy_messages(user_input, context):
+    """Message layout before the change: prompt rebuilt every time, request first"""
+    system_prompt = build_system_prompt.__wrapped__(config.CURRENT_OS, config.SHELL_TYPE)
+    prompt = f"User request: {user_input}\n\n"
+    prompt += build_paths_prompt.__wrapped__(os.path.expanduser("~"))
+    prompt += f"Current directory: {context['current_dir']}\n"
+    return [
+        {'role': 'system', 'content': system_prompt},
+        {'role': 'user', 'content': prompt}
+    ]
+
+
+def run_layout(engine, build_messages, rounds):
+    """Send every request through a layout and collect Ollama's prompt counters"""
+    context = {'current_dir': os.getcwd()}
+    # Prime the model so load time doesn't land on the first sample
+    ollama.chat(model=engine.model_name, messages=build_messages(REQUESTS[0], context),
+                keep_alive=config.LLM_KEEP_ALIVE, options={'num_predict': 1})
+
+    tokens, seconds = [], []
+    for _ in range(rounds):
+        for request in REQUESTS:
+            response = ollama.chat(
+                model=engine.model_name,
+                messages=build_messages(request, context),
+                options={'temperature': config.LLM_TEMPERATURE, 'num_predict': 1},
+                keep_alive=config.LLM_KEEP_ALIVE
+            )
+            tokens.append(response.get('prompt_eval_count') or 0)
+            seconds.append((response.get('prompt_eval_duration') or 0) / 1e9)
+    return sum(tokens) / len(tokens), sum(seconds) / len(seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare prompt evaluation cost before and after prefix reuse")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    config.CACHE_ENABLED = False
+    config.SEMANTIC_CACHE_ENABLED = False
+    config.HISTORY_ENABLED = False  # Keep runs out of the user's history and its examples out of prompts
+    engine = LLMEngine()
+    context = {'current_dir': os.getcwd()}
+
+    legacy_build = timeit.timeit(lambda: legacy_messages(REQUESTS[0], context), number=10000) / 10000
+    cached_build = timeit.timeit(lambda: engine.engine._build_messages(REQUESTS[0], context), number=10000) / 10000
+
+    before_tokens, before_time = run_layout(engine, legacy_messages, args.rounds)
+    after_tokens, after_time = run_layout(engine, engine.engine._build_messages, args.rounds)
+
+    print(f"Model: {engine.model_name}, {len(REQUESTS) * args.rounds} requests per layout")
+    print(f"{'':24}{'before':>12}{'after':>12}")
+    print(f"{'prompt build (us)':24}{legacy_build * 1e6:>12.1f}{cached_build * 1e6:>12.1f}")
+    print(f"{'prompt_eval_count':24}{before_tokens:>12.1f}{after_tokens:>12.1f}")
+    print(f"{'prompt_eval (ms)':24}{before_time * 1000:>12.1f}{after_time * 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+RiskAnalyzer keyword matching: compiled automaton vs the old keyword loop
+
+Times keyword matching on long piped commands with the built-in rules and
+with thousands of extra rules from a policy file, then the full
+analyze_command (parsing and classifying every pipeline stage) on a first
+and a repeated call.
+
+Usage:
+    python -m benchmarks.risk_bench --segments 20 --rules 5000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Add project root to path so we can import 'core' packages
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import config
+from safety.risk_analyzer import RiskAnalyzer
+from safety.shell_parser import parse_command
+
+
+SEGMENTS = [
+    "cat access.log", "grep -v healthcheck", "awk '{print $1, $7}'", "sort", "uniq -c",
+    "sort -rn", "head -n 50", "sed 's/GET //'", "tr -s ' '", "cut -d' ' -f2",
+    "xargs -n1 basename", "tee /tmp/report.txt", "wc -l", "mvn -q dependency:tree",
+    "jq '.items[] | .name'", "column -t", "ls --format=long"
+]
+
+
+def legacy_analyze(command, critical_keywords, caution_keywords):
+    """The previous analyze_command: substring loop, first hit wins"""
+    command_lower = command.lower()
+    for keyword in critical_keywords:
+        if keyword in command_lower:
+            return config.RISK_CRITICAL
+    for keyword in caution_keywords:
+        if keyword in command_lower:
+            return config.RISK_CAUTION
+    return config.RISK_SAFE
+
+
+def make_commands(count, segments):
+    random.seed(3)
+    commands = []
+    for _ in range(count):
+        commands.append(" | ".join(random.choice(SEGMENTS) for _ in range(segments)))
+    return commands
+
+
+def write_policy(path, rules):
+    """A policy file with made-up tool/flag pairs that never occur in the commands"""
+    with open(path, "w") as f:
+        f.write("critical = [\n")
+        for i in range(rules // 2):
+            f.write(f'  "tool{i} --purge",\n')
+        f.write("]\ncaution = [\n")
+        for i in range(rules - rules // 2):
+            f.write(f'  "helper{i} write",\n')
+        f.write("]\n")
+
+
+def bench(label, commands, analyzer):
+    legacy = time_call(lambda c: legacy_analyze(c, analyzer.critical_keywords, analyzer.caution_keywords), commands)
+    compiled = time_call(analyzer.find_matches, commands)
+    print(f"  {label:<24}{legacy * 1e6:>12.1f}{compiled * 1e6:>14.1f}{legacy / compiled:>10.1f}x")
+
+
+def time_call(function, commands):
+    start = time.perf_counter()
+    for command in commands:
+        function(command)
+    return (time.perf_counter() - start) / len(commands)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RiskAnalyzer matching benchmark")
+    parser.add_argument("--commands", type=int, default=2000)
+    parser.add_argument("--segments", type=int, default=20, help="Pipeline stages per command")
+    parser.add_argument("--rules", type=int, default=5000, help="Extra rules in the policy file")
+    args = parser.parse_args()
+
+    commands = make_commands(args.commands, args.segments)
+    print(f"{args.commands} commands, {args.segments} pipeline stages "
+          f"(~{sum(map(len, commands)) // len(commands)} chars each)")
+    print(f"  {'rules':<24}{'loop µs':>12}{'compiled µs':>14}{'speedup':>11}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        empty_policy = os.path.join(directory, "none.toml")
+        bench(f"built-in ({len(config.CRITICAL_KEYWORDS) + len(config.CAUTION_KEYWORDS)})",
+              commands, RiskAnalyzer(policy_file=empty_policy))
+
+        policy = os.path.join(directory, "policy.toml")
+        write_policy(policy, args.rules)
+        t0 = time.perf_counter()
+        analyzer = RiskAnalyzer(policy_file=policy)
+        build = time.perf_counter() - t0
+        bench(f"+{args.rules} from policy", commands, analyzer)
+        print(f"  (loading and compiling the policy took {build * 1000:.0f} ms)")
+
+    # Full analysis parses each command once; repeats come from the cache
+    parse_command.cache_clear()
+    analyzer = RiskAnalyzer(policy_file=os.devnull)
+    first = time_call(analyzer.analyze_command, commands)
+    repeat = time_call(analyzer.analyze_command, commands[:config.RISK_CACHE_SIZE])
+    print(f"\nanalyze_command: {first * 1e6:.1f} µs first call, {repeat * 1e6:.2f} µs repeated")
+
+    # The loop stops at the first keyword, and matches inside words
+    sample = "mvn -q package | grep -v warn | ls --format=long | rm -rf build && dd if=/dev/zero of=disk"
+    print(f"\nSample: {sample}")
+    print(f"  loop:     {legacy_analyze(sample, config.CRITICAL_KEYWORDS, config.CAUTION_KEYWORDS)}")
+    result = RiskAnalyzer(policy_file=os.devnull).analyze_command(sample)
+    print(f"  compiled: {result['risk_level']} {[(m['keyword'], m['start']) for m in result['matches']]}")
+    print(f"  reason:   {result['reason']}")
+
+
+if __name__ == "__main__":
+    main()
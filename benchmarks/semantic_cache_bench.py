@@ -0,0 +1,157 @@
+"""
+Semantic cache benchmark - hit rate and lookup latency at scale
+
+Usage:
+    python -m benchmarks.semantic_cache_bench --sizes 10000 50000 100000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Add project root to path so we can import 'core' packages
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from core.semantic_cache import SemanticCache, HashingEmbedder
+from utils.stats import summarize
+
+
+VERBS = ["list", "find", "delete", "count", "compress", "archive", "copy", "move"]
+FILE_TYPES = ["python", "text", "log", "csv", "json", "image", "pdf", "markdown", "yaml", "shell"]
+QUALIFIERS = ["modified today", "larger than 10mb", "older than a week", "owned by root", "", "recursively"]
+
+# Paraphrase rewrites that keep the meaning of a request
+PARAPHRASES = {
+    "list": ["show", "display", "list"],
+    "find": ["search", "locate", "find"],
+    "delete": ["remove", "erase", "delete"],
+    "python": ["py", "python"],
+    "image": ["picture", "photo", "image"],
+    "files": ["file", "files"],
+}
+FILLERS = ["please", "here", "for me", "all", "now"]
+# Appended to make long requests, where one changed word barely moves the
+# similarity; each has a counterpart that asks for the opposite
+LONG_SUFFIXES = [
+    ("sorted by size ascending", "sorted by size descending"),
+    ("with their owners and permissions", "without their owners and permissions"),
+    ("including hidden entries and symlinks", "excluding hidden entries and symlinks"),
+]
+
+
+def make_request(i):
+    """Build a distinct request; the project name makes every index unique"""
+    verb = VERBS[i % len(VERBS)]
+    file_type = FILE_TYPES[(i // len(VERBS)) % len(FILE_TYPES)]
+    qualifier = QUALIFIERS[(i // (len(VERBS) * len(FILE_TYPES))) % len(QUALIFIERS)]
+    return " ".join(part for part in [verb, file_type, "files", qualifier, f"in project{i}"] if part)
+
+
+def paraphrase(request, rng):
+    """Rewrite a request with synonyms and filler words"""
+    words = [rng.choice(PARAPHRASES.get(word, [word])) for word in request.split()]
+    position = rng.randrange(len(words) + 1)
+    words.insert(position, rng.choice(FILLERS))
+    return " ".join(words)
+
+
+def run(size, queries, contexts, seed):
+    rng = random.Random(seed)
+    cache = SemanticCache(path="", embedder=HashingEmbedder(), max_entries=size)
+
+    start = time.perf_counter()
+    for i in range(size):
+        cache.add(make_request(i), i % contexts, {'command': f"cmd {i}"})
+    build_time = time.perf_counter() - start
+
+    # Paraphrases of cached requests should hit and return the right command
+    hits, wrong, latencies = 0, 0, []
+    for _ in range(queries):
+        i = rng.randrange(size)
+        query = paraphrase(make_request(i), rng)
+        t0 = time.perf_counter()
+        result, _ = cache.lookup(query, i % contexts)
+        latencies.append(time.perf_counter() - t0)
+        if result is not None:
+            hits += 1
+            if result['command'] != f"cmd {i}":
+                wrong += 1
+
+    # Requests that were never cached must not hit: other projects, and
+    # the same project with a different action
+    false_hits = 0
+    for _ in range(queries):
+        i = size + rng.randrange(size)
+        result, _ = cache.lookup(paraphrase(make_request(i), rng), i % contexts)
+        if result is not None:
+            false_hits += 1
+
+    changed_hits = 0
+    for _ in range(queries):
+        i = rng.randrange(size)
+        original = make_request(i)
+        verb = original.split()[0]
+        other = rng.choice([v for v in VERBS if v != verb])
+        result, _ = cache.lookup(paraphrase(other + original[len(verb):], rng), i % contexts)
+        if result is not None and result['command'] == f"cmd {i}":
+            changed_hits += 1
+
+    # Long requests: a cached one, then the same request with its action or
+    # a single qualifier flipped
+    long_cache = SemanticCache(path="", embedder=HashingEmbedder(), max_entries=queries)
+    long_hits, long_changed_hits = 0, 0
+    for n in range(queries):
+        i = rng.randrange(size)
+        suffix, opposite = rng.choice(LONG_SUFFIXES)
+        original = f"{make_request(i)} {suffix}"
+        long_cache.add(original, n, {'command': f"cmd {i}"})
+        if long_cache.lookup(paraphrase(original, rng), n)[0] is not None:
+            long_hits += 1
+
+        verb = original.split()[0]
+        other = rng.choice([v for v in VERBS if v != verb])
+        for changed in (other + original[len(verb):], original.replace(suffix, opposite)):
+            if long_cache.lookup(paraphrase(changed, rng), n)[0] is not None:
+                long_changed_hits += 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache.path = os.path.join(tmp, "semantic_cache.npz")
+        t0 = time.perf_counter()
+        cache.save()
+        save_time = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        SemanticCache(path=cache.path, embedder=HashingEmbedder(), max_entries=size)
+        load_time = time.perf_counter() - t0
+        file_size = os.path.getsize(cache.path)
+
+    stats = summarize(latencies)
+    print(f"\n{size:,} entries ({contexts} context(s))")
+    print(f"  build:        {build_time:.2f}s ({size / build_time:,.0f} inserts/s)")
+    print(f"  hit rate:     {hits / queries:.1%} on paraphrases ({wrong} wrong command(s))")
+    print(f"  false hits:   {false_hits / queries:.1%} on uncached requests, "
+          f"{changed_hits / queries:.1%} on changed actions")
+    print(f"  long requests: {long_hits / queries:.1%} hit rate on paraphrases, "
+          f"{long_changed_hits / (2 * queries):.1%} false hits on changed actions/qualifiers")
+    print(f"  lookup:       p50 {stats['p50'] * 1000:.2f}ms  p95 {stats['p95'] * 1000:.2f}ms  "
+          f"p99 {stats['p99'] * 1000:.2f}ms")
+    print(f"  persistence:  save {save_time:.2f}s, load {load_time:.2f}s, {file_size / 1e6:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the semantic request cache")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000, 100000])
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--contexts", type=int, default=1, help="Number of distinct directories")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        run(size, args.queries, args.contexts, args.seed)
+
+
+if __name__ == "__main__":
+    main()
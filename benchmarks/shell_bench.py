@@ -0,0 +1,58 @@
+"""
+Per-command overhead: persistent shell vs spawning bash per command
+
+Usage:
+    python -m benchmarks.shell_bench --commands 200
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add project root to path so we can import 'core' packages
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from core.executor import CommandExecutor
+from utils.stats import summarize
+
+
+COMMANDS = ["true", "echo hello", "pwd", "ls >/dev/null", "date +%s"]
+
+
+def bench(executor, count):
+    latencies = []
+    for i in range(count):
+        t0 = time.perf_counter()
+        result = executor.execute(COMMANDS[i % len(COMMANDS)])
+        latencies.append(time.perf_counter() - t0)
+        if not result['success']:
+            raise RuntimeError(f"Command failed: {result['error']}")
+    return summarize(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Persistent shell vs spawn-per-command overhead")
+    parser.add_argument("--commands", type=int, default=200)
+    args = parser.parse_args()
+
+    spawn = CommandExecutor(persistent_shell=False)
+    persistent = CommandExecutor(persistent_shell=True)
+    persistent.execute("true")  # Start the shell outside the timed loop
+
+    print(f"{args.commands} commands per backend")
+    print(f"  {'backend':<12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'mean ms':>10}")
+    results = {}
+    for name, executor in (("spawn", spawn), ("persistent", persistent)):
+        stats = results[name] = bench(executor, args.commands)
+        print(f"  {name:<12}{stats['p50'] * 1000:>10.2f}{stats['p95'] * 1000:>10.2f}"
+              f"{stats['p99'] * 1000:>10.2f}{stats['mean'] * 1000:>10.2f}")
+
+    speedup = results["spawn"]["mean"] / results["persistent"]["mean"]
+    print(f"  persistent shell is {speedup:.1f}x faster per command")
+    persistent.close()
+
+
+if __name__ == "__main__":
+    main()
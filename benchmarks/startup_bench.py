@@ -0,0 +1,68 @@
+"""
+Startup benchmark - cold vs warm first-request latency
+
+Requires a running Ollama server with config.LLM_MODEL pulled.
+
+Usage:
+    python -m benchmarks.startup_bench
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add project root to path so we can import 'core' packages
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import ollama
+import config
+from core.llm_engine import LLMEngine
+
+
+def unload(model_name):
+    """Evict the model from Ollama's memory"""
+    ollama.generate(model=model_name, prompt='', keep_alive=0)
+    time.sleep(1)
+
+
+def timed_request(engine, request):
+    start = time.perf_counter()
+    result = engine.generate_command(request, {'current_dir': os.getcwd()}, use_cache=False)
+    if result.get('error'):
+        raise RuntimeError(result['explanation'])
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold vs warm first-request latency")
+    parser.add_argument("--request", default="list all python files")
+    args = parser.parse_args()
+
+    config.CACHE_ENABLED = False
+    config.SEMANTIC_CACHE_ENABLED = False
+    config.HISTORY_ENABLED = False  # Keep runs out of the user's history and its examples out of prompts
+    engine = LLMEngine()
+    model = engine.model_name
+
+    unload(model)
+    cold = timed_request(engine, args.request)
+    warm = timed_request(engine, args.request)
+
+    unload(model)
+    start = time.perf_counter()
+    engine.warm_up()
+    warm_up = time.perf_counter() - start
+    after_warm_up = timed_request(engine, args.request)
+
+    print(f"Model: {model} (keep_alive={config.LLM_KEEP_ALIVE})")
+    print(f"  cold first request:           {cold:.2f}s")
+    print(f"  warm request:                 {warm:.2f}s")
+    print(f"  warm-up (off critical path):  {warm_up:.2f}s")
+    print(f"  first request after warm-up:  {after_warm_up:.2f}s")
+    print(f"  saved on first request:       {cold - after_warm_up:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
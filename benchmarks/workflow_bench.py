@@ -0,0 +1,89 @@
+"""
+Scaffold many projects with native workflow steps vs equivalent shell steps
+
+git init spawns git either way, so it is left out unless --git is given.
+
+Usage:
+    python -m benchmarks.workflow_bench --projects 1000
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+# Add project root to path so we can import 'core' packages
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from rich.console import Console
+from core.executor import CommandExecutor
+from core.workflow import Workflow, WorkflowEngine, WorkflowStep
+from core.workflow_state import WorkflowState
+
+
+def shell_workflow(git):
+    """The standard project setup written as shell commands"""
+    steps = [
+        WorkflowStep(name="Create Directories", command="mkdir -p src tests docs",
+                     outputs=["src", "tests", "docs"]),
+        WorkflowStep(name="Create README", command="printf '# %s\\n' \"${PWD##*/}\" > README.md",
+                     depends_on=[], outputs=["README.md"]),
+        WorkflowStep(name="Create Gitignore", command="echo '__pycache__/' > .gitignore",
+                     depends_on=[], outputs=[".gitignore"])
+    ]
+    if git:
+        steps.append(WorkflowStep(name="Initialize Git", command="git init -q", depends_on=[], outputs=[".git"]))
+    return Workflow(name="Shell Project Setup", triggers=[], steps=steps)
+
+
+def native_workflow(engine, git):
+    """The built-in standard project setup"""
+    workflow = engine.workflows[0]
+    steps = [step for step in workflow.steps if git or step.action != "git_init"]
+    return Workflow(name=workflow.name, triggers=[], steps=steps)
+
+
+def scaffold(engine, workflow, executor, root, count, workers):
+    quiet = Console(file=io.StringIO())
+    start = time.perf_counter()
+    for i in range(count):
+        project = os.path.join(root, f"project{i}")
+        os.mkdir(project)
+        executor.current_dir = project
+        if not engine.execute_workflow(workflow, executor, quiet, max_workers=workers):
+            raise RuntimeError(f"Scaffolding {project} failed")
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Native vs shell workflow steps")
+    parser.add_argument("--projects", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=None, help="Steps run at once (default from config)")
+    parser.add_argument("--git", action="store_true", help="Include git init")
+    args = parser.parse_args()
+
+    engine = WorkflowEngine()
+    executor = CommandExecutor(persistent_shell=False)
+    workflows = {
+        "shell": shell_workflow(args.git),
+        "native": native_workflow(engine, args.git)
+    }
+
+    print(f"Scaffolding {args.projects} projects per mode")
+    elapsed = {}
+    for name, workflow in workflows.items():
+        with tempfile.TemporaryDirectory() as root:
+            # Keep step fingerprints out of the real state file
+            engine = WorkflowEngine(state=WorkflowState(os.path.join(root, "workflow_state.json")))
+            elapsed[name] = scaffold(engine, workflow, executor, root, args.projects, args.workers)
+        per_project = elapsed[name] / args.projects * 1000
+        print(f"  {name:<8}{elapsed[name]:>8.2f}s  {per_project:>8.2f} ms/project")
+
+    print(f"  native steps are {elapsed['shell'] / elapsed['native']:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Workflow trigger matching and loading with many workflow files
+
+Compares the compiled Aho-Corasick trigger index against the old linear
+scan (`trigger in input` over every trigger of every workflow), and times
+loading the files cold, rescanning them unchanged, and reloading after an
+edit.
+
+Usage:
+    python -m benchmarks.workflow_match_bench --workflows 10000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Add project root to path so we can import 'core' packages
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from core.workflow import WorkflowEngine
+from core.workflow_state import WorkflowState
+
+
+VERBS = ["deploy", "build", "release", "scaffold", "backup", "restore", "rotate", "sync"]
+NOUNS = ["service", "frontend", "database", "cluster", "docs site", "api", "worker", "cache"]
+TARGETS = ["staging", "production", "dev box", "test env", "laptop", "mirror"]
+
+
+def write_workflows(directory, count):
+    """Write count workflow files, each with three unique triggers"""
+    for i in range(count):
+        verb, noun, target = VERBS[i % len(VERBS)], NOUNS[i // 8 % len(NOUNS)], TARGETS[i % len(TARGETS)]
+        triggers = [f"{verb} {noun} {i} to {target}", f"{verb} {noun} number {i}", f"run workflow {i}"]
+        with open(os.path.join(directory, f"workflow_{i:05d}.toml"), "w") as f:
+            f.write(f'name = "Workflow {i}"\n')
+            f.write("triggers = [" + ", ".join(f'"{t}"' for t in triggers) + "]\n\n")
+            f.write(f'[[steps]]\nname = "Step"\ncommand = "echo {i}"\n')
+
+
+def linear_find(workflows, user_input):
+    """The previous find_workflow: substring test of every trigger"""
+    normalized_input = user_input.lower().strip()
+    for workflow in workflows:
+        for trigger in workflow.triggers:
+            if trigger in normalized_input:
+                return workflow
+    return None
+
+
+def make_queries(count, workflows):
+    random.seed(7)
+    queries = []
+    for i in range(count):
+        if i % 2:
+            queries.append(f"please {random.choice(random.choice(workflows).triggers)} now")
+        else:
+            queries.append(f"show me the {random.choice(NOUNS)} logs from {random.choice(TARGETS)}")
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Workflow trigger matching benchmark")
+    parser.add_argument("--workflows", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        write_workflows(directory, args.workflows)
+        engine = WorkflowEngine(state=WorkflowState(os.path.join(directory, "state")), directories=[directory])
+
+        t0 = time.perf_counter()
+        workflows = engine.workflows
+        load = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        engine.find_workflow("warm up")
+        compile_time = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        engine._refresh(force=True)
+        rescan = time.perf_counter() - t0
+
+        with open(os.path.join(directory, "workflow_00000.toml"), "a") as f:
+            f.write("\n")
+        t0 = time.perf_counter()
+        engine._refresh(force=True)
+        reload = time.perf_counter() - t0
+
+        print(f"{len(workflows)} workflows, {sum(len(w.triggers) for w in workflows)} triggers")
+        print(f"  cold load:            {load * 1000:9.1f} ms")
+        print(f"  compile triggers:     {compile_time * 1000:9.1f} ms")
+        print(f"  rescan (unchanged):   {rescan * 1000:9.1f} ms")
+        print(f"  reload (1 file edit): {reload * 1000:9.1f} ms")
+
+        workflows = engine.workflows
+        queries = make_queries(args.queries, workflows)
+        engine.find_workflow("warm up")  # Rebuild the matcher after the reload
+
+        t0 = time.perf_counter()
+        linear = [linear_find(workflows, query) for query in queries]
+        linear_time = (time.perf_counter() - t0) / len(queries)
+
+        t0 = time.perf_counter()
+        indexed = [engine.find_workflow(query) for query in queries]
+        indexed_time = (time.perf_counter() - t0) / len(queries)
+
+        hits = sum(workflow is not None for workflow in indexed)
+        agree = sum(a is b for a, b in zip(linear, indexed))
+        print(f"\n{len(queries)} queries, {hits} matched; {agree} pick the same workflow as the linear scan")
+        print("  (the rest prefer a longer trigger over the first workflow that matches)")
+        print(f"  linear scan:   {linear_time * 1e6:10.1f} µs/query")
+        print(f"  trigger index: {indexed_time * 1e6:10.1f} µs/query")
+        print(f"  speedup:       {linear_time / indexed_time:10.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,11 +4,78 @@ Configuration settings for TerminalMate
 import os
 import platform
 
+# Application Paths
+APP_ROOT = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(APP_ROOT, "data")  # Caches and other persistent state
+
 # LLM Settings
 LLM_MODEL = "qwen2.5-coder:7b"  # Using your existing Qwen model
 LLM_TEMPERATURE = 0.1  # Low temperature for consistent command generation
 LLM_TIMEOUT = 10  # Seconds to wait for LLM response
+LLM_LOAD_TIMEOUT = 120  # Seconds to wait when the request also has to load the model
+LLM_MAX_RETRIES = 2  # Retries for connection and server errors (not timeouts)
+LLM_RETRY_BACKOFF = 0.5  # Seconds before the first retry; doubles on each attempt
+OLLAMA_HOST = os.environ.get("OLLAMA_HOST")  # None uses Ollama's default (localhost:11434)
+LLM_KEEP_ALIVE = "30m"  # How long Ollama keeps the model loaded between requests (-1 = forever)
+LLM_WARMUP = True  # Preload the model in the background at startup
+# Multi-candidate generation: >1 generates candidates concurrently and picks
+# the best by agreement, risk and syntax. Needs OLLAMA_NUM_PARALLEL >= this
+# on the server to actually run in parallel.
+LLM_CANDIDATES = 1
+LLM_CANDIDATE_TEMPERATURE_STEP = 0.2  # Added to LLM_TEMPERATURE for each extra candidate
+LLM_CANDIDATE_SLACK = 1.5  # Wait up to this multiple of the first candidate's latency
+LLM_STREAM = True  # Stream responses so the command previews before the explanation finishes
 COMMAND_TIMEOUT = 60  # Seconds to wait for command execution (1 minute)
+# Run commands in one long-lived bash instead of spawning one per command.
+# cd, exports and aliases then persist between commands; commands get no
+# terminal stdin. Unix only.
+PERSISTENT_SHELL = False
+# Per-process limits for executed commands (Unix; None = no limit). They
+# apply to each process the command starts, not to all of them together.
+COMMAND_MAX_MEMORY_MB = None  # Address space (RLIMIT_AS); too low breaks JVMs and Go programs
+COMMAND_MAX_CPU_SECONDS = None  # CPU time (RLIMIT_CPU) before SIGXCPU
+TRACK_COMMAND_RESOURCES = True  # Measure peak memory, CPU time and I/O of each command (needs psutil)
+RESOURCE_SAMPLE_INTERVAL = 0.1  # Seconds between samples of a running command
+
+# Workflows
+WORKFLOW_DIRS = [
+    os.path.join(APP_ROOT, "workflows"),  # Built-in workflows
+    os.path.join(os.path.expanduser("~"), ".terminalmate", "workflows")  # Your own
+]
+WORKFLOW_RELOAD_INTERVAL = 2.0  # Seconds between checks for changed workflow files
+WORKFLOW_MAX_WORKERS = 4  # Independent workflow steps run at once
+WORKFLOW_STATE_FILE = os.path.join(DATA_DIR, "workflow_state.json")  # Step fingerprints
+WORKFLOW_STATE_MAX_SCOPES = 200  # Workflow/directory pairs remembered (oldest dropped)
+
+# Command Output
+STREAM_COMMAND_OUTPUT = True  # Print output live instead of after the command exits
+OUTPUT_HEAD_SIZE = 20000  # Characters kept in memory from the start of the output
+OUTPUT_TAIL_SIZE = 20000  # Characters kept in memory from the end of the output
+OUTPUT_SPILL_DIR = None  # Where longer output is saved in full (None = system temp dir)
+OUTPUT_SPILL_KEEP = 20  # Most recent full-output files kept; older ones are deleted on exit
+
+# Response Cache
+CACHE_ENABLED = True
+CACHE_FILE = os.path.join(DATA_DIR, "response_cache.db")
+CACHE_MAX_ENTRIES = 1000  # Least recently used entries are evicted beyond this
+CACHE_TTL = 7 * 24 * 60 * 60  # Seconds before a cached command expires (1 week)
+
+# Semantic Cache (reuses commands for paraphrased requests)
+SEMANTIC_CACHE_ENABLED = True
+SEMANTIC_CACHE_FILE = os.path.join(DATA_DIR, "semantic_cache.npz")
+SEMANTIC_CACHE_THRESHOLD = 0.9  # Minimum cosine similarity to reuse a command
+SEMANTIC_CACHE_MAX_ENTRIES = 5000
+SEMANTIC_CACHE_EMBEDDER = "hashing"  # 'hashing' (local, no network) or 'ollama'
+SEMANTIC_CACHE_EMBED_MODEL = "nomic-embed-text"  # Used by the 'ollama' embedder
+SEMANTIC_CACHE_DIM = 256  # Vector size for the hashing embedder
+SEMANTIC_CACHE_SAVE_EVERY = 10  # Persist the index after this many new entries
+
+# Command History (persistent; similar past commands are sent to the LLM as examples)
+HISTORY_ENABLED = True
+HISTORY_FILE = os.path.join(DATA_DIR, "history.db")
+HISTORY_MAX_ENTRIES = 50000  # Oldest commands are dropped beyond this (0 = keep all)
+HISTORY_EXAMPLES = 3  # Past commands added to each prompt (0 = none)
+HISTORY_SCAN_LIMIT = 2000  # Recent commands searched when SQLite lacks FTS5
 
 # Platform Detection
 CURRENT_OS = platform.system().lower()  # 'windows', 'linux', 'darwin' (macOS)
@@ -56,12 +123,39 @@ CAUTION_KEYWORDS = [
     "echo >", "cat >", "chmod", "chown", "kill", "taskkill"
 ]
 
+# Extra rules: a TOML file with 'critical', 'caution' and 'safe_commands' lists
+RISK_POLICY_FILE = os.path.join(os.path.expanduser("~"), ".terminalmate", "risk_policy.toml")
+RISK_CACHE_SIZE = 1024  # Parsed and analyzed commands kept in memory
+AUDIT_CHUNK_SIZE = 1024 * 1024  # Bytes of a history file per audit task
+AUDIT_CACHE_SIZE = 65536  # Distinct commands each audit worker remembers
+
 # Logging
 ENABLE_LOGGING = True
-LOG_FILE = "terminalmate.log"
-LOG_COMMANDS = True  # Log all executed commands
+LOG_FILE = os.path.join(DATA_DIR, "terminalmate.log")  # JSON lines, one per event
+LOG_COMMANDS = True  # Include requests and commands in the log (timings are always logged)
+LOG_MAX_BYTES = 5 * 1024 * 1024  # Log size before it is rotated
+LOG_BACKUP_COUNT = 5  # Rotated logs kept, gzipped
+
+# Instrumentation (per-phase latency histograms, shown by the 'stats' command)
+INSTRUMENTATION_ENABLED = True
+METRICS_FILE = None  # Prometheus text file written on 'stats' and at exit (None = off)
+
+# Batch Mode (main.py --batch)
+BATCH_MAX_IN_FLIGHT = 4  # Requests generated concurrently (match OLLAMA_NUM_PARALLEL)
+
+# Daemon (python main.py serve, used by tm.py)
+DAEMON_SOCKET = os.path.join(
+    os.environ.get("XDG_RUNTIME_DIR") or os.path.join(os.path.expanduser("~"), ".terminalmate"),
+    "terminalmate.sock"
+)
+DAEMON_MAX_WORKERS = 4  # Requests generated at once; more wait their turn
+DAEMON_CLIENT_TIMEOUT = LLM_LOAD_TIMEOUT + 30  # Seconds tm.py waits for a reply
 
 # UI Settings
+INPUT_MODE = "speculative"  # 'speculative' (generate while typing) or 'basic'
+SPECULATIVE_DEBOUNCE = 0.4  # Seconds of typing pause before generating speculatively
+SPECULATIVE_MIN_CHARS = 8  # Don't speculate on inputs shorter than this
 USE_COLOR = True
 SHOW_COMMAND_EXPLANATION = True
-PROMPT_SYMBOL = "🤖 TerminalMate>"
\ No newline at end of file
+PROMPT_SYMBOL = "🤖 TerminalMate>"
+STARTUP_TARGET_MS = 150  # Budget from launch to the first prompt (checked by --profile-startup)
\ No newline at end of file
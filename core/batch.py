@@ -0,0 +1,174 @@
+"""
+Batch Runner - Translates a file of natural-language requests without the interactive UI
+"""
+import json
+import os
+import time
+from collections import deque
+from functools import partial
+from concurrent.futures import wait, FIRST_COMPLETED
+import config
+from safety.shell_parser import parse_command
+from utils.stats import summarize
+
+
+def read_requests(lines):
+    """
+    Yield requests from lines of text, skipping blanks and '#' comments
+
+    Args:
+        lines (iterable): A file object, sys.stdin or a list of strings
+    """
+    for line in lines:
+        request = line.strip()
+        if request and not request.startswith('#'):
+            yield request
+
+
+class BatchRunner:
+    """
+    Generates commands for many requests at once
+
+    Requests are read lazily and up to max_in_flight of them are generated
+    concurrently on the LLM engine's event loop. Results are written as
+    JSON lines in input order.
+    """
+
+    def __init__(self, llm, risk_analyzer, executor=None, max_in_flight=None, execute_safe=False):
+        """
+        Args:
+            llm (LLMEngine): Generates the commands
+            risk_analyzer (RiskAnalyzer): Classifies every generated command
+            executor (CommandExecutor): Runs SAFE commands if execute_safe is set
+            max_in_flight (int): Requests generated at once (default config.BATCH_MAX_IN_FLIGHT)
+            execute_safe (bool): Run commands classified SAFE, in input order
+        """
+        self.llm = llm
+        self.risk_analyzer = risk_analyzer
+        self.executor = executor
+        self.max_in_flight = max(1, max_in_flight or config.BATCH_MAX_IN_FLIGHT)
+        self.execute_safe = execute_safe
+        if execute_safe and executor is None:
+            raise ValueError("execute_safe needs an executor")
+
+    def build_context(self):
+        """Context for every request; no history, so requests don't depend on each other"""
+        return {
+            'current_dir': self.executor.get_current_directory() if self.executor else os.getcwd(),
+            'os': config.CURRENT_OS,
+            'shell': config.SHELL_TYPE,
+            'app_root': os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            'recent_history': []
+        }
+
+    def run(self, requests, output):
+        """
+        Generate, classify and optionally run a command for every request
+
+        Args:
+            requests (iterable): Natural-language requests
+            output (file): Where the JSON lines are written
+
+        Returns:
+            dict: {'requests', 'errors', 'executed', 'risk_levels' (counts),
+                   'seconds', 'latency' (summarize() of the seconds per request)}
+        """
+        requests = iter(requests)
+        context = self.build_context()
+        window = deque()  # Submitted requests in input order
+        # Finished results wait for slower ones ahead of them, up to this many
+        window_limit = self.max_in_flight * 4
+        summary = {'requests': 0, 'errors': 0, 'executed': 0, 'risk_levels': {}}
+        latencies = []
+        start = time.perf_counter()
+        exhausted = False
+
+        try:
+            while window or not exhausted:
+                in_flight = [entry['future'] for entry in window if not entry['future'].done()]
+                while not exhausted and len(in_flight) < self.max_in_flight and len(window) < window_limit:
+                    request = next(requests, None)
+                    if request is None:
+                        exhausted = True
+                        break
+                    entry = {'index': summary['requests'], 'request': request,
+                             'submitted': time.perf_counter(), 'finished': None}
+                    entry['future'] = self.llm.submit_command(request, context)
+                    entry['future'].add_done_callback(partial(_mark_finished, entry))
+                    window.append(entry)
+                    in_flight.append(entry['future'])
+                    summary['requests'] += 1
+
+                if window and not window[0]['future'].done():
+                    wait(in_flight, return_when=FIRST_COMPLETED)
+
+                while window and window[0]['future'].done():
+                    entry = window.popleft()
+                    latency = (entry['finished'] or time.perf_counter()) - entry['submitted']
+                    latencies.append(latency)
+                    record = self._process(entry['index'], entry['request'], entry['future'].result(),
+                                           latency, summary)
+                    output.write(json.dumps(record) + "\n")
+                output.flush()
+        finally:
+            for entry in window:
+                entry['future'].cancel()
+
+        summary['seconds'] = time.perf_counter() - start
+        summary['latency'] = summarize(latencies)
+        return summary
+
+    def _process(self, index, request, result, latency, summary):
+        """Risk-check one generated command, run it if allowed, and build its record"""
+        record = {
+            'index': index,
+            'request': request,
+            'command': result.get('command'),
+            'explanation': result.get('explanation'),
+            'latency_ms': round(latency * 1000, 1),
+            'cached': result.get('cached', False)
+        }
+        if result.get('error') or not record['command']:
+            record['error'] = result.get('explanation') or "No command generated"
+            summary['errors'] += 1
+            return record
+
+        risk = self.risk_analyzer.analyze_command(record['command'])
+        record['risk_level'] = risk['risk_level']
+        record['risk_reason'] = risk['reason']
+        record['warnings'] = risk['warnings']
+        summary['risk_levels'][risk['risk_level']] = summary['risk_levels'].get(risk['risk_level'], 0) + 1
+
+        if self.execute_safe:
+            record['executed'] = False
+            is_valid, _ = self.executor.validate_command(record['command'])
+            if is_valid and risk['risk_level'] == config.RISK_SAFE and not _privileged(record['command']):
+                execution = self.executor.execute(record['command'])
+                record.update({
+                    'executed': True,
+                    'success': execution['success'],
+                    'return_code': execution['return_code'],
+                    'output': execution['output'],
+                    'stderr': execution['error'],
+                    'output_file': execution['output_file'],
+                    'error_file': execution['error_file'],
+                    'resources': execution['resources']
+                })
+                summary['executed'] += 1
+        return record
+
+
+def _privileged(command):
+    """
+    True if any part of a command runs through sudo, doas or pkexec, or the
+    command can't be parsed to tell; such commands are never run unattended
+    """
+    try:
+        return any(cmd.privilege_wrapper for cmd in parse_command(command))
+    except ValueError:
+        return True
+
+
+def _mark_finished(entry, future):
+    """Record when generation finished, before the result waits its turn to be written"""
+    entry['finished'] = time.perf_counter()
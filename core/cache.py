@@ -0,0 +1,169 @@
+"""
+Response Cache - Persistent LRU cache for generated commands
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import config
+
+
+class ResponseCache:
+    def __init__(self, path=None, max_entries=None, ttl=None):
+        self.path = path or config.CACHE_FILE
+        self.max_entries = max_entries if max_entries is not None else config.CACHE_MAX_ENTRIES
+        self.ttl = ttl if ttl is not None else config.CACHE_TTL
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # The engine may be called from worker threads, so share one
+        # connection and serialize access with a lock
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def normalize_input(user_input):
+        """Normalize a request so trivial variations share a cache entry"""
+        return " ".join(user_input.lower().split())
+
+    def make_key(self, user_input, context, model_name, temperature):
+        """
+        Build a cache key for a request
+
+        Args:
+            user_input (str): Natural language request
+            context (dict): Request context (current directory, os, shell)
+            model_name (str): Model used for generation
+            temperature (float): Sampling temperature
+
+        Returns:
+            str: Hex digest identifying the request
+        """
+        context = context or {}
+        parts = [
+            self.normalize_input(user_input),
+            context.get('os', config.CURRENT_OS),
+            context.get('shell', config.SHELL_TYPE),
+            context.get('current_dir', ''),
+            model_name,
+            repr(temperature),
+        ]
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key, peek=False):
+        """
+        Return the cached result for key, or None on a miss
+
+        Args:
+            peek (bool): Leave the hit/miss counts and the entry's recency
+                         alone (for speculative lookups)
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                if not peek:
+                    self.misses += 1
+                return None
+
+            value, created_at = row
+            if self.ttl and now - created_at > self.ttl:
+                if peek:
+                    return None
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+
+            if peek:
+                return json.loads(value)
+            self._conn.execute(
+                "UPDATE responses SET last_access = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+
+        return json.loads(value)
+
+    def put(self, key, result):
+        """Store a result and evict least recently used entries if needed"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(result), now, now)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Drop expired entries and trim the cache to max_entries"""
+        if self.ttl:
+            self._conn.execute(
+                "DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl,)
+            )
+
+        if self.max_entries:
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def clear(self):
+        """Remove all cached entries"""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def stats(self):
+        """
+        Get cache statistics
+
+        Returns:
+            dict: {
+                'entries': int,
+                'hits': int,
+                'misses': int,
+                'hit_rate': float
+            }
+        """
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+        lookups = self.hits + self.misses
+        return {
+            'entries': entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,112 @@
+"""
+Candidate Scoring - Picks the best of several generated commands
+"""
+from collections import Counter
+import config
+from safety.shell_parser import is_balanced
+
+
+# Preference between otherwise equal candidates
+RISK_WEIGHTS = {
+    config.RISK_SAFE: 1.0,
+    config.RISK_CAUTION: 0.7,
+    config.RISK_CRITICAL: 0.4
+}
+
+_default_analyzer = None
+
+
+def _get_analyzer():
+    global _default_analyzer
+    if _default_analyzer is None:
+        from safety.risk_analyzer import RiskAnalyzer
+        _default_analyzer = RiskAnalyzer()
+    return _default_analyzer
+
+
+def normalize_command(command):
+    """Normalize a command for agreement voting (whitespace only; quoting matters)"""
+    return " ".join(command.split())
+
+
+def check_syntax(command):
+    """
+    Cheap syntax check that needs no shell
+
+    Returns:
+        bool: True if quotes and brackets are balanced (quoted brackets and
+              case patterns don't count)
+    """
+    return is_balanced(command)
+
+
+def select_candidate(candidates, risk_analyzer=None, requested=None):
+    """
+    Score candidates by agreement, risk and syntax and return the best one
+
+    Args:
+        candidates (list): Parsed results from _parse_response
+        risk_analyzer (RiskAnalyzer): Analyzer used to weigh risk
+        requested (int): Candidates asked for (default: as many as given);
+                         ones that never arrived count as disagreeing
+
+    Returns:
+        dict: The winning result with a real 'confidence' and a
+              'candidates' summary, or None if there are no candidates
+    """
+    candidates = [c for c in candidates if c.get('command') and not c.get('error')]
+    if not candidates:
+        return None
+
+    risk_analyzer = risk_analyzer or _get_analyzer()
+    total = max(requested or 0, len(candidates))
+    votes = Counter(normalize_command(c['command']) for c in candidates)
+
+    scored = []
+    for candidate in candidates:
+        key = normalize_command(candidate['command'])
+        risk_level = risk_analyzer.analyze_command(candidate['command'])['risk_level']
+        agreement = votes[key] / total
+        syntax_ok = check_syntax(candidate['command'])
+        score = (
+            0.6 * agreement
+            + 0.25 * RISK_WEIGHTS.get(risk_level, 0.5)
+            + 0.15 * (1.0 if syntax_ok else 0.0)
+        )
+        scored.append({
+            'command': candidate['command'],
+            'risk_level': risk_level,
+            'agreement': agreement,
+            'syntax_ok': syntax_ok,
+            'score': score,
+            'result': candidate
+        })
+
+    scored.sort(key=lambda item: item['score'], reverse=True)
+    best = scored[0]
+
+    # Agreement is the main signal; a broken command or an answer that
+    # ignored the response format caps how sure we can be
+    confidence = best['agreement']
+    if not best['syntax_ok']:
+        confidence *= 0.5
+    confidence *= best['result'].get('confidence', 0.9)
+
+    result = dict(best['result'])
+    result['confidence'] = round(confidence, 3)
+    result['candidates'] = []
+    seen = set()
+    for item in scored:
+        key = normalize_command(item['command'])
+        if key in seen:
+            continue
+        seen.add(key)
+        result['candidates'].append({
+            'command': item['command'],
+            'risk_level': item['risk_level'],
+            'votes': votes[key],
+            'syntax_ok': item['syntax_ok'],
+            'score': round(item['score'], 3)
+        })
+    result['total_candidates'] = total
+    return result
@@ -0,0 +1,170 @@
+"""
+Daemon - Keeps the LLM engine, caches and risk rules loaded for thin clients
+
+Clients (tm.py) connect to a Unix domain socket and exchange one JSON
+object per line. Supported messages:
+
+    {"op": "generate", "request": str, "cwd": str, "use_cache": bool}
+        -> {"ok": true, "result": {...}, "risk": {...}, "latency_ms": float}
+    {"op": "ping"}      -> {"ok": true, "pid", "model", "uptime", "served", "active",
+                            "max_workers", "metrics" (Metrics.snapshot())}
+    {"op": "shutdown"}  -> {"ok": true}
+
+Errors are answered with {"ok": false, "error": str}.
+"""
+import asyncio
+import json
+import os
+import signal
+import socket
+import time
+import config
+from core.llm_engine import LLMEngine
+from safety.risk_analyzer import RiskAnalyzer
+from utils.instrumentation import metrics
+
+
+class TerminalMateDaemon:
+    def __init__(self, socket_path=None, max_workers=None, llm=None, risk_analyzer=None):
+        """
+        Args:
+            socket_path (str): Where to listen (default config.DAEMON_SOCKET)
+            max_workers (int): Requests generated at once; more wait their
+                               turn (default config.DAEMON_MAX_WORKERS)
+            llm (LLMEngine): Engine to serve from (created if not given)
+            risk_analyzer (RiskAnalyzer): Analyzer for generated commands
+        """
+        self.socket_path = socket_path or config.DAEMON_SOCKET
+        self.max_workers = max(1, max_workers or config.DAEMON_MAX_WORKERS)
+        self.llm = llm or LLMEngine()
+        self.risk_analyzer = risk_analyzer or RiskAnalyzer()
+        self.started = time.time()
+        self.served = 0
+        self.active = 0
+        self._slots = None
+        self._stop = None
+
+    def serve_forever(self, on_ready=None):
+        """
+        Listen until SIGINT/SIGTERM or a shutdown message
+
+        Args:
+            on_ready (callable): Called once the socket accepts connections
+
+        Raises:
+            RuntimeError: If Unix sockets are unavailable or another daemon
+                          is already listening on the socket
+        """
+        if not hasattr(socket, 'AF_UNIX'):
+            raise RuntimeError("The daemon needs Unix domain sockets, which this platform lacks")
+        try:
+            asyncio.run(self._serve(on_ready))
+        finally:
+            self.llm.close()
+
+    async def _serve(self, on_ready):
+        self._claim_socket()
+        self._slots = asyncio.Semaphore(self.max_workers)
+        self._stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, self._stop.set)
+
+        server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        os.chmod(self.socket_path, 0o600)  # Only this user may ask for (and run) commands
+        if config.LLM_WARMUP:
+            self.llm.start_warm_up()
+        if on_ready:
+            on_ready()
+
+        try:
+            async with server:
+                await self._stop.wait()
+        finally:
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    def _claim_socket(self):
+        """Remove a socket left behind by a daemon that died, but never a live one"""
+        os.makedirs(os.path.dirname(self.socket_path) or ".", exist_ok=True)
+        if not os.path.exists(self.socket_path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.socket_path)
+        except OSError:
+            os.unlink(self.socket_path)
+            return
+        finally:
+            probe.close()
+        raise RuntimeError(f"A daemon is already listening on {self.socket_path}")
+
+    async def _handle(self, reader, writer):
+        """Answer each JSON line a client sends until it disconnects"""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    reply = await self._dispatch(json.loads(line))
+                except (ValueError, AttributeError) as e:
+                    reply = {'ok': False, 'error': f"Bad request: {e}"}
+                writer.write(json.dumps(reply).encode('utf-8') + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.LimitOverrunError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            pass  # The daemon is shutting down; a cancelled handler would be logged as an error
+        finally:
+            writer.close()
+
+    async def _dispatch(self, message):
+        op = message.get('op')
+        if op == 'generate':
+            return await self._generate(message)
+        if op == 'ping':
+            return {
+                'ok': True,
+                'pid': os.getpid(),
+                'model': self.llm.model_name,
+                'uptime': time.time() - self.started,
+                'served': self.served,
+                'active': self.active,
+                'max_workers': self.max_workers,
+                'metrics': metrics.snapshot()
+            }
+        if op == 'shutdown':
+            self._stop.set()
+            return {'ok': True}
+        return {'ok': False, 'error': f"Unknown op: {op}"}
+
+    async def _generate(self, message):
+        """Generate and risk-check a command for a client's request"""
+        request = message.get('request')
+        if not isinstance(request, str) or not request.strip():
+            return {'ok': False, 'error': "Missing request"}
+
+        # The client's directory, not the daemon's, is where the command will run
+        context = {
+            'current_dir': message.get('cwd') or os.getcwd(),
+            'os': config.CURRENT_OS,
+            'shell': config.SHELL_TYPE,
+            'app_root': os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            'recent_history': []
+        }
+        with metrics.timer('generate') as timer:
+            async with self._slots:
+                self.active += 1
+                try:
+                    future = self.llm.submit_command(request.strip(), context, use_cache=message.get('use_cache', True))
+                    result = await asyncio.wrap_future(future)
+                finally:
+                    self.active -= 1
+        self.served += 1
+
+        reply = {'ok': True, 'result': result, 'latency_ms': timer.ms}
+        if result.get('command') and not result.get('error'):
+            with metrics.timer('risk'):
+                reply['risk'] = self.risk_analyzer.analyze_command(result['command'])
+        return reply
@@ -0,0 +1,73 @@
+"""
+Daemon Client - Talks to a running TerminalMate daemon (see core/daemon.py)
+
+Kept free of heavy imports so a client starts in a few milliseconds.
+"""
+import json
+import socket
+import config
+
+
+class DaemonUnavailable(Exception):
+    """Raised when no daemon is listening on the socket"""
+
+
+class DaemonConnection:
+    """
+    One connection to the daemon
+
+    send() and receive() are separate so the client can do other work
+    (like importing its UI) while the daemon generates.
+    """
+
+    def __init__(self, socket_path=None, timeout=None):
+        """
+        Args:
+            socket_path (str): Daemon socket (default config.DAEMON_SOCKET)
+            timeout (float): Seconds to wait for a reply (default config.DAEMON_CLIENT_TIMEOUT)
+
+        Raises:
+            DaemonUnavailable: If nothing is listening on the socket
+        """
+        self.socket_path = socket_path or config.DAEMON_SOCKET
+        if not hasattr(socket, 'AF_UNIX'):
+            raise DaemonUnavailable("Unix domain sockets are not available on this platform")
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.settimeout(timeout or config.DAEMON_CLIENT_TIMEOUT)
+        try:
+            self._socket.connect(self.socket_path)
+        except (FileNotFoundError, ConnectionRefusedError) as e:
+            self._socket.close()
+            raise DaemonUnavailable(f"No TerminalMate daemon on {self.socket_path}") from e
+        self._reader = self._socket.makefile('rb')
+
+    def send(self, message):
+        """Send one message (a dict)"""
+        self._socket.sendall(json.dumps(message).encode('utf-8') + b"\n")
+
+    def receive(self):
+        """
+        Wait for the reply to the oldest unanswered message
+
+        Raises:
+            ConnectionError: If the daemon closed the connection
+        """
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("The daemon closed the connection")
+        return json.loads(line)
+
+    def request(self, message):
+        """Send a message and wait for its reply"""
+        self.send(message)
+        return self.receive()
+
+    def close(self):
+        self._reader.close()
+        self._socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,30 +1,67 @@
 """
 Command Executor - Safely executes terminal commands
 """
+import codecs
+import locale
+import queue
 import subprocess
 import os
+import threading
+import time
 import config
+from core import resources
+from core.output_buffer import OutputBuffer, prune_spill_files
+from core.shell_session import PersistentShell
+from safety.shell_parser import parse_command
+from utils.instrumentation import metrics
 
 
 class CommandExecutor:
-    def __init__(self):
+    def __init__(self, persistent_shell=None):
+        """
+        Args:
+            persistent_shell (bool): Run commands in one long-lived bash
+                                     process (defaults to config.PERSISTENT_SHELL)
+        """
         self.current_dir = os.getcwd()
+        if persistent_shell is None:
+            persistent_shell = config.PERSISTENT_SHELL
+        # Windows has no bash to keep alive; always spawn per command there
+        self.shell_session = None
+        if persistent_shell and not config.IS_WINDOWS:
+            self.shell_session = PersistentShell(cwd=self.current_dir)
         
-    def execute(self, command):
+    def execute(self, command, on_output=None):
         """
         Execute a command and return results
         
+        Output is read incrementally and only its head and tail are kept in
+        memory; anything beyond that is spilled to a temp file.
+        
         Args:
             command (str): Command to execute
+            on_output (callable): Called with (stream, text) as output arrives,
+                                  stream being 'stdout' or 'stderr'
             
         Returns:
             dict: {
                 'success': bool,
                 'output': str,
                 'error': str,
-                'return_code': int
+                'return_code': int,
+                'truncated': bool,
+                'output_file': str (full stdout when truncated, else None),
+                'error_file': str (full stderr when truncated, else None),
+                'resources': ProcessTreeMonitor.stop() usage of the command's
+                             processes, or None if not tracked
             }
         """
+        if self.shell_session is not None:
+            return self._execute_persistent(command, on_output)
+        
+        stdout = OutputBuffer()
+        stderr = OutputBuffer()
+        monitor = None
         try:
             # Determine shell based on OS
             if config.IS_WINDOWS:
@@ -34,6 +71,11 @@ class CommandExecutor:
                 shell = True
                 executable = '/bin/bash'
             
+            # With no terminal to share, the command gets its own session so a
+            # timeout can kill its whole process group. Commands run from a
+            # terminal stay in ours: they may need it (sudo prompts, pagers)
+            own_session = not config.IS_WINDOWS and not _stdin_is_terminal()
+            
             # Execute command
             process = subprocess.Popen(
                 command,
@@ -41,12 +83,14 @@ class CommandExecutor:
                 executable=executable,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
-                text=True,
-                cwd=self.current_dir
+                cwd=self.current_dir,
+                start_new_session=own_session,
+                preexec_fn=resources.apply_limits if resources.limits_configured() else None
             )
+            monitor = resources.monitor_process(process.pid)
             
-            # Get output
-            stdout, stderr = process.communicate(timeout=config.COMMAND_TIMEOUT)
+            # Read output as it arrives
+            self._stream_output(process, {'stdout': stdout, 'stderr': stderr}, on_output, monitor, own_session)
             
             # Check if command changed directory
             if command.strip().startswith('cd '):
@@ -54,31 +98,135 @@ class CommandExecutor:
             
             # Special handling for explorer command which determines success differently
             # Explorer often returns 1 but works fine if no stderr
+            error = stderr.getvalue().strip()
             success = process.returncode == 0
-            if not success and command.strip().lower().startswith('explorer ') and not stderr.strip():
+            if not success and command.strip().lower().startswith('explorer ') and not error:
                 success = True
+            if resources.exceeded_cpu_limit(process.returncode):
+                error = f"Stopped after {config.COMMAND_MAX_CPU_SECONDS}s of CPU time (COMMAND_MAX_CPU_SECONDS)"
             
-            return {
-                'success': success,
-                'output': stdout.strip(),
-                'error': stderr.strip() if stderr else None,
-                'return_code': process.returncode
-            }
+            return self._result(success, stdout, error or None, process.returncode, stderr, monitor)
             
         except subprocess.TimeoutExpired:
-            return {
-                'success': False,
-                'output': '',
-                'error': f'Command timed out after {config.COMMAND_TIMEOUT} seconds',
-                'return_code': -1
-            }
+            return self._result(False, stdout, f'Command timed out after {config.COMMAND_TIMEOUT} seconds',
+                                -1, stderr, monitor)
+        except Exception as e:
+            return self._result(False, stdout, str(e), -1, stderr, monitor)
+        finally:
+            if monitor is not None:
+                monitor.stop()
+    
+    def _stream_output(self, process, buffers, on_output, monitor=None, own_session=False):
+        """
+        Pump a process's stdout and stderr into buffers until it exits
+        
+        Reader threads feed a bounded queue, so a fast producer blocks instead
+        of piling up output in memory, and on_output runs on the caller's thread.
+        
+        Raises:
+            subprocess.TimeoutExpired: If COMMAND_TIMEOUT passes first (the
+                                       process and everything it started are
+                                       killed, as on Ctrl-C)
+        """
+        chunks = queue.Queue(maxsize=64)
+        stop = threading.Event()
+        readers = [
+            threading.Thread(target=_pump, args=(pipe, name, chunks, stop), daemon=True)
+            for pipe, name in ((process.stdout, 'stdout'), (process.stderr, 'stderr'))
+        ]
+        for reader in readers:
+            reader.start()
+        
+        deadline = time.monotonic() + config.COMMAND_TIMEOUT
+        open_streams = len(readers)
+        try:
+            while open_streams:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise subprocess.TimeoutExpired(process.args, config.COMMAND_TIMEOUT)
+                try:
+                    name, text = chunks.get(timeout=remaining)
+                except queue.Empty:
+                    continue
+                if text is None:
+                    open_streams -= 1
+                    continue
+                buffers[name].write(text)
+                if on_output:
+                    on_output(name, text)
+            if monitor is not None and resources.wait_for_exit(process.pid, max(deadline - time.monotonic(), 0.1)):
+                monitor.stop()  # Last sample before the exit status, and the usage, are reaped
+            process.wait(timeout=max(deadline - time.monotonic(), 0.1))
+        except BaseException:
+            resources.kill_process_tree(process.pid, own_group=own_session)
+            process.wait()
+            raise
+        finally:
+            stop.set()
+            for buffer in buffers.values():
+                buffer.close()
+    
+    def _result(self, success, stdout, error, return_code, stderr, monitor=None):
+        """Build the result dict from the output buffers"""
+        return {
+            'success': success,
+            'output': stdout.getvalue().strip(),
+            'error': error,
+            'return_code': return_code,
+            'truncated': stdout.truncated or stderr.truncated,
+            'output_file': stdout.path,
+            'error_file': stderr.path,
+            'resources': monitor.stop() if monitor is not None else None
+        }
+    
+    def _execute_persistent(self, command, on_output=None):
+        """Execute a command in the persistent shell session"""
+        monitor = None
+        try:
+            if not self.shell_session.alive:
+                self.shell_session.start()
+            # Only the shell's children are the command; the shell itself is not
+            monitor = resources.monitor_process(self.shell_session.pid, include_root=False)
+            result = self.shell_session.run(command, timeout=config.COMMAND_TIMEOUT, on_output=on_output)
         except Exception as e:
+            if monitor is not None:
+                monitor.stop()
             return {
                 'success': False,
                 'output': '',
                 'error': str(e),
-                'return_code': -1
+                'return_code': -1,
+                'truncated': False,
+                'output_file': None,
+                'error_file': None,
+                'resources': None
             }
+        except BaseException:
+            if monitor is not None:
+                monitor.stop()
+            raise
+        
+        stdout, stderr = result['output'], result['error']
+        if result['timed_out']:
+            return self._result(False, stdout, f'Command timed out after {config.COMMAND_TIMEOUT} seconds',
+                                -1, stderr, monitor)
+        
+        # The shell reports its own directory, so cd, pushd and friends all work
+        if result['cwd'] != self.current_dir and os.path.isdir(result['cwd']):
+            self.current_dir = result['cwd']
+            os.chdir(self.current_dir)
+        
+        error = stderr.getvalue().strip()
+        if resources.exceeded_cpu_limit(result['return_code']):
+            error = f"Stopped after {config.COMMAND_MAX_CPU_SECONDS}s of CPU time (COMMAND_MAX_CPU_SECONDS)"
+        return self._result(result['return_code'] == 0, stdout, error or None, result['return_code'], stderr,
+                            monitor)
+    
+    def close(self):
+        """Stop the persistent shell session, if any, and delete old full-output files"""
+        if self.shell_session is not None:
+            self.shell_session.close()
+        prune_spill_files()
     
     def _handle_cd_command(self, command):
         """Handle directory change commands"""
@@ -107,6 +255,7 @@ class CommandExecutor:
         """Get current working directory"""
         return self.current_dir
     
+    @metrics.timer('validate')
     def validate_command(self, command):
         """
         Basic validation of command syntax
@@ -117,10 +266,52 @@ class CommandExecutor:
         if not command or not command.strip():
             return False, "Empty command"
         
-        # Check for command injection attempts
-        dangerous_chars = [';', '&&', '||', '|', '`', '$()']
-        if any(char in command for char in dangerous_chars):
-            # Allow these in certain contexts but warn
-            return True, "Warning: Command contains chaining operators"
+        try:
+            commands = parse_command(command)
+        except ValueError as e:
+            return False, f"Could not parse command: {e}"
+        
+        # Allow chaining and substitutions, but warn; the risk analyzer judges each part
+        top_level = [cmd for cmd in commands if cmd.depth == 0]
+        operators = list(dict.fromkeys(cmd.operator for cmd in top_level if cmd.operator))
+        if operators:
+            return True, f"Warning: Command chains {len(top_level)} commands ({' '.join(operators)})"
+        if any(cmd.depth for cmd in commands):
+            return True, "Warning: Command contains command substitutions"
         
-        return True, None
\ No newline at end of file
+        return True, None
+
+
+def _stdin_is_terminal():
+    try:
+        return os.isatty(0)
+    except OSError:
+        return False
+
+
+def _pump(pipe, name, chunks, stop):
+    """Read a pipe in a background thread and queue decoded text, then None at EOF"""
+    # Same encoding text=True would have used
+    decoder = codecs.getincrementaldecoder(locale.getpreferredencoding(False))('replace')
+    try:
+        for data in iter(lambda: os.read(pipe.fileno(), 65536), b''):
+            text = decoder.decode(data)
+            if text and not _put(chunks, (name, text), stop):
+                return
+        text = decoder.decode(b'', final=True)
+        if text and not _put(chunks, (name, text), stop):
+            return
+        _put(chunks, (name, None), stop)
+    finally:
+        pipe.close()
+
+
+def _put(chunks, item, stop):
+    """Queue an item unless the consumer has gone away"""
+    while not stop.is_set():
+        try:
+            chunks.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
@@ -0,0 +1,223 @@
+"""
+History Store - Persistent record of executed commands, searchable by request
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+import config
+
+_WORD = re.compile(r"\w+")
+# Too common in requests to say anything about which command fits
+_STOPWORDS = frozenset("""
+a all an and any are as at be by can for from here i in into is it me my of on
+please show that the their them these this those to with you your
+""".split())
+# Words in more requests than this barely move bm25 but are costly to rank
+_COMMON_WORD_MATCHES = 500
+
+
+class HistoryStore:
+    """
+    Append-only log of requests and the commands run for them
+
+    An FTS5 index over the requests finds past successful commands similar
+    to a new request; they are sent to the LLM as examples. Where SQLite
+    lacks FTS5, the most recent successful commands sharing a word with the
+    request are used instead.
+    """
+
+    def __init__(self, path=None, max_entries=None):
+        """
+        Args:
+            path (str): Database file (default config.HISTORY_FILE)
+            max_entries (int): Oldest entries are dropped beyond this
+                               (default config.HISTORY_MAX_ENTRIES, 0 = keep all)
+        """
+        self.path = path or config.HISTORY_FILE
+        self.max_entries = max_entries if max_entries is not None else config.HISTORY_MAX_ENTRIES
+        self._lock = threading.Lock()
+        self._added = 0
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Written from the main thread, searched from the LLM engine's thread
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS commands (
+                id INTEGER PRIMARY KEY,
+                timestamp REAL NOT NULL,
+                input TEXT NOT NULL,
+                command TEXT NOT NULL,
+                cwd TEXT,
+                exit_code INTEGER,
+                duration REAL
+            )"""
+        )
+        self.fts = self._create_index()
+        self._conn.commit()
+
+    def _create_index(self):
+        """Create the full-text index over requests, kept in sync by triggers"""
+        try:
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS commands_fts USING fts5("
+                "input, content='commands', content_rowid='id', tokenize='porter unicode61')"
+            )
+        except sqlite3.OperationalError:
+            return False  # SQLite built without FTS5
+        # Only successful commands are worth retrieving, so only they are indexed
+        self._conn.executescript(
+            """CREATE TRIGGER IF NOT EXISTS commands_ai AFTER INSERT ON commands
+            WHEN new.exit_code = 0 BEGIN
+                INSERT INTO commands_fts (rowid, input) VALUES (new.id, new.input);
+            END;
+            CREATE TRIGGER IF NOT EXISTS commands_ad AFTER DELETE ON commands
+            WHEN old.exit_code = 0 BEGIN
+                INSERT INTO commands_fts (commands_fts, rowid, input) VALUES ('delete', old.id, old.input);
+            END;"""
+        )
+        return True
+
+    def add(self, user_input, command, cwd=None, exit_code=None, duration=None):
+        """
+        Record an executed command
+
+        Args:
+            user_input (str): The request the command was generated for
+            command (str): The command that ran
+            cwd (str): Directory it ran in
+            exit_code (int): Its exit code (0 = success)
+            duration (float): Seconds it took
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO commands (timestamp, input, command, cwd, exit_code, duration) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (time.time(), user_input, command, cwd, exit_code, duration)
+            )
+            self._added += 1
+            # Trimming scans the table, so only do it now and then
+            if self.max_entries and self._added % 100 == 1:
+                self._conn.execute(
+                    "DELETE FROM commands WHERE id <= (SELECT MAX(id) FROM commands) - ?",
+                    (self.max_entries,)
+                )
+            self._conn.commit()
+
+    def similar(self, user_input, limit=None):
+        """
+        Find past successful commands for requests like this one
+
+        Args:
+            user_input (str): The new request
+            limit (int): Most examples returned (default config.HISTORY_EXAMPLES)
+
+        Returns:
+            list: Dicts with 'input' and 'command', best match first; a command
+                  appears at most once
+        """
+        limit = limit if limit is not None else config.HISTORY_EXAMPLES
+        words = set(_WORD.findall(user_input.lower())) - _STOPWORDS
+        if not limit or not words:
+            return []
+
+        with self._lock:
+            if self.fts:
+                rows = self._search_index(words, limit * 4)
+            else:
+                rows = self._conn.execute(
+                    "SELECT input, command FROM commands WHERE exit_code = 0 "
+                    "ORDER BY id DESC LIMIT ?",
+                    (config.HISTORY_SCAN_LIMIT,)
+                ).fetchall()
+                rows = [row for row in rows if words & set(_WORD.findall(row[0].lower()))]
+
+        examples = []
+        seen = set()
+        for past_input, command in rows:
+            if command not in seen and past_input.strip().lower() != user_input.strip().lower():
+                seen.add(command)
+                examples.append({'input': past_input, 'command': command})
+                if len(examples) == limit:
+                    break
+        return examples
+
+    def _search_index(self, words, limit):
+        """
+        Rank indexed requests against the words of a new one
+
+        Requests sharing any of the less common words match, best bm25 score
+        first. If every word is common, requests must contain all of them.
+        """
+        terms = [f'"{word}"' for word in sorted(words)]
+        rare = [term for term in terms if self._conn.execute(
+            "SELECT COUNT(*) FROM (SELECT rowid FROM commands_fts WHERE commands_fts MATCH ? LIMIT ?)",
+            (term, _COMMON_WORD_MATCHES + 1)
+        ).fetchone()[0] <= _COMMON_WORD_MATCHES]
+        query = " OR ".join(rare) if rare else " AND ".join(terms)
+        # Ranking alone in the subquery lets FTS5 stop after the best rows
+        return self._conn.execute(
+            "SELECT c.input, c.command FROM ("
+            "SELECT rowid, rank FROM commands_fts WHERE commands_fts MATCH ? "
+            "ORDER BY rank LIMIT ?) AS hits "
+            "JOIN commands c ON c.id = hits.rowid ORDER BY hits.rank",
+            (query, limit)
+        ).fetchall()
+
+    def recent(self, limit=10):
+        """
+        Get the latest entries, newest first
+
+        Returns:
+            list: Dicts with 'timestamp', 'input', 'command', 'cwd', 'exit_code' and 'duration'
+        """
+        return self._select("ORDER BY id DESC LIMIT ?", (limit,))
+
+    def search(self, text, limit=10):
+        """Get the latest entries whose request or command contains text, newest first"""
+        pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        return self._select(
+            "WHERE input LIKE ? ESCAPE '\\' OR command LIKE ? ESCAPE '\\' ORDER BY id DESC LIMIT ?",
+            (pattern, pattern, limit)
+        )
+
+    def _select(self, clause, params):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT timestamp, input, command, cwd, exit_code, duration FROM commands " + clause,
+                params
+            ).fetchall()
+        keys = ('timestamp', 'input', 'command', 'cwd', 'exit_code', 'duration')
+        return [dict(zip(keys, row)) for row in rows]
+
+    def stats(self):
+        """
+        Get history statistics
+
+        Returns:
+            dict: {'entries': int, 'succeeded': int, 'indexed': bool}
+        """
+        with self._lock:
+            entries, succeeded = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(exit_code = 0), 0) FROM commands"
+            ).fetchone()
+        return {'entries': entries, 'succeeded': succeeded, 'indexed': self.fts}
+
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._conn.execute("DELETE FROM commands")
+            if self.fts:
+                self._conn.execute("INSERT INTO commands_fts (commands_fts) VALUES ('rebuild')")
+            self._conn.commit()
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
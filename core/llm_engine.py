@@ -1,70 +1,678 @@
 """
 LLM Engine for interacting with Ollama models
 """
-import ollama
+import asyncio
+import functools
+import threading
+import time
 import os
 import config
+from core.cache import ResponseCache
+from core.history import HistoryStore
+from utils.instrumentation import metrics
 
 
-class LLMEngine:
-    def __init__(self, model_name=None):
+class LLMTimeoutError(Exception):
+    """Raised when Ollama does not answer within the configured timeout"""
+
+
+class AsyncLLMEngine:
+    """asyncio engine with timeouts, retries and cancellation"""
+    
+    def __init__(self, model_name=None, cache=None, semantic_cache=None, host=None, history=None):
         self.model_name = model_name or config.LLM_MODEL
+        self.host = host or config.OLLAMA_HOST
         self.conversation_history = []
+        if cache is None and config.CACHE_ENABLED:
+            cache = ResponseCache()
+        self.cache = cache
+        if history is None and config.HISTORY_ENABLED:
+            history = HistoryStore()
+        self.history = history
+        self._semantic_cache = semantic_cache
+        self._semantic_cache_lock = threading.Lock()
+        self.startup_timings = {}
+        self.last_metrics = {}
+        self._client = None
+        self._model_loaded = False
+        self._warm_up_task = None
+    
+    @property
+    def semantic_cache(self):
+        # numpy and the saved index load on first use (or during warm-up), not at startup
+        if self._semantic_cache is None and config.SEMANTIC_CACHE_ENABLED:
+            with self._semantic_cache_lock:
+                if self._semantic_cache is None:
+                    from core.semantic_cache import SemanticCache
+                    self._semantic_cache = SemanticCache()
+        return self._semantic_cache
+    
+    @property
+    def client(self):
+        # Created on first use so it binds to the loop that runs the engine;
+        # importing ollama (and httpx) there keeps it off the startup path
+        if self._client is None:
+            import ollama
+            self._client = ollama.AsyncClient(host=self.host)
+        return self._client
+    
+    async def warm_up(self):
+        """
+        Ask Ollama to load the model and keep it resident
+        
+        Returns:
+            bool: True if the model is loaded
+        """
+        if self._warm_up_task is None:
+            self._warm_up_task = asyncio.ensure_future(self._warm_up())
+        return await asyncio.shield(self._warm_up_task)
+    
+    async def _warm_up(self):
+        start = time.perf_counter()
+        # Load the semantic cache in a worker thread while Ollama loads the model
+        preload = asyncio.get_running_loop().run_in_executor(None, lambda: self.semantic_cache)
+        try:
+            # An empty prompt only loads the model; nothing is generated
+            response = await asyncio.wait_for(
+                self.client.generate(model=self.model_name, prompt='', keep_alive=config.LLM_KEEP_ALIVE),
+                config.LLM_LOAD_TIMEOUT
+            )
+            self._model_loaded = True
+            self.startup_timings['warm_up'] = time.perf_counter() - start
+            self.startup_timings['warm_up_load'] = _seconds(response.get('load_duration'))
+            loaded = True
+        except Exception as e:
+            self.startup_timings['warm_up_error'] = _describe_error(e)
+            loaded = False
+        await asyncio.gather(preload, return_exceptions=True)
+        return loaded
+    
+    def _record_metrics(self, start, response, deferred=None):
+        """
+        Keep Ollama's counters for the last request and timing of the first one
+        
+        Args:
+            deferred (list): Queue the counters here instead, for a speculative
+                             request (see generate_command)
+        """
+        self._model_loaded = True
+        elapsed = time.perf_counter() - start
+        if deferred is not None:
+            deferred.append(functools.partial(self._count_response, response, elapsed))
+        else:
+            self._count_response(response, elapsed)
+    
+    def _count_response(self, response, elapsed):
+        self.last_metrics = {
+            'prompt_eval_count': response.get('prompt_eval_count') or 0,
+            'prompt_eval_duration': _seconds(response.get('prompt_eval_duration')),
+            'eval_count': response.get('eval_count') or 0,
+            'eval_duration': _seconds(response.get('eval_duration')),
+            'load_duration': _seconds(response.get('load_duration')),
+            'total_duration': _seconds(response.get('total_duration'))
+        }
+        metrics.increment('ollama_requests')
+        metrics.increment('ollama_prompt_tokens', self.last_metrics['prompt_eval_count'])
+        metrics.increment('ollama_eval_tokens', self.last_metrics['eval_count'])
+        metrics.increment('ollama_eval_seconds', self.last_metrics['eval_duration'])
+        metrics.observe('ollama_prompt_eval', self.last_metrics['prompt_eval_duration'] * 1000)
+        metrics.observe('ollama_eval', self.last_metrics['eval_duration'] * 1000)
+        if self.last_metrics['load_duration']:
+            metrics.observe('ollama_load', self.last_metrics['load_duration'] * 1000)
+        
+        if 'first_request' not in self.startup_timings:
+            self.startup_timings['first_request'] = elapsed
+            self.startup_timings['first_request_load'] = self.last_metrics['load_duration']
+    
+    async def _request_timeout(self):
+        """
+        Get the timeout for the next request
+        
+        A request that has to load the model gets LLM_LOAD_TIMEOUT; once the
+        model is known to be resident LLM_TIMEOUT applies.
+        """
+        if self._warm_up_task is not None and not self._warm_up_task.done():
+            try:
+                await asyncio.wait_for(asyncio.shield(self._warm_up_task), config.LLM_LOAD_TIMEOUT)
+            except asyncio.TimeoutError:
+                pass
+        return config.LLM_TIMEOUT if self._model_loaded else config.LLM_LOAD_TIMEOUT
+    
+    async def _chat(self, messages, options=None):
+        """Call Ollama with a hard timeout, retrying transient failures with backoff"""
+        return await self._with_retries(lambda: self.client.chat(
+            model=self.model_name,
+            messages=messages,
+            options=options if options is not None else {'temperature': config.LLM_TEMPERATURE},
+            keep_alive=config.LLM_KEEP_ALIVE
+        ))
+    
+    async def _open_stream(self, messages, options=None):
+        """
+        Start a streaming chat and wait for its first chunk
+        
+        The first chunk is covered by the same timeout and retries as a
+        non-streaming call; nothing has been shown to the user yet, so a
+        retry is invisible.
+        
+        Returns:
+            tuple: (first chunk, async iterator over the remaining chunks)
+        """
+        async def first_chunk():
+            stream = await self.client.chat(
+                model=self.model_name,
+                messages=messages,
+                options=options if options is not None else {'temperature': config.LLM_TEMPERATURE},
+                keep_alive=config.LLM_KEEP_ALIVE,
+                stream=True
+            )
+            try:
+                return await stream.__anext__(), stream
+            except BaseException:
+                await _close_stream(stream)
+                raise
         
-    def generate_command(self, user_input, context=None):
+        return await self._with_retries(first_chunk)
+    
+    async def _with_retries(self, make_call):
+        """Await make_call() under the request timeout, retrying with exponential backoff"""
+        attempt = 0
+        while True:
+            timeout = await self._request_timeout()
+            try:
+                return await asyncio.wait_for(make_call(), timeout)
+            except Exception as e:
+                if not _is_retryable(e) or attempt >= config.LLM_MAX_RETRIES:
+                    if isinstance(e, asyncio.TimeoutError):
+                        raise LLMTimeoutError(f"no response from the model within {timeout:g}s") from e
+                    raise
+                await asyncio.sleep(config.LLM_RETRY_BACKOFF * (2 ** attempt))
+                attempt += 1
+    
+    async def generate_command(self, user_input, context=None, use_cache=True, speculative=False):
         """
         Generate a terminal command from natural language input
         
         Args:
             user_input (str): Natural language request
             context (dict): Optional context (current directory, previous commands, etc.)
+            use_cache (bool): Set to False to bypass the response cache for this request
+            speculative (bool): The input is still being typed and may never be
+                                submitted: the caches are read but nothing is
+                                stored or counted until accept_speculation()
+                                is called with the result
             
         Returns:
             dict: {
                 'command': str,
                 'explanation': str,
-                'confidence': float
+                'confidence': float,
+                'cached': bool
             }
         """
-        # Build the prompt
-        prompt = self._build_prompt(user_input, context)
+        deferred = [] if speculative else None
+        cached, cache_keys = self._lookup_cache(user_input, context, use_cache, deferred)
+        if cached is not None:
+            result = cached
+        elif config.LLM_CANDIDATES > 1:
+            result = await self.generate_candidates(user_input, context, config.LLM_CANDIDATES, deferred)
+            self._store_cache(cache_keys, user_input, result, deferred)
+            result['cached'] = False
+        else:
+            try:
+                # Call Ollama
+                start = time.perf_counter()
+                response = await self._chat(self._build_messages(user_input, context))
+                self._record_metrics(start, response, deferred)
+                
+                # Parse response
+                result = self._parse_response(response['message']['content'])
+                self._store_cache(cache_keys, user_input, result, deferred)
+                result['cached'] = False
+                
+            except Exception as e:
+                return _error_result(e)
+        
+        if deferred is not None:
+            result['deferred'] = deferred
+        return result
+    
+    def accept_speculation(self, result):
+        """Store and count a speculative generate_command result that is being used"""
+        for apply in result.pop('deferred', ()):
+            apply()
+    
+    async def generate_candidates(self, user_input, context=None, n=3, deferred=None):
+        """
+        Generate several candidate commands concurrently and return the best
+        
+        Candidates use different seeds and temperatures. Once the first one
+        arrives, the rest get LLM_CANDIDATE_SLACK times its latency to
+        finish, so n candidates cost about as much wall-clock time as one.
+        Stragglers are cancelled.
         
+        Args:
+            deferred (list): Queue the metrics here (see _record_metrics)
+        
+        Returns:
+            dict: generate_command result with a confidence based on
+                  agreement, risk and syntax, plus a 'candidates' summary
+        """
+        messages = self._build_messages(user_input, context)
+        start = time.perf_counter()
+        
+        async def candidate(index):
+            options = {
+                'temperature': config.LLM_TEMPERATURE + index * config.LLM_CANDIDATE_TEMPERATURE_STEP,
+                'seed': index
+            }
+            response = await self._chat(messages, options=options)
+            self._record_metrics(start, response, deferred)
+            return self._parse_response(response['message']['content'])
+        
+        tasks = [asyncio.ensure_future(candidate(i)) for i in range(n)]
+        done, pending = set(), set(tasks)
         try:
-            # Call Ollama
-            response = ollama.chat(
-                model=self.model_name,
-                messages=[
-                    {
-                        'role': 'system',
-                        'content': self._get_system_prompt()
-                    },
-                    {
-                        'role': 'user',
-                        'content': prompt
-                    }
-                ],
-                options={
-                    'temperature': config.LLM_TEMPERATURE,
-                }
-            )
+            # The budget starts with the first successful candidate
+            first_latency = None
+            while pending and first_latency is None:
+                finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                done |= finished
+                if any(task.exception() is None for task in finished):
+                    first_latency = time.perf_counter() - start
             
-            # Parse response
-            result = self._parse_response(response['message']['content'])
-            return result
+            if pending:
+                budget = first_latency * (config.LLM_CANDIDATE_SLACK - 1)
+                finished, pending = await asyncio.wait(pending, timeout=budget)
+                done |= finished
+        finally:
+            for task in pending:
+                task.cancel()
+        
+        candidates = []
+        errors = []
+        for task in done:
+            if task.exception() is not None:
+                errors.append(task.exception())
+            else:
+                candidates.append(task.result())
+        
+        from core.candidates import select_candidate
+        result = select_candidate(candidates, requested=n)
+        if result is None:
+            return _error_result(errors[0] if errors else RuntimeError("no candidates generated"))
+        return result
+    
+    async def stream_command(self, user_input, context=None, use_cache=True):
+        """
+        Stream a terminal command from natural language input
+        
+        The command is yielded as soon as its COMMAND: line is complete, so
+        callers can start risk analysis while the explanation is still
+        being generated.
+        
+        Args:
+            user_input (str): Natural language request
+            context (dict): Optional context (current directory, previous commands, etc.)
+            use_cache (bool): Set to False to bypass the response cache for this request
+            
+        Yields:
+            dict: One of
+                {'type': 'command', 'command': str, 'elapsed': float}
+                {'type': 'explanation', 'text': str}
+                {'type': 'done', 'result': dict}
+            The final 'done' event carries the same dict generate_command
+            returns, plus 'timings' with 'first_command' and 'total' seconds.
+        """
+        start = time.perf_counter()
+        
+        cached, cache_keys = self._lookup_cache(user_input, context, use_cache)
+        if cached is not None:
+            elapsed = time.perf_counter() - start
+            cached['timings'] = {'first_command': elapsed, 'total': elapsed}
+            yield {'type': 'command', 'command': cached['command'], 'elapsed': elapsed}
+            yield {'type': 'done', 'result': cached}
+            return
+        
+        parser = StreamingResponseParser()
+        first_command = None
+        stream = None
+        
+        try:
+            chunk, stream = await self._open_stream(self._build_messages(user_input, context))
+            
+            while chunk is not None:
+                if chunk.get('done'):
+                    self._record_metrics(start, chunk)
+                for event in parser.feed(chunk['message']['content']):
+                    if event['type'] == 'command':
+                        first_command = time.perf_counter() - start
+                        event['elapsed'] = first_command
+                    yield event
+                
+                # LLM_TIMEOUT bounds the gap between chunks, not the whole response
+                try:
+                    chunk = await asyncio.wait_for(stream.__anext__(), config.LLM_TIMEOUT)
+                except StopAsyncIteration:
+                    chunk = None
+                except asyncio.TimeoutError as e:
+                    raise LLMTimeoutError(f"model stalled for more than {config.LLM_TIMEOUT:g}s") from e
+            
+            for event in parser.close():
+                if event['type'] == 'command':
+                    first_command = time.perf_counter() - start
+                    event['elapsed'] = first_command
+                yield event
             
         except Exception as e:
-            return {
-                'command': None,
-                'explanation': f"Error generating command: {str(e)}",
-                'confidence': 0.0,
-                'error': True
+            yield {'type': 'done', 'result': _error_result(e)}
+            return
+        finally:
+            if stream is not None:
+                await _close_stream(stream)
+        
+        result = self._parse_response(parser.text)
+        self._store_cache(cache_keys, user_input, result)
+        
+        total = time.perf_counter() - start
+        result['cached'] = False
+        result['timings'] = {
+            'first_command': first_command if first_command is not None else total,
+            'total': total
+        }
+        yield {'type': 'done', 'result': result}
+    
+    async def chat(self, user_message):
+        """Have a conversation with the AI (for clarifications)"""
+        try:
+            response = await self._chat(
+                [
+                    {'role': 'system', 'content': 'You are a helpful terminal assistant. Answer questions about commands clearly and concisely.'},
+                    {'role': 'user', 'content': user_message}
+                ],
+                options={}
+            )
+            return response['message']['content']
+        except Exception as e:
+            return f"Error: {_describe_error(e)}"
+    
+    def close(self):
+        """Persist caches that buffer writes in memory"""
+        if self._semantic_cache is not None:  # Never loaded means nothing to save
+            self._semantic_cache.save()
+        if self.history is not None:
+            self.history.close()
+    
+    def _lookup_cache(self, user_input, context, use_cache, deferred=None):
+        """
+        Look a request up in the exact and semantic caches
+        
+        Args:
+            deferred (list): Only peek at the caches, and queue the lookups
+                             here to be counted (by the engine and the caches
+                             themselves) and marked as recent once the result
+                             is used (see generate_command)
+        
+        Returns:
+            tuple: (cached result or None, keys to store a fresh result under)
+        """
+        if not use_cache:
+            return None, None
+        
+        peek = deferred is not None
+        keys = {}
+        if self.cache is not None:
+            keys['exact'] = self.cache.make_key(user_input, context, self.model_name, config.LLM_TEMPERATURE)
+            cached = self.cache.get(keys['exact'], peek=peek)
+            if peek:
+                deferred.append(functools.partial(self.cache.get, keys['exact']))
+            if cached is not None:
+                cached['cached'] = True
+                _count(deferred, 'cache_hits')
+                return cached, keys
+        
+        if self.semantic_cache is not None:
+            keys['semantic'] = self.semantic_cache.context_key(context, self.model_name, config.LLM_TEMPERATURE)
+            cached, similarity = self.semantic_cache.lookup(user_input, keys['semantic'], peek=peek)
+            if peek:
+                deferred.append(functools.partial(self.semantic_cache.lookup, user_input, keys['semantic']))
+            if cached is not None:
+                cached['cached'] = True
+                cached['similarity'] = similarity
+                _count(deferred, 'semantic_cache_hits')
+                return cached, keys
+        
+        _count(deferred, 'cache_misses')
+        return None, keys
+    
+    def _store_cache(self, keys, user_input, result, deferred=None):
+        """Store a freshly generated result in the caches it missed, or queue that on deferred"""
+        if not keys or result.get('error'):
+            return
+        if deferred is not None:
+            deferred.append(functools.partial(self._store_cache, keys, user_input, dict(result)))
+            return
+        if 'exact' in keys:
+            self.cache.put(keys['exact'], result)
+        if 'semantic' in keys:
+            self.semantic_cache.add(user_input, keys['semantic'], result)
+    
+    def _build_messages(self, user_input, context):
+        """Build the chat messages for a command generation request"""
+        examples = self.history.similar(user_input) if self.history is not None else []
+        return [
+            {
+                'role': 'system',
+                'content': self._get_system_prompt()
+            },
+            {
+                'role': 'user',
+                'content': self._build_prompt(user_input, context, examples)
             }
+        ]
     
     def _get_system_prompt(self):
         """Get the system prompt based on current OS and shell"""
-        os_info = f"OS: {config.CURRENT_OS}, Shell: {config.SHELL_TYPE}"
+        return build_system_prompt(config.CURRENT_OS, config.SHELL_TYPE)
+    
+    def _build_prompt(self, user_input, context, examples=None):
+        """
+        Build the prompt with context
+        
+        Sections are ordered from most to least stable (paths, directory,
+        history, examples, then the request itself) so consecutive requests
+        share as long a prefix as possible.
+        
+        Args:
+            examples (list): Past requests and the commands that worked for
+                             them (HistoryStore.similar results)
+        """
+        # Add standard paths info
+        prompt = build_paths_prompt(os.path.expanduser("~"))
+        
+        if context:
+            if 'current_dir' in context:
+                prompt += f"Current directory: {context['current_dir']}\n"
+                    
+            if 'previous_command' in context:
+                prompt += f"Previous command: {context['previous_command']}\n"
+            
+            # Add recent history for conversational context
+            if 'recent_history' in context and context['recent_history']:
+                prompt += "\nRECENT CONVERSATION HISTORY:\n"
+                for item in context['recent_history'][-3:]:  # Last 3 items
+                    prompt += f"User: {item['input']}\n"
+                    prompt += f"Command Executed: {item['command']}\n"
+                    if item.get('output'):
+                        # Truncate output if too long
+                        output_snippet = item['output'][:200] + "..." if len(item['output']) > 200 else item['output']
+                        prompt += f"Command Output: {output_snippet}\n"
+                    prompt += "---\n"
+        
+        if examples:
+            prompt += "\nCOMMANDS THAT WORKED FOR SIMILAR PAST REQUESTS:\n"
+            for example in examples:
+                prompt += f"User: {example['input']}\n"
+                prompt += f"COMMAND: {example['command']}\n"
+        
+        prompt += f"\nUser request: {user_input}\n"
+        
+        if "standard project" in user_input.lower():
+            if context and 'app_root' in context:
+                workflow_script = os.path.join(context['app_root'], 'core', 'workflow.py')
+                # Escape backslashes for string usage if needed, or just rely on python string handling
+                prompt += f'\nIMPORTANT: You MUST append `&& python "{workflow_script}" "Standard Project Setup"` after creating and entering the directory. Do NOT just create the folder.'
+            else:
+                prompt += '\nIMPORTANT: You MUST append `&& python -m core.workflow "Standard Project Setup"` after creating and entering the directory.'
+        
+        return prompt
+    
+    def _parse_response(self, response_text):
+        """Parse the LLM response to extract command and explanation"""
+        lines = response_text.strip().split('\n')
+        command = None
+        explanation = ""
+        
+        for line in lines:
+            # The first COMMAND: line wins, as in StreamingResponseParser, so the
+            # cached command is the one that was previewed and confirmed
+            if line.startswith("COMMAND:") and command is None:
+                command = line.replace("COMMAND:", "").strip()
+            elif line.startswith("EXPLANATION:"):
+                explanation = line.replace("EXPLANATION:", "").strip()
+        
+        # Qwen is quite reliable when it follows the response format
+        confidence = 0.9
+        
+        # Fallback: if format not followed, treat entire response as command
+        if not command:
+            command = response_text.strip()
+            explanation = "Command generated from natural language"
+            confidence = 0.5
+        
+        return {
+            'command': command,
+            'explanation': explanation,
+            'confidence': confidence,
+            'error': False
+        }
+
+
+class LLMEngine:
+    """
+    Synchronous facade over AsyncLLMEngine
+    
+    Coroutines run on a private event loop in a background thread, so a
+    KeyboardInterrupt in the calling thread can cancel the in-flight
+    request without tearing down the engine.
+    """
+    
+    def __init__(self, model_name=None, cache=None, semantic_cache=None, history=None):
+        self.engine = AsyncLLMEngine(model_name, cache=cache, semantic_cache=semantic_cache, history=history)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="llm-engine", daemon=True)
+        self._thread.start()
+        self._warm_up_future = None
+    
+    @property
+    def model_name(self):
+        return self.engine.model_name
+    
+    @property
+    def cache(self):
+        return self.engine.cache
+    
+    @property
+    def semantic_cache(self):
+        return self.engine.semantic_cache
+    
+    @property
+    def history(self):
+        return self.engine.history
+    
+    @property
+    def startup_timings(self):
+        return self.engine.startup_timings
+    
+    @property
+    def last_metrics(self):
+        return self.engine.last_metrics
+    
+    def _submit(self, coro):
+        """Schedule a coroutine on the engine loop"""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+    
+    def _run(self, coro):
+        """Run a coroutine on the engine loop and wait for it, cancelling it on Ctrl-C"""
+        future = self._submit(coro)
+        try:
+            return future.result()
+        except KeyboardInterrupt:
+            future.cancel()
+            raise
+    
+    def start_warm_up(self):
+        """Load the model in the background so the first request doesn't pay for it"""
+        if self._warm_up_future is None:
+            self._warm_up_future = self._submit(self.engine.warm_up())
+        return self._warm_up_future
+    
+    def warm_up(self):
+        """Load the model and wait until it is resident"""
+        return self._run(self.engine.warm_up())
+    
+    def generate_command(self, user_input, context=None, use_cache=True):
+        """Generate a terminal command (see AsyncLLMEngine.generate_command)"""
+        return self._run(self.engine.generate_command(user_input, context, use_cache))
+    
+    def submit_command(self, user_input, context=None, use_cache=True, speculative=False):
+        """
+        Start generating a command without waiting for it
         
-        return rf"""You are a terminal command generator assistant. Your job is to convert natural language requests into proper terminal commands.
+        Returns:
+            concurrent.futures.Future: Resolves to the generate_command result;
+                                       cancelling it cancels the generation
+        """
+        return self._submit(self.engine.generate_command(user_input, context, use_cache, speculative))
+    
+    def accept_speculation(self, result):
+        """Store and count a speculative result that is being used (see AsyncLLMEngine.generate_command)"""
+        self.engine.accept_speculation(result)
+    
+    def stream_command(self, user_input, context=None, use_cache=True):
+        """Stream a terminal command (see AsyncLLMEngine.stream_command)"""
+        events = self.engine.stream_command(user_input, context, use_cache)
+        try:
+            while True:
+                try:
+                    yield self._run(events.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            # Stop generation if the caller abandoned the stream early
+            self._submit(_close_stream(events))
+    
+    def chat(self, user_message):
+        """Have a conversation with the AI (for clarifications)"""
+        return self._run(self.engine.chat(user_message))
+    
+    def close(self):
+        """Persist caches that buffer writes in memory"""
+        self.engine.close()
+
+
+@functools.lru_cache(maxsize=None)
+def build_system_prompt(os_name, shell_type):
+    """
+    Build the system prompt for an OS and shell
+    
+    The prompt is identical for every request in a session, so it is built
+    once and kept as the leading message. Ollama can then reuse the
+    already-evaluated prefix instead of re-processing it each time.
+    """
+    os_info = f"OS: {os_name}, Shell: {shell_type}"
+    
+    return rf"""You are a terminal command generator assistant. Your job is to convert natural language requests into proper terminal commands.
 
 {os_info}
 
@@ -125,81 +733,133 @@ Example 8 (Standard Project Setup):
 User: create a new standard project named "MyNewApp"
 COMMAND: mkdir MyNewApp && cd MyNewApp && python -m core.workflow "Standard Project Setup"
 EXPLANATION: Creates the folder, enters it, and runs the standard project setup workflow."""
+
+
+@functools.lru_cache(maxsize=None)
+def build_paths_prompt(user_home):
+    """Build the (session-constant) SYSTEM PATHS section of the user prompt"""
+    return (
+        "SYSTEM PATHS:\n"
+        f"Home: {user_home}\n"
+        f"Downloads: {os.path.join(user_home, 'Downloads')}\n"
+        f"Desktop: {os.path.join(user_home, 'Desktop')}\n"
+    )
+
+
+def _count(deferred, name):
+    """Increment a counter now, or queue the increment on deferred"""
+    if deferred is not None:
+        deferred.append(functools.partial(metrics.increment, name))
+    else:
+        metrics.increment(name)
+
+
+def _is_retryable(error):
+    """
+    Check whether a failed Ollama call is worth retrying
     
-    def _build_prompt(self, user_input, context):
-        """Build the prompt with context"""
-        prompt = f"User request: {user_input}\n"
-        
-        # Add standard paths info
-        user_home = os.path.expanduser("~")
-        prompt += f"\nSYSTEM PATHS:\n"
-        prompt += f"Home: {user_home}\n"
-        prompt += f"Downloads: {os.path.join(user_home, 'Downloads')}\n"
-        prompt += f"Desktop: {os.path.join(user_home, 'Desktop')}\n"
-        
-        if context:
-            if 'current_dir' in context:
-                prompt += f"Current directory: {context['current_dir']}\n"
-                    
-            if 'previous_command' in context:
-                prompt += f"Previous command: {context['previous_command']}\n"
-            
-            # Add recent history for conversational context
-            if 'recent_history' in context and context['recent_history']:
-                prompt += "\nRECENT CONVERSATION HISTORY:\n"
-                for item in context['recent_history'][-3:]:  # Last 3 items
-                    prompt += f"User: {item['input']}\n"
-                    prompt += f"Command Executed: {item['command']}\n"
-                    if item.get('output'):
-                        # Truncate output if too long
-                        output_snippet = item['output'][:200] + "..." if len(item['output']) > 200 else item['output']
-                        prompt += f"Command Output: {output_snippet}\n"
-                    prompt += "---\n"
-        
-        if "standard project" in user_input.lower():
-            if context and 'app_root' in context:
-                workflow_script = os.path.join(context['app_root'], 'core', 'workflow.py')
-                # Escape backslashes for string usage if needed, or just rely on python string handling
-                prompt += f'\nIMPORTANT: You MUST append `&& python "{workflow_script}" "Standard Project Setup"` after creating and entering the directory. Do NOT just create the folder.'
-            else:
-                prompt += '\nIMPORTANT: You MUST append `&& python -m core.workflow "Standard Project Setup"` after creating and entering the directory.'
-        
-        return prompt
+    Only connection failures and server errors are. A timeout means the
+    model is alive but slow: sending the prompt again would just queue it
+    behind the first one and keep the user waiting several timeouts long.
+    """
+    import httpx
+    import ollama
+    if isinstance(error, httpx.TimeoutException) and not isinstance(error, httpx.ConnectTimeout):
+        return False
+    if isinstance(error, (ConnectionError, httpx.TransportError)):
+        return True
+    if isinstance(error, ollama.ResponseError):
+        return error.status_code >= 500
+    return False
+
+
+def _describe_error(error):
+    if isinstance(error, asyncio.TimeoutError):
+        return "timed out"
+    return str(error) or error.__class__.__name__
+
+
+def _error_result(error):
+    return {
+        'command': None,
+        'explanation': f"Error generating command: {_describe_error(error)}",
+        'confidence': 0.0,
+        'error': True
+    }
+
+
+async def _close_stream(events):
+    try:
+        await events.aclose()
+    except RuntimeError:
+        pass  # Still running; the cancelled step finalizes it
+
+
+def _seconds(nanoseconds):
+    """Convert an Ollama duration (nanoseconds) to seconds"""
+    return (nanoseconds or 0) / 1e9
+
+
+class StreamingResponseParser:
+    """Incremental parser for the COMMAND:/EXPLANATION: response format"""
     
-    def _parse_response(self, response_text):
-        """Parse the LLM response to extract command and explanation"""
-        lines = response_text.strip().split('\n')
-        command = None
-        explanation = ""
+    def __init__(self):
+        self.text = ""
+        self._pending = ""
+        self._command_sent = False
+        self._in_explanation = False
+        self._explanation_started = False
+    
+    def feed(self, chunk):
+        """
+        Consume a chunk of streamed text
         
-        for line in lines:
-            if line.startswith("COMMAND:"):
-                command = line.replace("COMMAND:", "").strip()
-            elif line.startswith("EXPLANATION:"):
-                explanation = line.replace("EXPLANATION:", "").strip()
+        Returns:
+            list: Events ready to emit ('command' once its line is complete,
+                  'explanation' for every piece of explanation text)
+        """
+        self.text += chunk
+        self._pending += chunk
+        events = []
         
-        # Fallback: if format not followed, treat entire response as command
-        if not command:
-            command = response_text.strip()
-            explanation = "Command generated from natural language"
+        while True:
+            if self._in_explanation:
+                # Explanation text is forwarded as it arrives
+                line, newline, rest = self._pending.partition('\n')
+                if not self._explanation_started:
+                    line = line.lstrip(' ')
+                if line:
+                    self._explanation_started = True
+                    events.append({'type': 'explanation', 'text': line})
+                if not newline:
+                    self._pending = ""
+                    break
+                self._in_explanation = False
+                self._pending = rest
+                continue
+            
+            if self._pending.startswith("EXPLANATION:"):
+                self._pending = self._pending[len("EXPLANATION:"):]
+                self._in_explanation = True
+                self._explanation_started = False
+                continue
+            
+            line, newline, rest = self._pending.partition('\n')
+            if not newline:
+                break
+            self._pending = rest
+            
+            if line.startswith("COMMAND:") and not self._command_sent:
+                self._command_sent = True
+                events.append({'type': 'command', 'command': line.replace("COMMAND:", "").strip()})
         
-        return {
-            'command': command,
-            'explanation': explanation,
-            'confidence': 0.9,  # Qwen is quite reliable
-            'error': False
-        }
+        return events
     
-    def chat(self, user_message):
-        """Have a conversation with the AI (for clarifications)"""
-        try:
-            response = ollama.chat(
-                model=self.model_name,
-                messages=[
-                    {'role': 'system', 'content': 'You are a helpful terminal assistant. Answer questions about commands clearly and concisely.'},
-                    {'role': 'user', 'content': user_message}
-                ]
-            )
-            return response['message']['content']
-        except Exception as e:
-            return f"Error: {str(e)}"
\ No newline at end of file
+    def close(self):
+        """Flush any trailing COMMAND: line that ended without a newline"""
+        line = self._pending
+        self._pending = ""
+        if line.startswith("COMMAND:") and not self._command_sent:
+            self._command_sent = True
+            return [{'type': 'command', 'command': line.replace("COMMAND:", "").strip()}]
+        return []
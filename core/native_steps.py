@@ -0,0 +1,133 @@
+"""
+Native Steps - In-process handlers for common workflow operations
+"""
+import os
+import shutil
+import subprocess
+from string import Template
+
+
+def _resolve(cwd, path):
+    """Resolve a step path against the workflow's directory"""
+    return os.path.join(cwd, os.path.expanduser(path))
+
+
+def mkdir(cwd, paths, parents=True, exist_ok=True):
+    """Create one or more directories"""
+    if isinstance(paths, str):
+        paths = [paths]
+    for path in paths:
+        target = _resolve(cwd, path)
+        if parents:
+            os.makedirs(target, exist_ok=exist_ok)
+        elif not (exist_ok and os.path.isdir(target)):
+            os.mkdir(target)
+    return ""
+
+
+def write_file(cwd, path, content="", overwrite=False, encoding="utf-8"):
+    """
+    Write text to a file, creating parent directories as needed
+
+    An existing file is left alone (and reported in the output) unless
+    overwrite is set, so running a workflow in a populated directory
+    never clobbers the user's files.
+    """
+    target = _resolve(cwd, path)
+    if not overwrite and os.path.exists(target):
+        return f"Skipped {path}: already exists"
+    parent = os.path.dirname(target)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    with open(target, 'w', encoding=encoding, newline='') as f:
+        f.write(content)
+    return ""
+
+
+def copy(cwd, src, dst):
+    """Copy a file or a directory tree"""
+    source = _resolve(cwd, src)
+    target = _resolve(cwd, dst)
+    if os.path.isdir(source):
+        shutil.copytree(source, target, dirs_exist_ok=True)
+    else:
+        parent = os.path.dirname(target)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        shutil.copy2(source, target)
+    return ""
+
+
+def render_template(cwd, path, template=None, template_file=None, variables=None, overwrite=False):
+    """
+    Render a $-style template (string.Template) to a file
+
+    $project is always available and defaults to the directory name. An
+    existing file is kept unless overwrite is set, as in write_file.
+    """
+    if template_file is not None:
+        with open(_resolve(cwd, template_file), encoding='utf-8') as f:
+            template = f.read()
+    values = {'project': os.path.basename(os.path.abspath(cwd))}
+    values.update(variables or {})
+    return write_file(cwd, path, Template(template or "").safe_substitute(values), overwrite=overwrite)
+
+
+def git_init(cwd, path="."):
+    """Initialize a git repository (git itself is the only process spawned)"""
+    process = subprocess.run(
+        ['git', 'init', '-q', _resolve(cwd, path)],
+        capture_output=True,
+        text=True
+    )
+    if process.returncode != 0:
+        raise OSError(process.stderr.strip() or f"git init exited with {process.returncode}")
+    return process.stdout.strip()
+
+
+NATIVE_ACTIONS = {
+    'mkdir': mkdir,
+    'write_file': write_file,
+    'copy': copy,
+    'render_template': render_template,
+    'git_init': git_init
+}
+
+
+def run_native_step(action, args, cwd):
+    """
+    Run a native step in-process
+
+    Args:
+        action (str): Name of the action in NATIVE_ACTIONS
+        args (dict): Keyword arguments for the action
+        cwd (str): Directory relative paths are resolved against
+
+    Returns:
+        dict: Same shape as CommandExecutor.execute results
+    """
+    handler = NATIVE_ACTIONS.get(action)
+    if handler is None:
+        return {
+            'success': False,
+            'output': '',
+            'error': f"Unknown native action '{action}'",
+            'return_code': -1
+        }
+
+    try:
+        output = handler(cwd, **(args or {}))
+    except (OSError, TypeError, ValueError) as e:
+        return {
+            'success': False,
+            'output': '',
+            'error': str(e),
+            'return_code': 1
+        }
+
+    return {
+        'success': True,
+        'output': output,
+        'error': None,
+        'return_code': 0
+    }
@@ -0,0 +1,142 @@
+"""
+Output Buffer - Bounded memory for command output
+"""
+import glob
+import os
+import tempfile
+from collections import deque
+import config
+
+
+class OutputBuffer:
+    """
+    Keeps the head and tail of a stream of text in memory
+
+    Once the text outgrows head_size + tail_size, everything (including the
+    head already kept) is spilled to a temp file, so the full output stays
+    reachable without ever holding it all in RAM.
+    """
+
+    def __init__(self, head_size=None, tail_size=None, spill_dir=None, prefix='tm-output-'):
+        """
+        Args:
+            head_size (int): Characters kept from the start of the output
+            tail_size (int): Characters kept from the end of the output
+            spill_dir (str): Directory for overflow files (system temp dir by default)
+            prefix (str): File name prefix for overflow files
+        """
+        self.head_size = head_size if head_size is not None else config.OUTPUT_HEAD_SIZE
+        self.tail_size = tail_size if tail_size is not None else config.OUTPUT_TAIL_SIZE
+        self.spill_dir = spill_dir if spill_dir is not None else config.OUTPUT_SPILL_DIR
+        self.prefix = prefix
+        self.size = 0
+        self.path = None
+
+        self._head = []
+        self._head_len = 0
+        self._tail = deque()
+        self._tail_len = 0
+        self._file = None
+
+    @property
+    def truncated(self):
+        return self.path is not None
+
+    def write(self, text):
+        """Append text to the buffer"""
+        if not text:
+            return
+        self.size += len(text)
+
+        if self._head_len < self.head_size:
+            take = text[:self.head_size - self._head_len]
+            self._head.append(take)
+            self._head_len += len(take)
+            text = text[len(take):]
+            if not text:
+                return
+
+        self._tail.append(text)
+        self._tail_len += len(text)
+        if self._tail_len <= self.tail_size:
+            if self._file is not None:
+                self._file.write(text)
+            return
+
+        if self._file is None:
+            self._spill()
+        else:
+            self._file.write(text)
+
+        # Drop whole chunks from the front, then trim the first one
+        while self._tail and self._tail_len - len(self._tail[0]) >= self.tail_size:
+            self._tail_len -= len(self._tail.popleft())
+        excess = self._tail_len - self.tail_size
+        if excess > 0:
+            self._tail[0] = self._tail[0][excess:]
+            self._tail_len -= excess
+
+    def _spill(self):
+        """Start the overflow file with everything seen so far"""
+        if self.spill_dir:
+            os.makedirs(self.spill_dir, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(prefix=self.prefix, suffix='.log', dir=self.spill_dir or None)
+        self._file = os.fdopen(fd, 'w', encoding='utf-8', errors='replace')
+        self._file.write("".join(self._head))
+        for chunk in self._tail:
+            self._file.write(chunk)
+
+    def getvalue(self):
+        """
+        Return the buffered text
+
+        Returns:
+            str: The full text, or head and tail around an omission note
+                 pointing to the overflow file
+        """
+        head = "".join(self._head)
+        tail = "".join(self._tail)
+        if not self.truncated:
+            return head + tail
+        omitted = self.size - len(head) - len(tail)
+        return f"{head}\n... [{omitted} characters omitted; full output in {self.path}] ...\n{tail}"
+
+    def close(self):
+        """Finish writing the overflow file, if any"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def prune_spill_files(spill_dir=None, prefix='tm-output-', keep=None):
+    """
+    Delete all but the most recent overflow files
+
+    Args:
+        spill_dir (str): Directory holding them (default config.OUTPUT_SPILL_DIR,
+                         else the system temp dir)
+        prefix (str): File name prefix used by OutputBuffer
+        keep (int): Newest files left in place, so recent 'full output in'
+                    notes still work (default config.OUTPUT_SPILL_KEEP)
+
+    Returns:
+        int: Number of files deleted
+    """
+    spill_dir = spill_dir or config.OUTPUT_SPILL_DIR or tempfile.gettempdir()
+    keep = keep if keep is not None else config.OUTPUT_SPILL_KEEP
+    files = []
+    for path in glob.glob(os.path.join(glob.escape(spill_dir), prefix + '*.log')):
+        try:
+            files.append((os.path.getmtime(path), path))
+        except OSError:
+            continue  # Deleted by another session meanwhile
+    files.sort(reverse=True)
+
+    deleted = 0
+    for _, path in files[keep:]:
+        try:
+            os.remove(path)
+            deleted += 1
+        except OSError:
+            pass
+    return deleted
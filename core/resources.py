@@ -0,0 +1,257 @@
+"""
+Resources - Limits, measures and kills the processes a command starts
+
+psutil is optional: without it commands still get their rlimits and a
+timeout still kills their process group, but no usage is measured.
+"""
+import os
+import signal
+import threading
+import time
+import config
+
+_psutil = None
+
+
+def load_psutil():
+    """Import psutil on first use (it is slow to import); None if it is missing"""
+    global _psutil
+    if _psutil is None:
+        try:
+            import psutil
+        except ImportError:
+            psutil = False
+        _psutil = psutil
+    return _psutil or None
+
+
+def limits_configured():
+    """True if commands should run under config.COMMAND_MAX_MEMORY_MB / COMMAND_MAX_CPU_SECONDS"""
+    return not config.IS_WINDOWS and bool(config.COMMAND_MAX_MEMORY_MB or config.COMMAND_MAX_CPU_SECONDS)
+
+
+def apply_limits():
+    """
+    Apply the configured rlimits to the current process
+
+    Used as a Popen preexec_fn, so it runs in the child between fork and
+    exec; everything the command starts inherits the limits. RLIMIT_AS
+    and RLIMIT_CPU apply to each process separately, not to the tree.
+    """
+    import resource
+    if config.COMMAND_MAX_MEMORY_MB:
+        size = config.COMMAND_MAX_MEMORY_MB * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (size, size))
+    if config.COMMAND_MAX_CPU_SECONDS:
+        # SIGXCPU at the soft limit, SIGKILL a second later if it is ignored
+        seconds = config.COMMAND_MAX_CPU_SECONDS
+        resource.setrlimit(resource.RLIMIT_CPU, (seconds, seconds + 1))
+
+
+def exceeded_cpu_limit(return_code):
+    """True if a return code means the command was stopped by RLIMIT_CPU"""
+    if config.IS_WINDOWS or not config.COMMAND_MAX_CPU_SECONDS:
+        return False
+    # Killed directly, or reported by bash as 128 + signal number. The hard
+    # limit's SIGKILL is not counted: it could just as well be the OOM killer
+    return return_code in (-signal.SIGXCPU, 128 + signal.SIGXCPU)
+
+
+def kill_process_tree(pid, own_group=False):
+    """
+    Kill a process and everything it started
+
+    Descendants are listed before the root dies, since they are reparented
+    away from it afterwards; ones that left the process group (setsid,
+    daemonizing) are killed individually.
+
+    Args:
+        pid (int): Root process
+        own_group (bool): The root leads its own process group, which is
+                          killed as a whole
+    """
+    psutil = load_psutil()
+    descendants = []
+    if psutil is not None:
+        try:
+            descendants = psutil.Process(pid).children(recursive=True)
+        except psutil.Error:
+            pass
+
+    try:
+        if own_group and hasattr(os, 'killpg'):
+            os.killpg(pid, signal.SIGKILL)
+        else:
+            os.kill(pid, signal.SIGKILL if hasattr(signal, 'SIGKILL') else signal.SIGTERM)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+    for process in descendants:
+        try:
+            process.kill()
+        except psutil.Error:
+            pass
+
+
+class ProcessTreeMonitor:
+    """
+    Samples the memory, CPU time and I/O of a process tree in a background thread
+
+    CPU time counts live processes plus whatever their finished children
+    used (psutil's children_user/children_system), so processes that exit
+    between samples still count once their parent has waited for them.
+    Peak memory is the largest total RSS seen in one sample, so processes
+    shorter than the sampling interval may be missed.
+    """
+
+    def __init__(self, pid, include_root=True, interval=None):
+        """
+        Args:
+            pid (int): Root of the tree
+            include_root (bool): Count the root itself; False for a persistent
+                                 shell, where only the command's processes matter
+            interval (float): Seconds between samples (default config.RESOURCE_SAMPLE_INTERVAL)
+
+        Raises:
+            RuntimeError: If psutil is not installed
+        """
+        self.psutil = load_psutil()
+        if self.psutil is None:
+            raise RuntimeError("psutil is not installed")
+        self.include_root = include_root
+        self.interval = interval or config.RESOURCE_SAMPLE_INTERVAL
+        self.peak_rss = 0
+        self.cpu_seconds = 0.0
+        self._io = {}  # Last I/O counters seen per process
+        self._seen = set()
+        self._stop = threading.Event()
+        self._thread = None
+        self._usage = None
+        self._root = self.psutil.Process(pid)
+        self._baseline = self._children_cpu(self._root) if not include_root else 0.0
+
+    def start(self):
+        """Take a first sample and keep sampling until stop()"""
+        self.sample()
+        self._thread = threading.Thread(target=self._run, name="resource-monitor", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def stop(self):
+        """
+        Take a last sample and stop sampling; later calls return the same usage
+
+        Returns:
+            dict: {'peak_rss' (bytes), 'cpu_seconds', 'read_bytes', 'write_bytes'
+                   (None where the platform doesn't report I/O), 'processes'}
+        """
+        if self._usage is not None:
+            return self._usage
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.sample()
+        reads = [counters[0] for counters in self._io.values()]
+        writes = [counters[1] for counters in self._io.values()]
+        self._usage = {
+            'peak_rss': self.peak_rss,
+            'cpu_seconds': self.cpu_seconds,
+            'read_bytes': sum(reads) if self._io else None,
+            'write_bytes': sum(writes) if self._io else None,
+            'processes': len(self._seen)
+        }
+        return self._usage
+
+    def sample(self):
+        psutil = self.psutil
+        try:
+            processes = self._root.children(recursive=True)
+        except psutil.Error:
+            return  # The root has exited and been reaped; keep the last sample
+        if self.include_root:
+            processes.append(self._root)
+
+        rss = 0
+        cpu = 0.0
+        for process in processes:
+            try:
+                with process.oneshot():
+                    if process.status() != psutil.STATUS_ZOMBIE:
+                        rss += process.memory_info().rss
+                    times = process.cpu_times()
+                    cpu += times.user + times.system + times.children_user + times.children_system
+                    io = _io_counters(process)
+            except psutil.Error:
+                continue
+            self._seen.add(process)
+            if io is not None:
+                self._io[process] = io
+
+        if not self.include_root:
+            try:
+                cpu += self._children_cpu(self._root) - self._baseline
+            except psutil.Error:
+                pass
+        self.peak_rss = max(self.peak_rss, rss)
+        self.cpu_seconds = max(self.cpu_seconds, cpu)
+
+    def _children_cpu(self, process):
+        times = process.cpu_times()
+        return times.children_user + times.children_system
+
+
+def wait_for_exit(pid, timeout):
+    """
+    Wait until a child process exits, but leave it for Popen to reap
+
+    Until it is reaped, its CPU time (including every child it waited
+    for) can still be sampled.
+
+    Returns:
+        bool: True if it exited within timeout
+    """
+    if not hasattr(os, 'waitid'):
+        return False
+    deadline = time.monotonic() + timeout
+    delay = 0.001
+    while True:
+        try:
+            if os.waitid(os.P_PID, pid, os.WEXITED | os.WNOHANG | os.WNOWAIT) is not None:
+                return True
+        except ChildProcessError:
+            return False
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(delay)
+        delay = min(delay * 2, 0.05)
+
+
+def _io_counters(process):
+    """(read bytes, written bytes) of a process, or None where not available (macOS)"""
+    if not hasattr(process, 'io_counters'):
+        return None
+    try:
+        counters = process.io_counters()
+    except (AttributeError, NotImplementedError):
+        return None
+    return counters.read_bytes, counters.write_bytes
+
+
+def monitor_process(pid, include_root=True):
+    """
+    Start monitoring a process tree if config.TRACK_COMMAND_RESOURCES is set
+    and psutil is installed
+
+    Returns:
+        ProcessTreeMonitor: Started monitor, or None
+    """
+    if not config.TRACK_COMMAND_RESOURCES or load_psutil() is None:
+        return None
+    try:
+        return ProcessTreeMonitor(pid, include_root=include_root).start()
+    except load_psutil().Error:
+        return None  # Already gone
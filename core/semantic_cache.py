@@ -0,0 +1,371 @@
+"""
+Semantic Cache - Reuses commands for paraphrased requests
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import zlib
+import numpy as np
+import config
+
+
+# Words that carry no intent for command generation
+STOP_WORDS = {
+    "a", "an", "the", "all", "any", "some", "my", "me", "i", "please", "here",
+    "this", "that", "these", "those", "in", "on", "of", "for", "to", "from",
+    "current", "now", "can", "you", "could", "would", "want", "need", "every"
+}
+
+# Collapse common synonyms so paraphrases land on the same features
+SYNONYMS = {
+    "show": "list", "display": "list", "print": "list", "get": "list", "view": "list",
+    "py": "python", "js": "javascript", "ts": "typescript",
+    "folder": "directory", "dir": "directory", "folders": "directory",
+    "directories": "directory", "remove": "delete", "erase": "delete", "rm": "delete",
+    "make": "create", "new": "create", "search": "find", "locate": "find",
+    "big": "large", "huge": "large", "biggest": "largest", "pic": "image",
+    "pics": "image", "picture": "image", "photo": "image", "photos": "image",
+}
+
+# A paraphrase never changes these: if the words two requests don't share
+# include one, they ask for different things however similar they look
+# (actions, negations and directions, after synonym folding)
+GUARD_WORDS = {
+    "list", "find", "delete", "create", "copy", "move", "rename", "count", "sort",
+    "compress", "archive", "extract", "zip", "unzip", "install", "uninstall", "update",
+    "upgrade", "start", "stop", "restart", "kill", "run", "open", "edit", "change",
+    "replace", "add", "append", "write", "read", "download", "upload", "clone", "push",
+    "pull", "commit", "merge", "mount", "unmount", "enable", "disable", "clean", "empty",
+    "not", "no", "non", "without", "except", "excluding", "exclude", "never", "don",
+    "doesn", "ascending", "descending", "reverse", "largest", "smallest", "oldest",
+    "newest", "larger", "smaller", "older", "newer", "more", "less", "above", "below",
+    "before", "after", "first", "last", "top", "bottom", "hidden", "only",
+}
+TOKEN_PATTERN = re.compile(r"[\w.*-]+")
+# Tokens naming something specific (numbers, file names, globs, paths) must
+# match exactly; paraphrases reword intent, not the things they operate on
+LITERAL_PATTERN = re.compile(r"[\d./\\*~]|^-")
+
+
+def extract_literals(text):
+    """Return the set of literal tokens (names, numbers, globs, paths) in a request"""
+    literals = set(re.findall(r'"([^"]*)"|\'([^\']*)\'', text))
+    literals = {a or b for a, b in literals}
+    for token in text.lower().split():
+        token = token.strip('"\',;:!?')
+        if token and LITERAL_PATTERN.search(token):
+            literals.add(token)
+    return frozenset(literals)
+
+
+def normalize_words(text):
+    """Split a request into intent-bearing words, with synonyms and plurals folded"""
+    words = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in STOP_WORDS:
+            continue
+        token = SYNONYMS.get(token, token)
+        # Cheap plural folding: "files" -> "file"
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = SYNONYMS.get(token[:-1], token[:-1])
+        words.append(token)
+    return words
+
+
+def intent_conflicts(words, other_words):
+    """True if two requests' normalize_words() differ in an action, negation or direction"""
+    return bool(GUARD_WORDS & set(words).symmetric_difference(other_words))
+
+
+class HashingEmbedder:
+    """Feature-hashing embedder that needs no model or network access"""
+
+    def __init__(self, dim=None):
+        self.dim = dim or config.SEMANTIC_CACHE_DIM
+        self.name = f"hashing-{self.dim}"
+
+    def tokenize(self, text):
+        """Split a request into normalized intent-bearing words"""
+        return normalize_words(text)
+
+    def embed(self, texts):
+        """
+        Embed a batch of texts
+
+        Args:
+            texts (list): Strings to embed
+
+        Returns:
+            np.ndarray: (len(texts), dim) float32 matrix of unit vectors
+        """
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in self.tokenize(text):
+                self._add_feature(vectors[row], word)
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _add_feature(self, vector, feature):
+        # crc32 is stable across processes, unlike hash(), so persisted
+        # vectors stay comparable after a restart
+        digest = zlib.crc32(feature.encode("utf-8"))
+        sign = 1.0 if digest & 0x80000000 else -1.0
+        vector[digest % self.dim] += sign
+
+
+class OllamaEmbedder:
+    """Embedder backed by an Ollama embedding model"""
+
+    def __init__(self, model_name=None):
+        self.model_name = model_name or config.SEMANTIC_CACHE_EMBED_MODEL
+        self.name = f"ollama-{self.model_name}"
+
+    def embed(self, texts):
+        import ollama
+        response = ollama.embed(model=self.model_name, input=list(texts))
+        vectors = np.asarray(response['embeddings'], dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+
+def get_embedder(name=None):
+    """Create the embedder selected in config"""
+    name = name or config.SEMANTIC_CACHE_EMBEDDER
+    if name == "ollama":
+        return OllamaEmbedder()
+    if name == "hashing":
+        return HashingEmbedder()
+    raise ValueError(f"Unknown embedder: {name}")
+
+
+class SemanticCache:
+    def __init__(self, path=None, embedder=None, threshold=None, max_entries=None):
+        # An empty path keeps the index in memory only
+        self.path = path if path is not None else config.SEMANTIC_CACHE_FILE
+        self.embedder = embedder or get_embedder()
+        self.threshold = threshold if threshold is not None else config.SEMANTIC_CACHE_THRESHOLD
+        self.max_entries = max_entries or config.SEMANTIC_CACHE_MAX_ENTRIES
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._dirty = 0
+
+        self._vectors = None
+        self._contexts = np.zeros(0, dtype=np.uint64)
+        self._last_used = np.zeros(0, dtype=np.float64)
+        self._entries = []
+        self._count = 0
+
+        if self.path and os.path.exists(self.path):
+            self._load()
+
+    @staticmethod
+    def context_key(context, model_name, temperature):
+        """
+        Hash the parts of the context a cached command depends on
+
+        Returns:
+            int: 64-bit key; only entries with the same key can match
+        """
+        context = context or {}
+        parts = [
+            context.get('os', config.CURRENT_OS),
+            context.get('shell', config.SHELL_TYPE),
+            context.get('current_dir', ''),
+            model_name,
+            repr(temperature),
+        ]
+        digest = hashlib.blake2b("\x1f".join(parts).encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "little")
+
+    def lookup(self, user_input, context_key, peek=False):
+        """
+        Find a cached result for a similar request in the same context
+
+        Args:
+            peek (bool): Leave the hit/miss counts and the entry's recency
+                         alone (for speculative lookups)
+
+        Returns:
+            tuple: (result dict, similarity) on a hit, (None, best similarity) on a miss
+        """
+        query = self.embedder.embed([user_input])[0]
+        literals = extract_literals(user_input)
+        words = normalize_words(user_input)
+
+        with self._lock:
+            if self._count == 0:
+                if not peek:
+                    self.misses += 1
+                return None, 0.0
+
+            # One matrix-vector product over the contiguous block is much
+            # cheaper than gathering the rows of this context first
+            similarities = self._vectors[:self._count] @ query
+            similarities[self._contexts[:self._count] != np.uint64(context_key)] = -1.0
+
+            # Check the closest matches above the threshold, best first,
+            # until one agrees on every literal and on what to do with them.
+            # Long requests differing in one word ("list" vs "delete",
+            # "ascending" vs "descending") still score above the threshold
+            above = np.flatnonzero(similarities >= self.threshold)
+            for row in above[np.argsort(similarities[above])[::-1]]:
+                row = int(row)
+                cached_input = self._entries[row]['input']
+                if extract_literals(cached_input) != literals:
+                    continue
+                if intent_conflicts(words, normalize_words(cached_input)):
+                    continue
+                if not peek:
+                    self._last_used[row] = time.time()
+                    self.hits += 1
+                return dict(self._entries[row]['result']), float(similarities[row])
+
+            if not peek:
+                self.misses += 1
+            return None, max(float(similarities.max()), 0.0)
+
+    def add(self, user_input, context_key, result):
+        """Store a generated result, evicting the least recently used entry if full"""
+        vector = self.embedder.embed([user_input])[0]
+
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != vector.shape[0]:
+                self._reset(vector.shape[0])
+
+            if self._count < self.max_entries:
+                row = self._count
+                self._grow(row + 1)
+                self._count += 1
+            else:
+                row = int(np.argmin(self._last_used[:self._count]))
+
+            self._vectors[row] = vector
+            self._contexts[row] = np.uint64(context_key)
+            self._last_used[row] = time.time()
+            entry = {'input': user_input, 'result': result}
+            if row < len(self._entries):
+                self._entries[row] = entry
+            else:
+                self._entries.append(entry)
+
+            self._dirty += 1
+            should_save = self._dirty >= config.SEMANTIC_CACHE_SAVE_EVERY
+
+        if should_save:
+            self.save()
+
+    def _reset(self, dim):
+        self._vectors = np.zeros((0, dim), dtype=np.float32)
+        self._contexts = np.zeros(0, dtype=np.uint64)
+        self._last_used = np.zeros(0, dtype=np.float64)
+        self._entries = []
+        self._count = 0
+
+    def _grow(self, needed):
+        """Grow the backing arrays geometrically to fit needed rows"""
+        capacity = self._vectors.shape[0]
+        if needed <= capacity:
+            return
+        new_capacity = min(max(needed, capacity * 2, 64), self.max_entries)
+
+        vectors = np.zeros((new_capacity, self._vectors.shape[1]), dtype=np.float32)
+        vectors[:capacity] = self._vectors
+        contexts = np.zeros(new_capacity, dtype=np.uint64)
+        contexts[:capacity] = self._contexts
+        last_used = np.zeros(new_capacity, dtype=np.float64)
+        last_used[:capacity] = self._last_used
+
+        self._vectors, self._contexts, self._last_used = vectors, contexts, last_used
+
+    def save(self):
+        """Write the index to disk atomically"""
+        if not self.path:
+            return
+
+        with self._lock:
+            if self._vectors is None:
+                return
+            count = self._count
+            payload = {
+                'vectors': self._vectors[:count],
+                'contexts': self._contexts[:count],
+                'last_used': self._last_used[:count],
+                'entries': np.array([json.dumps(e) for e in self._entries[:count]], dtype=np.str_),
+                'embedder': np.array(self.embedder.name),
+            }
+            self._dirty = 0
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **payload)
+        os.replace(tmp_path, self.path)
+
+    def _load(self):
+        """Load a previously saved index, ignoring it if it is unusable"""
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                if str(data['embedder']) != self.embedder.name:
+                    return  # Vectors from another embedder are not comparable
+
+                vectors = data['vectors']
+                contexts = data['contexts']
+                last_used = data['last_used']
+                entries = [json.loads(e) for e in data['entries']]
+        except Exception:
+            return
+
+        # Keep the most recently used entries if the limit shrank
+        keep = np.argsort(last_used)[::-1][:self.max_entries]
+        self._reset(vectors.shape[1])
+        self._grow(len(keep))
+        self._vectors[:len(keep)] = vectors[keep]
+        self._contexts[:len(keep)] = contexts[keep]
+        self._last_used[:len(keep)] = last_used[keep]
+        self._entries = [entries[i] for i in keep]
+        self._count = len(keep)
+
+    def clear(self):
+        """Remove all entries and the persisted index"""
+        with self._lock:
+            self._vectors = None
+            self._contexts = np.zeros(0, dtype=np.uint64)
+            self._last_used = np.zeros(0, dtype=np.float64)
+            self._entries = []
+            self._count = 0
+            self._dirty = 0
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def stats(self):
+        """
+        Get cache statistics
+
+        Returns:
+            dict: {
+                'entries': int,
+                'hits': int,
+                'misses': int,
+                'hit_rate': float
+            }
+        """
+        lookups = self.hits + self.misses
+        return {
+            'entries': self._count,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+    def __len__(self):
+        return self._count
@@ -0,0 +1,281 @@
+"""
+Persistent Shell - One long-lived bash process for running commands
+"""
+import codecs
+import os
+import selectors
+import subprocess
+import threading
+import time
+import uuid
+from core import resources
+from core.output_buffer import OutputBuffer
+
+
+class PersistentShell:
+    """
+    Runs commands in a single bash process instead of spawning one per command
+
+    Commands are sent over stdin and their output is framed by a per-command
+    sentinel, so exit codes, the working directory, exported variables and
+    aliases carry over between commands. Unix only.
+    """
+
+    def __init__(self, executable='/bin/bash', cwd=None):
+        self.executable = executable
+        self.cwd = cwd or os.getcwd()
+        self._process = None
+        self._lock = threading.Lock()
+
+    @property
+    def pid(self):
+        return self._process.pid if self._process is not None else None
+
+    @property
+    def alive(self):
+        return self._process is not None and self._process.poll() is None
+
+    def start(self):
+        """Start (or restart) the shell process"""
+        self.close()
+        self._process = subprocess.Popen(
+            [self.executable, '--noprofile', '--norc'],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=self.cwd if os.path.isdir(self.cwd) else None,
+            start_new_session=True,  # Own process group so a timeout can kill everything
+            # Commands are the shell's children, so they inherit its limits
+            preexec_fn=resources.apply_limits if resources.limits_configured() else None,
+            bufsize=0
+        )
+        # Aliases defined by earlier commands should work in later ones
+        self._process.stdin.write(b"shopt -s expand_aliases\n")
+        self._process.stdin.flush()
+
+    def run(self, command, timeout=None, on_output=None):
+        """
+        Run a command in the shell
+
+        Args:
+            command (str): Command line to run
+            timeout (float): Seconds before the shell is killed and restarted
+            on_output (callable): Called with (stream, text) as output arrives,
+                                  stream being 'stdout' or 'stderr'
+
+        Returns:
+            dict: {
+                'output': OutputBuffer,
+                'error': OutputBuffer,
+                'return_code': int,
+                'cwd': str (shell's working directory afterwards),
+                'timed_out': bool
+            }
+        """
+        with self._lock:
+            if not self.alive:
+                self.start()
+
+            # A fresh sentinel per command, so output left over from an
+            # interrupted command can never be taken for this one's
+            marker = f"__TM_{uuid.uuid4().hex}__"
+            try:
+                try:
+                    self._send(command, marker)
+                except (BrokenPipeError, OSError):
+                    self.start()
+                    self._send(command, marker)
+
+                return self._read_result(marker, timeout, on_output)
+            except BaseException:
+                # Ctrl-C or a failure mid-command: the command may still be
+                # running, so kill it with the shell and start a clean one
+                if self._process is not None:
+                    self._kill()
+                self.start()
+                raise
+
+    def _send(self, command, marker):
+        # eval keeps syntax errors inside the command from breaking the
+        # framing, and </dev/null stops it from reading our control pipe
+        script = (
+            f"__tm_cmd={_ansi_c_quote(command)}\n"
+            'eval "$__tm_cmd" </dev/null\n'
+            "__tm_rc=$?\n"
+            f"printf '\\n{marker}:%s:%s\\n' \"$__tm_rc\" \"$PWD\"\n"
+            f"printf '\\n{marker}\\n' >&2\n"
+        )
+        self._process.stdin.write(script.encode('utf-8'))
+        self._process.stdin.flush()
+
+    def _read_result(self, marker, timeout, on_output):
+        streams = {
+            'stdout': _FramedStream('stdout', f"\n{marker}:".encode('utf-8'), on_output),
+            'stderr': _FramedStream('stderr', f"\n{marker}\n".encode('utf-8'), on_output)
+        }
+        deadline = time.monotonic() + timeout if timeout else None
+
+        selector = selectors.DefaultSelector()
+        selector.register(self._process.stdout, selectors.EVENT_READ, 'stdout')
+        selector.register(self._process.stderr, selectors.EVENT_READ, 'stderr')
+
+        try:
+            while not (streams['stdout'].done and streams['stderr'].done):
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._kill()
+                        return self._result(streams, -1, timed_out=True)
+
+                for key, _ in selector.select(remaining):
+                    stream = streams[key.data]
+                    chunk = os.read(key.fd, 65536)
+                    if not chunk:
+                        # The command ended the shell (e.g. 'exit'); restart lazily
+                        selector.unregister(key.fileobj)
+                        stream.eof = True
+                        continue
+                    stream.feed(chunk)
+        finally:
+            selector.close()
+
+        status = streams['stdout'].status
+        if status is None:
+            # Shell exited before reporting back
+            return_code = self._process.wait()
+            self._process = None
+            return self._result(streams, return_code)
+
+        return_code, _, cwd = status.partition(':')
+        self.cwd = cwd or self.cwd
+        return self._result(streams, int(return_code))
+
+    def _result(self, streams, return_code, timed_out=False):
+        for stream in streams.values():
+            stream.finish()
+        return {
+            'output': streams['stdout'].buffer,
+            'error': streams['stderr'].buffer,
+            'return_code': return_code,
+            'cwd': self.cwd,
+            'timed_out': timed_out
+        }
+
+    def _kill(self):
+        """Kill the shell and everything it started"""
+        resources.kill_process_tree(self._process.pid, own_group=True)
+        self._process.wait()
+        self._process = None
+
+    def close(self):
+        """Stop the shell process"""
+        if self._process is None:
+            return
+        if self._process.poll() is None:
+            try:
+                self._process.stdin.close()
+                self._process.wait(timeout=1)
+            except (OSError, subprocess.TimeoutExpired):
+                self._kill()
+                return
+        self._process = None
+
+
+class _FramedStream:
+    """
+    Passes one pipe's output through until the sentinel shows up
+
+    Only a possible start of the sentinel is held back, so live output is
+    never delayed by more than a partial line.
+    """
+
+    def __init__(self, name, marker, on_output):
+        self.name = name
+        self.marker = marker
+        self.on_output = on_output
+        self.buffer = OutputBuffer()
+        self.status = None
+        self.eof = False
+
+        self._decoder = codecs.getincrementaldecoder('utf-8')('replace')
+        self._pending = b""
+        self._trailer = None
+
+    @property
+    def done(self):
+        if self.eof:
+            return True
+        # stdout's sentinel is followed by 'exit code:cwd\n'
+        return self._trailer is not None and (self.name == 'stderr' or b"\n" in self._trailer)
+
+    def feed(self, chunk):
+        if self._trailer is not None:
+            self._trailer += chunk
+            self._parse_status()
+            return
+
+        data = self._pending + chunk
+        index = data.find(self.marker)
+        if index != -1:
+            self._emit(data[:index])
+            self._pending = b""
+            self._trailer = data[index + len(self.marker):]
+            self._parse_status()
+            return
+
+        # Hold back the longest tail that could still become the sentinel
+        hold = len(data)
+        position = data.find(b"\n", max(0, len(data) - len(self.marker) + 1))
+        while position != -1:
+            if self.marker.startswith(data[position:]):
+                hold = position
+                break
+            position = data.find(b"\n", position + 1)
+        self._emit(data[:hold])
+        self._pending = data[hold:]
+
+    def finish(self):
+        """Flush whatever is left once reading has stopped"""
+        if self._trailer is None:
+            self._emit(self._pending)
+            self._pending = b""
+        text = self._decoder.decode(b"", final=True)
+        if text:
+            self._write(text)
+        self.buffer.close()
+
+    def _parse_status(self):
+        if self.name == 'stdout' and b"\n" in self._trailer:
+            self.status = self._trailer.split(b"\n", 1)[0].decode('utf-8', 'replace')
+
+    def _emit(self, data):
+        text = self._decoder.decode(data)
+        if text:
+            self._write(text)
+
+    def _write(self, text):
+        self.buffer.write(text)
+        if self.on_output:
+            self.on_output(self.name, text)
+
+
+def _ansi_c_quote(text):
+    """Quote text as a bash $'...' string so any character survives"""
+    escaped = []
+    for char in text:
+        if char == '\\':
+            escaped.append('\\\\')
+        elif char == "'":
+            escaped.append("\\'")
+        elif char == '\n':
+            escaped.append('\\n')
+        elif char == '\t':
+            escaped.append('\\t')
+        elif char == '\r':
+            escaped.append('\\r')
+        elif ord(char) < 0x20 or ord(char) == 0x7f:
+            escaped.append(f'\\x{ord(char):02x}')
+        else:
+            escaped.append(char)
+    return "$'" + "".join(escaped) + "'"
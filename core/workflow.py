@@ -2,8 +2,13 @@
 Workflow Engine for multi-step tasks
 """
 import os
-from dataclasses import dataclass
-from typing import List, Callable, Optional
+import re
+import time
+import tomllib
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Callable, Optional
+from rich.markup import escape
 
 
 import sys
@@ -14,14 +19,34 @@ project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
-from rich.console import Console
 from core.executor import CommandExecutor
+from core.native_steps import run_native_step
+from core.workflow_state import WorkflowState
+from utils.aho_corasick import AhoCorasick
+import config
+
+# Step outcomes that let dependent steps run
+SUCCEEDED = ('done', 'up_to_date')
+
 
 @dataclass
 class WorkflowStep:
     name: str
-    command: str
+    command: str = ""
     description: str = ""
+    # Names of steps that must succeed first. None means "the previous
+    # step", so workflows that don't declare dependencies stay sequential;
+    # an empty list means the step can start right away.
+    depends_on: Optional[List[str]] = None
+    # Native steps run in-process instead of through a shell: the name of
+    # an action in core.native_steps.NATIVE_ACTIONS and its arguments
+    action: Optional[str] = None
+    args: Dict[str, Any] = field(default_factory=dict)
+    # Paths (relative to the workflow directory) the step reads and
+    # produces. A step that declares any is skipped while its inputs'
+    # contents match its last successful run and its outputs still exist.
+    inputs: List[str] = field(default_factory=list)
+    outputs: List[str] = field(default_factory=list)
 
 
 @dataclass
@@ -32,90 +57,396 @@ class Workflow:
     description: str = ""
 
 
+WORKFLOW_EXTENSIONS = ('.toml', '.yaml', '.yml')
+STEP_FIELDS = {'name', 'command', 'description', 'depends_on', 'action', 'args', 'inputs', 'outputs'}
+
+
+def normalize_trigger(text: str) -> str:
+    """Lowercase and collapse whitespace so triggers match however they're typed"""
+    return re.sub(r"\s+", " ", text.lower()).strip()
+
+
+def load_workflow_file(path: str) -> List[Workflow]:
+    """
+    Parse a TOML or YAML workflow file
+    
+    A file holds one workflow at the top level, or several under a
+    'workflows' list.
+    
+    Raises:
+        ValueError: If the file is malformed or YAML support is missing
+    """
+    if path.endswith('.toml'):
+        with open(path, 'rb') as f:
+            try:
+                data = tomllib.load(f)
+            except tomllib.TOMLDecodeError as e:
+                raise ValueError(f"Invalid TOML: {e}") from e
+    else:
+        try:
+            import yaml  # Imported here so startup doesn't pay for it; TOML works without it
+        except ImportError:
+            raise ValueError("PyYAML is not installed") from None
+        with open(path, encoding='utf-8') as f:
+            try:
+                data = yaml.safe_load(f)
+            except yaml.YAMLError as e:
+                raise ValueError(f"Invalid YAML: {e}") from e
+    
+    if not isinstance(data, dict):
+        raise ValueError("Expected a table/mapping at the top level")
+    entries = data['workflows'] if 'workflows' in data else [data]
+    return [_parse_workflow(entry) for entry in entries]
+
+
+def _parse_workflow(data: Dict[str, Any]) -> Workflow:
+    """Build a Workflow from a parsed file entry"""
+    if not isinstance(data, dict) or 'name' not in data:
+        raise ValueError("Every workflow needs a name")
+    steps = []
+    for step in data.get('steps', []):
+        unknown = set(step) - STEP_FIELDS
+        if unknown:
+            raise ValueError(f"Unknown step field(s) in '{data['name']}': {', '.join(sorted(unknown))}")
+        if not step.get('command') and not step.get('action'):
+            raise ValueError(f"Step '{step.get('name')}' in '{data['name']}' needs a command or an action")
+        steps.append(WorkflowStep(**step))
+    triggers = data.get('triggers', [])
+    if isinstance(triggers, str):
+        triggers = [triggers]
+    return Workflow(
+        name=data['name'],
+        triggers=list(triggers),
+        steps=steps,
+        description=data.get('description', "")
+    )
+
+
 class WorkflowEngine:
-    def __init__(self):
-        self.workflows = self._load_workflows()
-    
-    def _load_workflows(self) -> List[Workflow]:
-        """Load built-in workflows"""
-        return [
-            Workflow(
-                name="Standard Project Setup",
-                triggers=[
-                    "create my standard project setup",
-                    "setup standard project",
-                    "init standard project"
-                ],
-                description="Creates a standard project structure with src, tests, docs, and git init",
-                steps=[
-                    WorkflowStep(
-                        name="Create Directories",
-                        command="mkdir src tests docs",
-                        description="Creating folders: src, tests, docs"
-                    ),
-                    WorkflowStep(
-                        name="Create README",
-                        command="echo # Project > README.md",
-                        description="Creating README.md"
-                    ),
-                    WorkflowStep(
-                        name="Create Gitignore",
-                        command="echo __pycache__/ > .gitignore",
-                        description="Creating .gitignore"
-                    ),
-                    WorkflowStep(
-                        name="Initialize Git",
-                        command="git init",
-                        description="Initializing git"
-                    )
-                ]
-            )
-        ]
+    def __init__(self, state: Optional[WorkflowState] = None, directories: Optional[List[str]] = None):
+        self.directories = directories if directories is not None else config.WORKFLOW_DIRS
+        self.last_results = {}
+        self.load_errors = {}  # Path -> why the file was skipped
+        self._state = state
+        self._files = {}  # Path -> (mtime_ns, size, [Workflow])
+        self._workflows = None
+        self._matcher = None
+        self._checked_at = 0.0
+    
+    @property
+    def state(self) -> WorkflowState:
+        """Step fingerprints, loaded on first use"""
+        if self._state is None:
+            self._state = WorkflowState()
+        return self._state
+    
+    @property
+    def workflows(self) -> List[Workflow]:
+        """All workflows, (re)loading changed files first"""
+        self._refresh()
+        return self._workflows
+    
+    def _refresh(self, force: bool = False):
+        """
+        Reload workflow files whose mtime or size changed and rebuild the matcher
+        
+        The directories are only rescanned every WORKFLOW_RELOAD_INTERVAL
+        seconds, so repeated lookups cost a clock check.
+        """
+        now = time.monotonic()
+        if not force and self._workflows is not None and now - self._checked_at < config.WORKFLOW_RELOAD_INTERVAL:
+            return
+        self._checked_at = now
+        
+        seen = {}
+        for directory in self.directories:
+            try:
+                entries = sorted(os.scandir(directory), key=lambda entry: entry.name)
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith(WORKFLOW_EXTENSIONS):
+                    stat = entry.stat()
+                    seen[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        
+        changed = list(seen) != list(self._files)
+        files = {}
+        for path, signature in seen.items():
+            cached = self._files.get(path)
+            if cached is not None and cached[:2] == signature:
+                files[path] = cached
+                continue
+            changed = True
+            try:
+                workflows = load_workflow_file(path)
+                for workflow in workflows:
+                    self.resolve_dependencies(workflow)
+                self.load_errors.pop(path, None)
+            except (OSError, ValueError, TypeError) as e:
+                workflows = []
+                self.load_errors[path] = str(e)
+            files[path] = signature + (workflows,)
+        
+        for path in set(self.load_errors) - set(files):
+            del self.load_errors[path]
+        self._files = files
+        
+        if changed or self._workflows is None:
+            self._workflows = [workflow for _, _, workflows in files.values() for workflow in workflows]
+            self._matcher = None
+    
+    def _get_matcher(self) -> AhoCorasick:
+        """Compile every trigger into one matcher (rebuilt only after a reload)"""
+        if self._matcher is None:
+            matcher = AhoCorasick()
+            for order, workflow in enumerate(self._workflows):
+                for trigger in workflow.triggers:
+                    normalized = normalize_trigger(trigger)
+                    if normalized:
+                        matcher.add(normalized, (order, workflow))
+            matcher.build()
+            self._matcher = matcher
+        return self._matcher
     
     def find_workflow(self, user_input: str) -> Optional[Workflow]:
-        """Find a workflow matching the user input"""
-        normalized_input = user_input.lower().strip()
-        for workflow in self.workflows:
-            for trigger in workflow.triggers:
-                if trigger in normalized_input:
-                    return workflow
-        return None
-    
-    def execute_workflow(self, workflow: Workflow, executor, console):
-        """Execute a workflow"""
-        console.print(f"[bold cyan]Running workflow: {workflow.name}[/bold cyan]")
+        """
+        Find a workflow whose trigger appears in the user input
         
-        success = True
-        for step in workflow.steps:
-            console.print(f"  • {step.description}...", end=" ")
-            
-            # Execute command
-            result = executor.execute(step.command)
+        All triggers are matched in one pass. The longest matching trigger
+        wins, and among equally long ones the workflow loaded first.
+        """
+        self._refresh()
+        best = None
+        for start, end, (order, workflow) in self._get_matcher().iter_matches(normalize_trigger(user_input)):
+            rank = (end - start, -order)
+            if best is None or rank > best[0]:
+                best = (rank, workflow)
+        return best[1] if best else None
+    
+    def resolve_dependencies(self, workflow: Workflow) -> Dict[str, List[str]]:
+        """
+        Work out each step's dependencies and check they form a DAG
+        
+        Returns:
+            dict: Step name -> names of the steps it depends on, in
+                  topological order
             
-            if result['success']:
-                console.print("[green]DONE[/green]")
+        Raises:
+            ValueError: On duplicate step names, unknown dependencies or cycles
+        """
+        dependencies = {}
+        previous = None
+        for step in workflow.steps:
+            if step.name in dependencies:
+                raise ValueError(f"Workflow '{workflow.name}' has two steps named '{step.name}'")
+            if step.depends_on is None:
+                dependencies[step.name] = [previous] if previous else []
             else:
-                console.print("[red]FAILED[/red]")
-                console.print(f"    [red]Error: {result['error']}[/red]")
-                success = False
-                break
+                dependencies[step.name] = list(step.depends_on)
+            previous = step.name
+        
+        for name, needs in dependencies.items():
+            for dependency in needs:
+                if dependency not in dependencies:
+                    raise ValueError(f"Step '{name}' depends on unknown step '{dependency}'")
+        
+        # Depth-first topological sort; a grey node seen again means a cycle
+        ordered = {}
+        visiting = []
+        
+        def visit(name):
+            if name in ordered:
+                return
+            if name in visiting:
+                cycle = visiting[visiting.index(name):] + [name]
+                raise ValueError(f"Workflow '{workflow.name}' has a dependency cycle: {' -> '.join(cycle)}")
+            visiting.append(name)
+            for dependency in dependencies[name]:
+                visit(dependency)
+            visiting.pop()
+            ordered[name] = dependencies[name]
+        
+        for name in dependencies:
+            visit(name)
+        return ordered
+    
+    def execute_workflow(self, workflow: Workflow, executor, console, max_workers: Optional[int] = None,
+                         force: bool = False):
+        """
+        Execute a workflow, running independent steps in parallel
+        
+        A failed step skips only the steps that depend on it. Steps whose
+        declared inputs and outputs are unchanged since their last successful
+        run are skipped as up to date.
+        
+        Args:
+            workflow (Workflow): Workflow to run
+            executor (CommandExecutor): Executor for the step commands
+            console (Console): Where progress is printed
+            max_workers (int): Steps allowed to run at once
+                               (defaults to config.WORKFLOW_MAX_WORKERS)
+            force (bool): Run every step even if it is up to date
+            
+        Returns:
+            bool: True if every step succeeded or was up to date
+        """
+        dependencies = self.resolve_dependencies(workflow)
+        steps = {step.name: step for step in workflow.steps}
+        max_workers = max_workers or config.WORKFLOW_MAX_WORKERS
+        
+        # One bash can only run one command at a time, so parallel steps
+        # each get their own process
+        if getattr(executor, 'shell_session', None) is not None and max_workers > 1:
+            step_executor = CommandExecutor(persistent_shell=False)
+            step_executor.current_dir = executor.get_current_directory()
+        else:
+            step_executor = executor
+        
+        console.print(f"[bold cyan]Running workflow: {workflow.name}[/bold cyan]")
+        
+        scope = f"{os.path.abspath(step_executor.get_current_directory())}::{workflow.name}"
+        started = time.perf_counter()
+        results = {}
+        pending = list(dependencies)  # Topological order
+        running = {}
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="workflow") as pool:
+            while pending or running:
+                for name in list(pending):
+                    needs = dependencies[name]
+                    blocked = [d for d in needs if results.get(d, {}).get('status') in ('failed', 'skipped')]
+                    if blocked:
+                        pending.remove(name)
+                        results[name] = {'status': 'skipped', 'duration': 0.0, 'blocked_by': blocked[0]}
+                        self._report_step(console, steps[name], results[name])
+                    elif all(results.get(d, {}).get('status') in SUCCEEDED for d in needs):
+                        pending.remove(name)
+                        future = pool.submit(self._run_step, steps[name], step_executor, started, scope, force)
+                        running[future] = name
+                
+                if not running:
+                    continue
+                
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    results[name] = future.result()
+                    self._report_step(console, steps[name], results[name])
+        
+        wall_time = time.perf_counter() - started
+        self.state.save()
+        self.last_results = results
+        success = all(result['status'] in SUCCEEDED for result in results.values())
         
+        self._report_summary(console, results)
+        self._report_critical_path(console, dependencies, results, wall_time)
         if success:
             console.print(f"\n[bold green]Workflow '{workflow.name}' completed successfully![/bold green]\n")
         else:
             console.print(f"\n[bold red]Workflow '{workflow.name}' failed.[/bold red]\n")
         
         return success
+    
+    def _run_step(self, step: WorkflowStep, executor, started: float, scope: str, force: bool) -> dict:
+        """Run one step on a worker thread (unless it is up to date) and time it"""
+        cwd = executor.get_current_directory()
+        start = time.perf_counter()
+        if not force:
+            entry = self.state.check(scope, step, cwd)
+            if entry is not None:
+                end = time.perf_counter()
+                return {
+                    'status': 'up_to_date',
+                    'duration': end - start,
+                    'start': start - started,
+                    'end': end - started,
+                    'saved': entry.get('duration', 0.0)
+                }
+        
+        if step.action:
+            result = run_native_step(step.action, step.args, cwd)
+        else:
+            result = executor.execute(step.command)
+        end = time.perf_counter()
+        
+        if result['success']:
+            self.state.record(scope, step, cwd, end - start)
+        else:
+            self.state.forget(scope, step)
+        return {
+            'status': 'done' if result['success'] else 'failed',
+            'duration': end - start,
+            'start': start - started,
+            'end': end - started,
+            'result': result
+        }
+    
+    def _report_step(self, console, step: WorkflowStep, outcome: dict):
+        """Print one step's outcome as it finishes"""
+        label = step.description or step.name
+        if outcome['status'] == 'done':
+            console.print(f"  [green]✓[/green] {label} [dim]({outcome['duration']:.2f}s)[/dim]")
+            if step.action and outcome['result']['output']:
+                console.print(f"    [dim]{escape(outcome['result']['output'])}[/dim]")
+        elif outcome['status'] == 'up_to_date':
+            console.print(f"  [blue]↺[/blue] {label} [dim](up to date)[/dim]")
+        elif outcome['status'] == 'failed':
+            console.print(f"  [red]✗[/red] {label} [red]FAILED[/red] [dim]({outcome['duration']:.2f}s)[/dim]")
+            result = outcome['result']
+            console.print(f"    [red]Error: {result['error'] or 'exit code ' + str(result['return_code'])}[/red]")
+        else:
+            console.print(f"  [yellow]-[/yellow] {label} [yellow]SKIPPED[/yellow] "
+                          f"[dim](needs '{outcome['blocked_by']}')[/dim]")
+    
+    def _report_summary(self, console, results: dict):
+        """Print how many steps ran and how much time skipping saved"""
+        counts = {status: 0 for status in ('done', 'up_to_date', 'failed', 'skipped')}
+        for result in results.values():
+            counts[result['status']] += 1
+        if not counts['up_to_date']:
+            return
+        
+        saved = sum(result.get('saved', 0.0) for result in results.values())
+        summary = f"Executed {counts['done']}, up to date {counts['up_to_date']} (saved ~{saved:.2f}s)"
+        if counts['failed'] or counts['skipped']:
+            summary += f", failed {counts['failed']}, skipped {counts['skipped']}"
+        console.print(f"[dim]{summary}[/dim]")
+    
+    def _report_critical_path(self, console, dependencies: Dict[str, List[str]], results: dict, wall_time: float):
+        """Print the chain of steps that bounded the workflow's run time"""
+        # Longest duration-weighted path through the DAG
+        path_time = {}
+        previous = {}
+        for name, needs in dependencies.items():  # Topological order
+            best = max(needs, key=lambda d: path_time[d], default=None)
+            path_time[name] = results[name]['duration'] + (path_time[best] if best else 0.0)
+            previous[name] = best
+        
+        if not path_time:
+            return
+        
+        name = max(path_time, key=path_time.get)
+        total = path_time[name]
+        path = []
+        while name:
+            path.append(name)
+            name = previous[name]
+        
+        serial_time = sum(result['duration'] for result in results.values())
+        console.print(
+            f"[dim]⏱  Critical path: {' → '.join(reversed(path))} ({total:.2f}s); "
+            f"wall time {wall_time:.2f}s, steps total {serial_time:.2f}s[/dim]"
+        )
 
 if __name__ == "__main__":
     import argparse
+    from ui.console import console
     
     parser = argparse.ArgumentParser(description="TerminalMate Workflow Runner")
     parser.add_argument("name", help="Name of the workflow to run")
+    parser.add_argument("--force", action="store_true", help="Run every step, even if it is up to date")
     args = parser.parse_args()
     
     # Initialize components
-    console = Console()
     executor = CommandExecutor()
     engine = WorkflowEngine()
     
@@ -131,7 +462,7 @@ if __name__ == "__main__":
         workflow = engine.find_workflow(args.name)
         
     if workflow:
-        engine.execute_workflow(workflow, executor, console)
+        engine.execute_workflow(workflow, executor, console, force=args.force)
     else:
         console.print(f"[red]Error: Workflow '{args.name}' not found.[/red]")
         sys.exit(1)
@@ -0,0 +1,191 @@
+"""
+Workflow State - Step fingerprints for incremental workflow runs
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import config
+
+
+def hash_file(path):
+    """SHA-256 of a file's contents, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def fingerprint(path, previous=None, content=True):
+    """
+    Fingerprint a file or directory
+
+    Files are only rehashed when their size or mtime differ from the
+    previous fingerprint. Directories count by existence alone, since their
+    mtime changes whenever anything inside them does.
+
+    Args:
+        path (str): Path to fingerprint
+        previous (dict): Fingerprint recorded last time, if any
+        content (bool): Hash a file's content; False records only its type
+
+    Returns:
+        dict: {'type': 'file', 'size', 'mtime_ns', 'sha256'}, {'type': 'file'}
+              without content, {'type': 'dir'} or None if the path does not exist
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    if os.path.isdir(path):
+        return {'type': 'dir'}
+    if not content:
+        return {'type': 'file'}
+
+    if (previous and previous.get('type') == 'file' and previous['size'] == stat.st_size
+            and previous['mtime_ns'] == stat.st_mtime_ns):
+        sha256 = previous['sha256']
+    else:
+        sha256 = hash_file(path)
+    return {'type': 'file', 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': sha256}
+
+
+def step_signature(step):
+    """Hash of everything that defines what a step does"""
+    definition = {
+        'command': step.command,
+        'action': step.action,
+        'args': step.args,
+        'inputs': step.inputs,
+        'outputs': step.outputs
+    }
+    return hashlib.sha256(json.dumps(definition, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class WorkflowState:
+    """
+    Remembers what each step's inputs and outputs looked like after it last succeeded
+
+    A step whose definition and inputs still match and whose outputs all
+    still exist is up to date and can be skipped, make-style. Only inputs
+    are compared by content: an output the user edited afterwards (a
+    generated README.md) is theirs, not a reason to regenerate it. Steps
+    that declare neither inputs nor outputs always run.
+    """
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path (str): JSON state file (defaults to config.WORKFLOW_STATE_FILE)
+        """
+        self.path = path or config.WORKFLOW_STATE_FILE
+        self._lock = threading.Lock()
+        self._data = self._load()
+        self._dirty = False
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _files(self, step):
+        """(path, compare content) for every input and output of a step"""
+        return [(path, True) for path in step.inputs] + \
+            [(path, False) for path in step.outputs if path not in step.inputs]
+
+    def check(self, scope, step, cwd):
+        """
+        Check whether a step is up to date
+
+        Args:
+            scope (str): Key separating workflows and directories
+            step (WorkflowStep): Step to check
+            cwd (str): Directory the step's paths are relative to
+
+        Returns:
+            dict: The recorded entry (with 'duration') if the step can be
+                  skipped, otherwise None
+        """
+        if not step.inputs and not step.outputs:
+            return None
+
+        with self._lock:
+            entry = self._data.get(scope, {}).get(step.name)
+        if not entry or entry.get('signature') != step_signature(step):
+            return None
+
+        fresh = {}
+        for path, content in self._files(step):
+            previous = entry['files'].get(path)
+            current = fingerprint(os.path.join(cwd, path), previous, content)
+            if current is None or previous is None or current['type'] != previous['type']:
+                return None
+            if content and current.get('sha256') != previous.get('sha256'):
+                return None
+            fresh[path] = current
+
+        # Same content with a new mtime: remember it so we skip hashing next time
+        if fresh != entry['files']:
+            with self._lock:
+                entry['files'] = fresh
+                self._dirty = True
+        return entry
+
+    def record(self, scope, step, cwd, duration):
+        """Remember a step's fingerprints after it succeeded"""
+        if not step.inputs and not step.outputs:
+            return
+
+        with self._lock:
+            previous = self._data.get(scope, {}).get(step.name, {}).get('files', {})
+        files = {}
+        for path, content in self._files(step):
+            current = fingerprint(os.path.join(cwd, path), previous.get(path), content)
+            if current is None:
+                # A declared output that wasn't produced can't be trusted later
+                self.forget(scope, step)
+                return
+            files[path] = current
+
+        with self._lock:
+            # Most recently used scopes live at the end of the dict
+            steps = self._data.pop(scope, {})
+            steps[step.name] = {
+                'signature': step_signature(step),
+                'files': files,
+                'duration': duration
+            }
+            self._data[scope] = steps
+            while len(self._data) > config.WORKFLOW_STATE_MAX_SCOPES:
+                del self._data[next(iter(self._data))]
+            self._dirty = True
+
+    def forget(self, scope, step):
+        """Drop a step's record so it runs next time"""
+        with self._lock:
+            if self._data.get(scope, {}).pop(step.name, None) is not None:
+                self._dirty = True
+
+    def save(self):
+        """Write the state file atomically if anything changed"""
+        with self._lock:
+            if not self._dirty:
+                return
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=directory or None, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(json.dumps(self._data))  # dumps uses the C encoder; dump doesn't
+                os.replace(temp_path, self.path)
+            except OSError:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+            self._dirty = False
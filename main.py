@@ -2,37 +2,93 @@
 TerminalMate - AI-Powered Terminal Assistant
 Main application entry point
 """
+import time
+
+STARTED = time.perf_counter()  # Before any other import, for --profile-startup
+
+import argparse
+import html
 import os
 import sys
-from rich.console import Console
+from rich.markup import escape
 from rich.panel import Panel
-from rich.prompt import Prompt
 
 # Add project root to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+# Heavy dependencies (ollama, numpy, PyYAML, prompt_toolkit) are imported
+# where they are first used, so the prompt appears before they load
 from core.llm_engine import LLMEngine
 from core.executor import CommandExecutor
-from core.workflow import WorkflowEngine
 from safety.risk_analyzer import RiskAnalyzer
 from safety.confirmation import ConfirmationUI
+from ui.console import console
+from utils.instrumentation import metrics
+from utils.logger import log_event
 import config
 
+# Inputs handled by handle_special_commands instead of the LLM
+BUILTIN_COMMANDS = {'exit', 'quit', 'q', 'help', '?', 'clear', 'pwd', 'cache', 'cache clear', 'workflows',
+                    'history', 'history clear', 'logs', 'logs stats', 'stats', 'stats reset'}
+BUILTIN_PREFIXES = ('history search',)  # Followed by an argument
+
+
+def is_builtin_command(text, partial=False):
+    """
+    Check whether an input is a built-in command
+    
+    Args:
+        text (str): The input
+        partial (bool): Also match input that may still become one as typing
+                        goes on ('histor', 'history search fo')
+    """
+    text = " ".join(text.lower().split())
+    if text in BUILTIN_COMMANDS or any(text == p or text.startswith(p + " ") for p in BUILTIN_PREFIXES):
+        return True
+    return partial and any(name.startswith(text) for name in BUILTIN_COMMANDS.union(BUILTIN_PREFIXES))
+
 
 class TerminalMate:
     def __init__(self):
-        self.console = Console()
+        self.console = console
         self.llm = LLMEngine()
         self.executor = CommandExecutor()
-        self.workflow_engine = WorkflowEngine()
+        self._workflow_engine = None
         self.risk_analyzer = RiskAnalyzer()
         self.confirmation_ui = ConfirmationUI()
         self.history = []  # Store recent conversation history
+        self.request_id = 0  # Ties together the log events of one request
+        self._request_started = None
         self.running = True
+        self.startup_reported = False
         
+        # Speculative input needs a real terminal for prompt_toolkit
+        self.speculative_input = None
+        if config.INPUT_MODE == "speculative" and sys.stdin.isatty() and sys.stdout.isatty():
+            from ui.speculative_input import SpeculativeInput
+            self.speculative_input = SpeculativeInput(
+                self.llm, self.build_context, ignore=lambda text: is_builtin_command(text, partial=True)
+            )
+        
+    @property
+    def workflow_engine(self):
+        """Workflow engine, created when a request first needs it"""
+        if self._workflow_engine is None:
+            from core.workflow import WorkflowEngine
+            self._workflow_engine = WorkflowEngine()
+        return self._workflow_engine
+    
+    def startup(self):
+        """Start loading the model and show the welcome panel"""
+        # Load the model while the welcome panel renders and the user types
+        if config.LLM_WARMUP:
+            self.llm.start_warm_up()
+        
+        self.show_welcome()
+    
     def start(self):
         """Start the TerminalMate interactive session"""
-        self.show_welcome()
+        self.startup()
         
         while self.running:
             try:
@@ -46,14 +102,24 @@ class TerminalMate:
                 if self.handle_special_commands(user_input):
                     continue
                 
-                # Generate command from natural language
-                self.process_request(user_input)
+                # Generate command from natural language; Ctrl-C cancels
+                # the request but keeps the session running
+                try:
+                    self.process_request(user_input)
+                except KeyboardInterrupt:
+                    self.console.print("\n[yellow]Request cancelled[/yellow]")
+                    continue
+                self.show_startup_report()
                 
             except KeyboardInterrupt:
                 self.console.print("\n[yellow]Goodbye! 👋[/yellow]")
                 self.running = False
             except Exception as e:
                 self.console.print(f"\n[red]Error: {str(e)}[/red]")
+        
+        metrics.write_prometheus()
+        self.llm.close()
+        self.executor.close()
     
     def show_welcome(self):
         """Display welcome message"""
@@ -81,10 +147,15 @@ Your AI-powered terminal assistant using [bold]Qwen 2.5 Coder[/bold]
     def get_user_input(self):
         """Get input from user"""
         current_dir = os.path.basename(self.executor.get_current_directory())
-        prompt_text = f"\n[bold cyan]{current_dir}>[/bold cyan] "
         
         try:
-            user_input = Prompt.ask(prompt_text)
+            if self.speculative_input is not None:
+                self.console.print()
+                user_input = self.speculative_input.ask(f"<b><ansicyan>{html.escape(current_dir)}&gt;</ansicyan></b> ")
+            else:
+                from rich.prompt import Prompt
+                prompt_text = f"\n[bold cyan]{current_dir}>[/bold cyan] "
+                user_input = Prompt.ask(prompt_text, console=self.console)
             return user_input.strip()
         except EOFError:
             self.running = False
@@ -92,6 +163,8 @@ Your AI-powered terminal assistant using [bold]Qwen 2.5 Coder[/bold]
     
     def handle_special_commands(self, user_input):
         """Handle special built-in commands"""
+        if not is_builtin_command(user_input):
+            return False
         lower_input = user_input.lower()
         
         if lower_input in ['exit', 'quit', 'q']:
@@ -111,8 +184,189 @@ Your AI-powered terminal assistant using [bold]Qwen 2.5 Coder[/bold]
             self.console.print(f"[cyan]{self.executor.get_current_directory()}[/cyan]")
             return True
         
+        elif lower_input in ['cache', 'cache clear']:
+            self.show_cache(clear=lower_input == 'cache clear')
+            return True
+        
+        elif lower_input == 'workflows':
+            self.show_workflows()
+            return True
+        
+        elif lower_input in ['history', 'history clear']:
+            self.show_history(clear=lower_input == 'history clear')
+            return True
+        
+        # Only the explicit form: "history of commits touching main.py" is a request
+        elif lower_input == 'history search' or lower_input.startswith('history search '):
+            self.show_history(user_input[len('history search'):].strip())
+            return True
+        
+        elif lower_input in ['logs', 'logs stats']:
+            self.show_log_stats()
+            return True
+        
+        elif lower_input in ['stats', 'stats reset']:
+            self.show_stats(reset=lower_input == 'stats reset')
+            return True
+        
         return False
     
+    def show_cache(self, clear=False):
+        """Show response cache statistics, optionally clearing it first"""
+        caches = [
+            ("Exact cache", self.llm.cache),
+            ("Semantic cache", self.llm.semantic_cache)
+        ]
+        caches = [(label, cache) for label, cache in caches if cache is not None]
+        if not caches:
+            self.console.print("[yellow]Response cache is disabled[/yellow]")
+            return
+        
+        for label, cache in caches:
+            if clear:
+                cache.clear()
+            stats = cache.stats()
+            self.console.print(
+                f"[cyan]{label}: {stats['entries']} entries, "
+                f"{stats['hits']} hits, {stats['misses']} misses "
+                f"({stats['hit_rate']:.0%} hit rate)[/cyan]"
+            )
+        
+        if clear:
+            self.console.print("[green]✓ Response cache cleared[/green]")
+    
+    def show_workflows(self):
+        """List loaded workflows and any files that failed to load"""
+        workflows = self.workflow_engine.workflows
+        if not workflows:
+            self.console.print("[yellow]No workflows found[/yellow]")
+        for workflow in workflows:
+            triggers = ", ".join(f'"{trigger}"' for trigger in workflow.triggers)
+            self.console.print(f"[cyan]{workflow.name}[/cyan] ({len(workflow.steps)} steps) [dim]{triggers}[/dim]")
+        for path, error in self.workflow_engine.load_errors.items():
+            self.console.print(f"[red]Skipped {path}: {error}[/red]")
+    
+    def show_history(self, query="", clear=False):
+        """
+        Show recent commands from the persistent history
+        
+        Args:
+            query (str): Only show entries containing this text
+            clear (bool): Empty the history instead
+        """
+        history = self.llm.history
+        if history is None:
+            self.console.print("[yellow]Command history is disabled[/yellow]")
+            return
+        
+        if clear:
+            history.clear()
+            self.console.print("[green]✓ Command history cleared[/green]")
+            return
+        
+        entries = history.search(query) if query else history.recent()
+        if not entries:
+            self.console.print("[yellow]No matching commands in history[/yellow]")
+        for entry in reversed(entries):
+            when = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry['timestamp']))
+            status = "[green]✓[/green]" if entry['exit_code'] == 0 else f"[red]✗ {entry['exit_code']}[/red]"
+            self.console.print(f"[dim]{when}[/dim] {status} [cyan]{escape(entry['command'])}[/cyan]")
+            self.console.print(f"  [dim]{escape(entry['input'])}[/dim]")
+        
+        stats = history.stats()
+        index = "full-text index" if stats['indexed'] else "no FTS5, recent commands scanned"
+        self.console.print(f"[dim]{stats['entries']} commands recorded, {stats['succeeded']} succeeded ({index})[/dim]")
+    
+    def show_stats(self, reset=False):
+        """Show this session's latency per phase and Ollama's counters"""
+        if not metrics.enabled:
+            self.console.print("[yellow]Instrumentation is disabled (INSTRUMENTATION_ENABLED in config.py)[/yellow]")
+            return
+        if reset:
+            metrics.reset()
+            self.console.print("[green]✓ Statistics reset[/green]")
+            return
+        
+        snapshot = metrics.snapshot()
+        if not snapshot['phases']:
+            self.console.print("[yellow]No requests timed yet[/yellow]")
+            return
+        
+        self.console.print(f"[bold]{'phase':<20} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}[/bold]")
+        for phase, summary in sorted(snapshot['phases'].items()):
+            self.console.print(
+                f"{phase:<20} {summary['count']:>6} {summary['p50']:>9.1f} "
+                f"{summary['p95']:>9.1f} {summary['p99']:>9.1f} {summary['max']:>9.1f}"
+            )
+        
+        counters = snapshot['counters']
+        if counters.get('ollama_requests'):
+            eval_seconds = counters.get('ollama_eval_seconds')
+            rate = f", {counters['ollama_eval_tokens'] / eval_seconds:.1f} tokens/s" if eval_seconds else ""
+            self.console.print(
+                f"[dim]Ollama: {counters['ollama_requests']} requests, "
+                f"{counters['ollama_prompt_tokens']} prompt tokens, {counters['ollama_eval_tokens']} generated{rate}[/dim]"
+            )
+        hits = counters.get('cache_hits', 0) + counters.get('semantic_cache_hits', 0)
+        if hits or counters.get('cache_misses'):
+            self.console.print(f"[dim]Cache: {hits} hits, {counters.get('cache_misses', 0)} misses[/dim]")
+        
+        path = metrics.write_prometheus()
+        if path:
+            self.console.print(f"[dim]Written to {path}[/dim]")
+    
+    def show_log_stats(self):
+        """Show latency percentiles per phase and decision counts from the event log"""
+        from utils.logger import log_files, log_stats
+        if not config.ENABLE_LOGGING:
+            self.console.print("[yellow]Logging is disabled (ENABLE_LOGGING in config.py)[/yellow]")
+            return
+        
+        stats = log_stats()
+        if not stats['events']:
+            self.console.print(f"[yellow]Nothing logged yet ({config.LOG_FILE})[/yellow]")
+            return
+        
+        files = log_files()
+        size = sum(os.path.getsize(path) for path in files)
+        since = time.strftime("%Y-%m-%d %H:%M", time.localtime(stats['first']))
+        self.console.print(
+            f"[cyan]{stats['events']} events since {since} in {len(files)} file(s), {size / 1024:.0f} KB[/cyan] "
+            f"[dim]{config.LOG_FILE}[/dim]"
+        )
+        self.console.print(f"[bold]{'phase':<10} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}[/bold]")
+        for phase, summary in sorted(stats['phases'].items()):
+            self.console.print(
+                f"{phase:<10} {summary['count']:>6} {summary['p50']:>9.1f} "
+                f"{summary['p95']:>9.1f} {summary['max']:>9.1f}"
+            )
+        levels = ", ".join(f"{level} {count}" for level, count in sorted(stats['risk_levels'].items()))
+        self.console.print(
+            f"[dim]Risk: {levels or 'none'}; {stats['confirmed']} confirmed, "
+            f"{stats['declined']} declined; {stats['failed']} failed[/dim]"
+        )
+    
+    def show_startup_report(self):
+        """Show once how model warm-up affected the first request"""
+        timings = self.llm.startup_timings
+        if self.startup_reported or 'first_request' not in timings:
+            return
+        self.startup_reported = True
+        
+        if 'warm_up' in timings:
+            warm_up = f"model warm-up {timings['warm_up']:.2f}s (load {timings['warm_up_load']:.2f}s) in background"
+        elif 'warm_up_error' in timings:
+            warm_up = f"model warm-up failed ({timings['warm_up_error']})"
+        else:
+            warm_up = "no model warm-up"
+        
+        # Ollama reports a load time only when the request had to load the model
+        state = "cold" if timings['first_request_load'] > 0.5 else "warm"
+        self.console.print(
+            f"[dim]⏱  Startup: {warm_up}; first request {timings['first_request']:.2f}s "
+            f"({state}, model load {timings['first_request_load']:.2f}s)[/dim]"
+        )
+    
     def show_help(self):
         """Show help information"""
         help_text = """[bold]TerminalMate Commands:[/bold]
@@ -128,6 +382,12 @@ Your AI-powered terminal assistant using [bold]Qwen 2.5 Coder[/bold]
 • [yellow]help[/yellow] - Show this help message
 • [yellow]clear[/yellow] - Clear the screen
 • [yellow]pwd[/yellow] - Show current directory
+• [yellow]cache[/yellow] - Show response cache stats ([yellow]cache clear[/yellow] to empty it)
+• [yellow]workflows[/yellow] - List workflows (requests matching a trigger skip the LLM)
+• [yellow]stats[/yellow] - Time spent per phase this session, and Ollama's token counters
+• [yellow]logs stats[/yellow] - Latency per phase (p50/p95) from the event log
+• [yellow]history[/yellow] - Show recent commands ([yellow]history search <text>[/yellow] for those containing text, [yellow]history clear[/yellow] to empty it)
+• [yellow]!<request>[/yellow] - Skip the response cache for one request
 • [yellow]exit/quit[/yellow] - Exit TerminalMate
 
 [bold cyan]Safety Features:[/bold cyan]
@@ -137,21 +397,103 @@ Your AI-powered terminal assistant using [bold]Qwen 2.5 Coder[/bold]
 """
         self.console.print(Panel(help_text, border_style="cyan", title="Help"))
     
+    @metrics.timer('request')
     def process_request(self, user_input):
         """Process a natural language request"""
+        self.request_id += 1
+        self._request_started = time.perf_counter()
+        
+        # A leading '!' forces a fresh generation instead of a cached answer
+        use_cache = not user_input.startswith('!')
+        if not use_cache:
+            user_input = user_input[1:].strip()
+        
+        # A request that names a workflow runs it directly, with no LLM round trip
+        workflow = self.workflow_engine.find_workflow(user_input)
+        if workflow is not None:
+            self.run_workflow(workflow, user_input)
+            return
+        
+        # Get context
+        context = self.build_context()
+        
+        # A command generated while the request was being typed skips the wait
+        if use_cache and self.speculative_input is not None:
+            command_info, saved = self.speculative_input.take(user_input)
+            if command_info is not None:
+                self.console.print(f"[dim]⚡ Prepared while you typed ({saved:.2f}s saved)[/dim]")
+                self._review_and_execute(command_info, user_input)
+                return
+        
+        # Multi-candidate generation has to see every candidate, so it can't stream
+        if config.LLM_STREAM and config.LLM_CANDIDATES <= 1:
+            self._process_streaming(user_input, context, use_cache)
+            return
+        
         # Show processing message
         with self.console.status("[cyan]🤔 Thinking...[/cyan]"):
-            # Get context
-            context = {
-                'current_dir': self.executor.get_current_directory(),
-                'os': config.CURRENT_OS,
-                'shell': config.SHELL_TYPE,
-                'app_root': os.path.dirname(os.path.abspath(__file__)),
-                'recent_history': self.history
-            }
-            
             # Generate command using LLM
-            command_info = self.llm.generate_command(user_input, context)
+            command_info = self.llm.generate_command(user_input, context, use_cache=use_cache)
+        
+        self._review_and_execute(command_info, user_input)
+    
+    @metrics.timer('context')
+    def build_context(self):
+        """Build the context sent to the LLM along with a request"""
+        return {
+            'current_dir': self.executor.get_current_directory(),
+            'os': config.CURRENT_OS,
+            'shell': config.SHELL_TYPE,
+            'app_root': os.path.dirname(os.path.abspath(__file__)),
+            'recent_history': list(self.history)
+        }
+    
+    def _process_streaming(self, user_input, context, use_cache):
+        """Stream the LLM response and preview the command as soon as it arrives"""
+        events = self.llm.stream_command(user_input, context, use_cache=use_cache)
+        command_info = None
+        
+        with self.console.status("[cyan]🤔 Thinking...[/cyan]"):
+            for event in events:
+                if event['type'] == 'command':
+                    command_info = {'command': event['command'], 'explanation': ""}
+                    break
+                if event['type'] == 'done':
+                    # No early COMMAND: line (error or unformatted response)
+                    command_info = event['result']
+                    if command_info.get('timings') and not command_info.get('error'):
+                        self.confirmation_ui.show_timings(command_info['timings'])
+                    self._review_and_execute(command_info, user_input)
+                    return
+        
+        def explanation_stream():
+            for event in events:
+                if event['type'] == 'explanation':
+                    yield event['text']
+                elif event['type'] == 'done':
+                    result = event['result']
+                    command_info['timings'] = result.get('timings')
+                    command_info['confidence'] = result.get('confidence')
+                    command_info['cached'] = result.get('cached', False)
+                    if not command_info['explanation'] and result.get('explanation'):
+                        yield result['explanation']
+        
+        self._review_and_execute(command_info, user_input, explanation_stream())
+    
+    def _review_and_execute(self, command_info, user_input, explanation_stream=None):
+        """Validate, risk-check and preview a generated command, then run it if confirmed"""
+        # Generation ends when the command is ready to review
+        generate_ms = (time.perf_counter() - self._request_started) * 1000
+        metrics.observe('generate', generate_ms)
+        log_event(
+            'generate',
+            request_id=self.request_id,
+            request=user_input,
+            command=command_info.get('command'),
+            cached=command_info.get('cached', False),
+            error=bool(command_info.get('error')),
+            duration_ms=round(generate_ms, 1)
+        )
         
         # Check for errors
         if command_info.get('error'):
@@ -165,46 +507,258 @@ Your AI-powered terminal assistant using [bold]Qwen 2.5 Coder[/bold]
             return
         
         # Analyze risk
-        risk_info = self.risk_analyzer.analyze_command(command_info['command'])
+        with metrics.timer('risk') as timer:
+            risk_info = self.risk_analyzer.analyze_command(command_info['command'])
+        log_event(
+            'risk',
+            request_id=self.request_id,
+            risk_level=risk_info['risk_level'],
+            reason=risk_info['reason'],
+            duration_ms=round(timer.ms, 1)
+        )
         
         # Show preview and get confirmation
-        if self.confirmation_ui.show_command_preview(command_info, risk_info):
+        with metrics.timer('confirm') as timer:
+            if explanation_stream is not None:
+                confirmed = self.confirmation_ui.show_streaming_preview(command_info, risk_info, explanation_stream)
+            else:
+                confirmed = self.confirmation_ui.show_command_preview(command_info, risk_info)
+        log_event(
+            'confirm',
+            request_id=self.request_id,
+            risk_level=risk_info['risk_level'],
+            confirmed=confirmed,
+            duration_ms=round(timer.ms, 1)
+        )
+        
+        if confirmed:
             # Execute command
             self.execute_command(command_info['command'], user_input)
         else:
             self.confirmation_ui.show_cancellation()
     
+    def run_workflow(self, workflow, user_input=""):
+        """Preview a workflow, confirm it at the risk level of its riskiest step, and run it"""
+        risk_info = self.assess_workflow(workflow)
+        if not self.confirmation_ui.show_workflow_preview(workflow, risk_info):
+            self.confirmation_ui.show_cancellation()
+            return
+        
+        with metrics.timer('workflow') as timer:
+            success = self.workflow_engine.execute_workflow(workflow, self.executor, self.console)
+        log_event(
+            'workflow',
+            request_id=self.request_id,
+            request=user_input,
+            workflow=workflow.name,
+            success=success,
+            duration_ms=round(timer.ms, 1)
+        )
+        
+        self.history.append({
+            'input': user_input,
+            'command': f"workflow: {workflow.name}",
+            'output': "Completed successfully" if success else "Failed"
+        })
+        if len(self.history) > 5:
+            self.history.pop(0)
+    
+    def assess_workflow(self, workflow):
+        """
+        Combine the risk of every step of a workflow
+        
+        Native steps write files, so they count as CAUTION.
+        
+        Returns:
+            dict: Same shape as RiskAnalyzer.analyze_command results
+        """
+        order = [config.RISK_SAFE, config.RISK_CAUTION, config.RISK_CRITICAL]
+        risk_level = config.RISK_SAFE
+        reasons = []
+        warnings = []
+        native_steps = [step for step in workflow.steps if step.action]
+        if native_steps:
+            risk_level = config.RISK_CAUTION
+            reasons.append(f"{len(native_steps)} step(s) create or change files")
+        
+        for step in workflow.steps:
+            if step.action:
+                continue
+            step_risk = self.risk_analyzer.analyze_command(step.command)
+            if order.index(step_risk['risk_level']) > order.index(risk_level):
+                risk_level = step_risk['risk_level']
+            if step_risk['risk_level'] != config.RISK_SAFE:
+                reasons.append(f"{step.name}: {step_risk['reason']}")
+            warnings.extend(step_risk['warnings'])
+        
+        return {
+            'risk_level': risk_level,
+            'reason': "\n".join(reasons) or "All steps are read-only",
+            'warnings': warnings
+        }
+    
     def execute_command(self, command, user_input=""):
         """Execute a confirmed command"""
-        with self.console.status("[cyan]⚙️  Executing...[/cyan]"):
-            result = self.executor.execute(command)
+        cwd = self.executor.get_current_directory()
+        with metrics.timer('execute') as timer:
+            if config.STREAM_COMMAND_OUTPUT:
+                self.console.print("[cyan]⚙️  Executing...[/cyan]")
+                result = self.executor.execute(command, on_output=self.confirmation_ui.show_output)
+            else:
+                with self.console.status("[cyan]⚙️  Executing...[/cyan]"):
+                    result = self.executor.execute(command)
+        
+        log_event(
+            'execute',
+            request_id=self.request_id,
+            command=command,
+            exit_code=result['return_code'],
+            success=result['success'],
+            resources=result['resources'],
+            duration_ms=round(timer.ms, 1)
+        )
         
         # Update history
         self.history.append({
             'input': user_input,
             'command': command,
-            'output': result['output'] or result['error'] or "No output"
+            'output': result['output'] or result['error'] or "No output",
+            'output_file': result['output_file'],
+            'error_file': result['error_file']
         })
         
         # Keep history size manageable
         if len(self.history) > 5:
             self.history.pop(0)
+        
+        # Successful commands become examples for similar requests later
+        if self.llm.history is not None and user_input:
+            self.llm.history.add(user_input, command, cwd, result['return_code'], timer.ms / 1000)
             
-        # Show results
+        # Show results; streamed stderr was already printed, so only
+        # errors from the executor itself (timeouts, spawn failures) remain
+        error = result['error']
+        if config.STREAM_COMMAND_OUTPUT and result['return_code'] != -1:
+            error = None
         self.confirmation_ui.show_execution_result(
             result['success'],
             result['output'],
-            result['error']
+            error,
+            streamed=config.STREAM_COMMAND_OUTPUT,
+            output_file=result['output_file'],
+            error_file=result['error_file'],
+            resources=result['resources']
         )
 
 
+def run_batch(args):
+    """
+    Translate every request in a file (or stdin) and write JSON lines
+    
+    Returns:
+        int: Exit status (1 if any request failed)
+    """
+    from core.batch import BatchRunner, read_requests
+    
+    llm = LLMEngine()
+    if config.LLM_WARMUP:
+        llm.start_warm_up()
+    executor = CommandExecutor() if args.execute_safe else None
+    runner = BatchRunner(llm, RiskAnalyzer(), executor, args.jobs, args.execute_safe)
+    
+    source = sys.stdin if args.batch == '-' else open(args.batch, encoding='utf-8')
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        summary = runner.run(read_requests(source), output)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+        llm.close()
+        if executor is not None:
+            executor.close()
+    
+    rate = summary['requests'] / summary['seconds'] if summary['seconds'] else 0
+    levels = ", ".join(f"{count} {level}" for level, count in sorted(summary['risk_levels'].items()))
+    print(
+        f"batch: {summary['requests']} requests in {summary['seconds']:.1f}s ({rate:.1f}/s), "
+        f"{summary['errors']} errors, {summary['executed']} executed; {levels or 'no commands'}; "
+        f"latency p50 {summary['latency']['p50'] * 1000:.0f} ms, p95 {summary['latency']['p95'] * 1000:.0f} ms",
+        file=sys.stderr
+    )
+    return 1 if summary['errors'] else 0
+
+
+def serve(args):
+    """
+    Run the daemon that tm.py talks to
+    
+    Returns:
+        int: Exit status
+    """
+    from core.daemon import TerminalMateDaemon
+    
+    daemon = TerminalMateDaemon(socket_path=args.socket, max_workers=args.jobs)
+    try:
+        daemon.serve_forever(
+            on_ready=lambda: console.print(
+                f"[cyan]TerminalMate daemon listening on {daemon.socket_path} "
+                f"({daemon.max_workers} workers, model {daemon.llm.model_name})[/cyan]"
+            )
+        )
+    except RuntimeError as e:
+        console.print(f"[red]{e}[/red]")
+        return 1
+    console.print("[cyan]Daemon stopped[/cyan]")
+    return 0
+
+
 def main():
     """Main entry point"""
+    parser = argparse.ArgumentParser(description="TerminalMate - AI-Powered Terminal Assistant")
+    parser.add_argument("mode", nargs="?", choices=["serve"],
+                        help="'serve' keeps the model and caches loaded for tm.py clients")
+    parser.add_argument("--socket", default=None, help="Daemon socket for serve (default from config)")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help=f"Requests generated at once (default {config.BATCH_MAX_IN_FLIGHT} for --batch, "
+                             f"{config.DAEMON_MAX_WORKERS} for serve)")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Show what startup spends its time on, then exit")
+    parser.add_argument("--startup-probe", action="store_true", help=argparse.SUPPRESS)
+    batch = parser.add_argument_group("batch mode")
+    batch.add_argument("--batch", metavar="FILE",
+                       help="Translate one request per line ('-' for stdin) to JSON lines, without prompting")
+    batch.add_argument("--execute-safe", action="store_true", help="Run commands classified SAFE")
+    batch.add_argument("--output", metavar="FILE", help="Write the JSON lines here instead of stdout")
+    args = parser.parse_args()
+    
+    if args.profile_startup:
+        from utils.startup_profile import profile_startup
+        sys.exit(profile_startup(os.path.abspath(__file__)))
+    
+    if args.batch:
+        try:
+            sys.exit(run_batch(args))
+        except KeyboardInterrupt:
+            sys.exit(130)
+    
+    if args.mode == "serve":
+        sys.exit(serve(args))
+    
     try:
         app = TerminalMate()
+        if args.startup_probe:
+            # Child of --profile-startup: stop where the first prompt would appear
+            app.startup()
+            ready = (time.perf_counter() - STARTED) * 1000
+            from utils.startup_profile import PROBE_MARKER
+            print(PROBE_MARKER, file=sys.stderr, flush=True)  # Later imports ran in the background
+            print(f"{PROBE_MARKER} {ready:.1f}", flush=True)
+            app.executor.close()
+            return
         app.start()
     except Exception as e:
-        console = Console()
         console.print(f"[red]Fatal error: {str(e)}[/red]")
         sys.exit(1)
 
@@ -0,0 +1,213 @@
+"""
+Audit - Batch risk analysis of shell history files and scripts
+"""
+import argparse
+import json
+import mmap
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Add project root to path so we can import 'core' packages
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import config
+from safety.risk_analyzer import RISK_ORDER, RiskAnalyzer
+
+ZSH_HISTORY_PREFIX = re.compile(r": \d+:\d+;")  # ': 1700000000:0;ls' in zsh extended history
+
+_analyzer = None  # One per worker process
+
+
+def read_chunks(path, chunk_size):
+    """
+    Split a file into byte ranges of about chunk_size that end on a line break
+
+    Only the break after each boundary is searched for; the file is mapped,
+    not read.
+
+    Yields:
+        tuple: (start, end) byte offsets
+    """
+    size = os.path.getsize(path)
+    if size == 0:
+        return
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        start = 0
+        while start < size:
+            end = size
+            if start + chunk_size < size:
+                newline = data.find(b'\n', start + chunk_size)
+                if newline != -1:
+                    end = newline + 1
+            yield start, end
+            start = end
+
+
+def split_commands(text):
+    """
+    Split history or script text into commands
+
+    Blank lines, comments and bash history timestamps ('#1700000000') are
+    skipped; zsh extended history prefixes are removed.
+
+    Returns:
+        tuple: (line count, [(line index, command), ...])
+    """
+    lines = text.split('\n')
+    if lines[-1] == '':
+        lines.pop()
+    commands = []
+    for index, line in enumerate(lines):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        if line.startswith(': '):
+            line = ZSH_HISTORY_PREFIX.sub('', line, count=1)
+        commands.append((index, line))
+    return len(lines), commands
+
+
+def audit_chunk(task):
+    """
+    Analyze one byte range of a file (runs in a worker process)
+
+    Args:
+        task (tuple): (path, start, end, min_level)
+
+    Returns:
+        dict: {'path', 'lines', 'commands', 'counts' (per risk level),
+               'flagged' ([(line index, command, risk level, reason), ...])}
+    """
+    path, start, end, min_level = task
+    global _analyzer
+    if _analyzer is None:
+        _analyzer = RiskAnalyzer(cache_size=config.AUDIT_CACHE_SIZE)
+
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        text = data[start:end].decode('utf-8', errors='replace')
+    line_count, commands = split_commands(text)
+
+    threshold = RISK_ORDER.index(min_level)
+    counts = dict.fromkeys(RISK_ORDER, 0)
+    flagged = []
+    results = _analyzer.analyze_many(command for index, command in commands)
+    for (index, command), result in zip(commands, results):
+        counts[result['risk_level']] += 1
+        if RISK_ORDER.index(result['risk_level']) >= threshold:
+            flagged.append((index, command, result['risk_level'], result['reason']))
+    return {
+        'path': path,
+        'lines': line_count,
+        'commands': len(commands),
+        'counts': counts,
+        'flagged': flagged
+    }
+
+
+def audit_files(paths, jobs=None, chunk_size=config.AUDIT_CHUNK_SIZE, min_level=config.RISK_CRITICAL,
+                policy_file=None):
+    """
+    Analyze every command in a set of files across a process pool
+
+    Each worker maps the file itself, so only byte offsets and flagged
+    lines cross process boundaries.
+
+    Args:
+        paths (list): History dumps or scripts
+        jobs (int): Worker processes (default: one per CPU; 1 runs in-process)
+        chunk_size (int): Bytes per task
+        min_level (str): Lowest risk level reported in 'flagged'
+        policy_file (str): Risk policy file for the workers' analyzers
+
+    Yields:
+        dict: audit_chunk results in file order, with 1-based line numbers
+              in 'flagged' counted from the start of the file
+    """
+    tasks = ((path, start, end, min_level) for path in paths for start, end in read_chunks(path, chunk_size))
+
+    if jobs == 1:
+        _init_worker(policy_file)
+        yield from _number_lines(map(audit_chunk, tasks))
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(policy_file,)) as pool:
+        yield from _number_lines(pool.map(audit_chunk, tasks))
+
+
+def _init_worker(policy_file):
+    global _analyzer
+    _analyzer = RiskAnalyzer(policy_file=policy_file, cache_size=config.AUDIT_CACHE_SIZE)
+
+
+def _number_lines(results):
+    """Turn chunk-relative line indexes into line numbers within each file"""
+    path, base = None, 0
+    for result in results:
+        if result['path'] != path:
+            path, base = result['path'], 0
+        result['flagged'] = [(base + index + 1, command, level, reason)
+                             for index, command, level, reason in result['flagged']]
+        base += result['lines']
+        yield result
+
+
+def main(argv=None):
+    """
+    Audit command line: python -m safety.risk_analyzer audit FILE...
+
+    Writes one JSON object per flagged line, then a summary object with
+    the counts, to --output (default stdout); throughput goes to stderr.
+
+    Returns:
+        int: Exit status (0 if every file was read)
+    """
+    parser = argparse.ArgumentParser(prog="python -m safety.risk_analyzer",
+                                     description="TerminalMate risk analysis")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    audit = subcommands.add_parser("audit", help="Analyze every command in history dumps or scripts")
+    audit.add_argument("files", nargs="+", metavar="FILE")
+    audit.add_argument("--jobs", type=int, default=None, help="Worker processes (default: one per CPU)")
+    audit.add_argument("--chunk-size", type=int, default=config.AUDIT_CHUNK_SIZE, help="Bytes per task")
+    audit.add_argument("--min-level", choices=RISK_ORDER[1:], default=config.RISK_CRITICAL,
+                       help="Lowest risk level to report")
+    audit.add_argument("--policy", default=None, help="Risk policy file (default from config)")
+    audit.add_argument("--output", default=None, help="JSONL output file (default stdout)")
+    args = parser.parse_args(argv)
+
+    status = 0
+    paths = []
+    for path in args.files:
+        if os.path.isfile(path):
+            paths.append(path)
+        else:
+            print(f"audit: {path}: not a file", file=sys.stderr)
+            status = 1
+
+    totals = {'files': len(paths), 'lines': 0, 'commands': 0, 'counts': dict.fromkeys(RISK_ORDER, 0)}
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    start = time.perf_counter()
+    try:
+        for result in audit_files(paths, args.jobs, args.chunk_size, args.min_level, args.policy):
+            totals['lines'] += result['lines']
+            totals['commands'] += result['commands']
+            for level, count in result['counts'].items():
+                totals['counts'][level] += count
+            for line, command, level, reason in result['flagged']:
+                output.write(json.dumps({'file': result['path'], 'line': line, 'command': command,
+                                         'risk_level': level, 'reason': reason}) + "\n")
+        elapsed = time.perf_counter() - start
+        totals['seconds'] = round(elapsed, 3)
+        output.write(json.dumps({'summary': totals}) + "\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    rate = totals['lines'] / elapsed if elapsed else 0
+    print(f"audit: {totals['lines']} lines ({totals['commands']} commands) in {elapsed:.2f}s, "
+          f"{rate:,.0f} lines/sec", file=sys.stderr)
+    return status
@@ -1,15 +1,17 @@
 """
 Confirmation UI - Handles user confirmation for command execution
 """
-from rich.console import Console
+from rich.live import Live
+from rich.markup import escape
 from rich.panel import Panel
 from rich.prompt import Prompt
+from ui.console import console
 import config
 
 
 class ConfirmationUI:
     def __init__(self):
-        self.console = Console()
+        self.console = console
     
     def show_command_preview(self, command_info, risk_info):
         """
@@ -22,6 +24,45 @@ class ConfirmationUI:
         Returns:
             bool: True if user confirms, False otherwise
         """
+        self.console.print(self._build_preview(command_info, risk_info))
+        return self._get_confirmation(risk_info['risk_level'])
+    
+    def show_streaming_preview(self, command_info, risk_info, explanation_stream):
+        """
+        Display the command preview while its explanation is still streaming
+        
+        Args:
+            command_info (dict): Command from LLM; 'explanation' is filled in
+                                 as text arrives
+            risk_info (dict): Risk analysis results
+            explanation_stream (iterable): Pieces of explanation text
+            
+        Returns:
+            bool: True if user confirms, False otherwise
+        """
+        command_info['explanation'] = command_info.get('explanation') or ""
+        
+        with Live(self._build_preview(command_info, risk_info, streaming=True),
+                  console=self.console, refresh_per_second=12) as live:
+            for text in explanation_stream:
+                command_info['explanation'] += text
+                live.update(self._build_preview(command_info, risk_info, streaming=True))
+            live.update(self._build_preview(command_info, risk_info))
+        
+        if command_info.get('timings'):
+            self.show_timings(command_info['timings'])
+        
+        return self._get_confirmation(risk_info['risk_level'])
+    
+    def show_timings(self, timings):
+        """Show how long the LLM took to produce an actionable command"""
+        self.console.print(
+            f"[dim]⏱  Command ready in {timings['first_command']:.2f}s "
+            f"(full response {timings['total']:.2f}s)[/dim]"
+        )
+    
+    def _build_preview(self, command_info, risk_info, streaming=False):
+        """Build the command preview panel"""
         risk_level = risk_info['risk_level']
         
         # Color based on risk
@@ -40,6 +81,10 @@ class ConfirmationUI:
         }
         emoji = emoji_map.get(risk_level, '❓')
         
+        explanation = command_info['explanation']
+        if streaming:
+            explanation += "[dim]▌[/dim]"
+        
         # Build display text
         display_text = f"""[bold]{emoji} Risk Level: {risk_level}[/bold]
 
@@ -47,22 +92,77 @@ class ConfirmationUI:
 [{color}]{command_info['command']}[/{color}]
 
 [bold cyan]What it does:[/bold cyan]
-{command_info['explanation']}
+{explanation}
 
 [bold cyan]Risk Assessment:[/bold cyan]
 {risk_info['reason']}
 """
         
+        # Chained and piped commands show how each part was judged
+        if len(risk_info.get('segments', [])) > 1:
+            display_text += "\n[bold cyan]Per command:[/bold cyan]\n"
+            for segment in risk_info['segments']:
+                segment_color = color_map.get(segment['risk_level'], 'white')
+                indent = "  " * (segment['depth'] + 1)
+                display_text += (
+                    f"{indent}[{segment_color}]{segment['risk_level']:<8}[/{segment_color}] "
+                    f"{escape(segment['command'])} [dim]- {escape(segment['reason'])}[/dim]\n"
+                )
+        
+        # Multi-candidate generation reports how many candidates agreed
+        if command_info.get('candidates'):
+            votes = command_info['candidates'][0]['votes']
+            display_text += (
+                f"\n[bold cyan]Confidence:[/bold cyan] {command_info['confidence']:.0%} "
+                f"({votes}/{command_info['total_candidates']} candidates agree)\n"
+            )
+        
         # Add warnings if any
         if risk_info['warnings']:
             display_text += f"\n[bold red]⚠️  Warnings:[/bold red]\n"
             for warning in risk_info['warnings']:
                 display_text += f"  • {warning}\n"
         
-        # Show panel
-        self.console.print(Panel(display_text, border_style=color, title="Command Preview"))
+        return Panel(display_text, border_style=color, title="Command Preview")
+    
+    def show_workflow_preview(self, workflow, risk_info):
+        """
+        Display a workflow's steps with their combined risk assessment
+        
+        Args:
+            workflow (Workflow): Workflow about to run
+            risk_info (dict): Combined risk of its steps
+            
+        Returns:
+            bool: True if user confirms, False otherwise
+        """
+        color = {
+            config.RISK_SAFE: 'green',
+            config.RISK_CAUTION: 'yellow',
+            config.RISK_CRITICAL: 'red'
+        }.get(risk_info['risk_level'], 'white')
+        
+        display_text = f"[bold]{workflow.description or workflow.name}[/bold]\n\n[bold cyan]Steps:[/bold cyan]\n"
+        for number, step in enumerate(workflow.steps, 1):
+            if step.action:
+                args = ", ".join(f"{key}={value!r}" for key, value in step.args.items())
+                what = f"{step.action}({args})"
+            else:
+                what = step.command
+            display_text += f"  {number}. {step.description or step.name} [dim]{escape(what)}[/dim]\n"
+        
+        display_text += f"\n[bold cyan]Risk Assessment:[/bold cyan] [{color}]{risk_info['risk_level']}[/{color}]\n"
+        display_text += f"{risk_info['reason']}\n"
+        if risk_info['warnings']:
+            display_text += f"\n[bold red]⚠️  Warnings:[/bold red]\n"
+            for warning in risk_info['warnings']:
+                display_text += f"  • {warning}\n"
         
-        # Get confirmation based on risk level
+        self.console.print(Panel(display_text, border_style=color, title=f"Workflow: {workflow.name}"))
+        return self._get_confirmation(risk_info['risk_level'])
+    
+    def _get_confirmation(self, risk_level):
+        """Get confirmation based on risk level"""
         if risk_level == config.RISK_CRITICAL:
             return self._get_critical_confirmation()
         elif risk_level == config.RISK_CAUTION:
@@ -112,18 +212,62 @@ class ConfirmationUI:
         
         return response2.lower() in ["y", "yes", "confirm"]
     
-    def show_execution_result(self, success, output, error=None):
-        """Display command execution results"""
+    def show_output(self, stream, text):
+        """Print a piece of command output as it arrives"""
+        if stream == 'stderr':
+            self.console.out(text, style='red', end='', highlight=False)
+        else:
+            self.console.out(text, end='', highlight=False)
+    
+    def show_execution_result(self, success, output, error=None, streamed=False, output_file=None, error_file=None,
+                              resources=None):
+        """
+        Display command execution results
+        
+        Args:
+            success (bool): Whether the command succeeded
+            output (str): Command output (head and tail if it was long)
+            error (str): Error message (pass only errors not already shown
+                         live when streamed)
+            streamed (bool): Output was already shown live by show_output
+            output_file (str): File holding the full output, if it was truncated
+            error_file (str): File holding the full error output, if it was truncated
+            resources (dict): What the command used (CommandExecutor result's 'resources')
+        """
         if success:
             self.console.print("\n[green]✓ Command executed successfully[/green]")
-            if output:
+            if output and not streamed:
                 self.console.print("\n[bold]Output:[/bold]")
                 self.console.print(output)
         else:
             self.console.print("\n[red]✗ Command failed[/red]")
             if error:
                 self.console.print(f"[red]Error: {error}[/red]")
+        
+        if output_file:
+            self.console.print(f"[dim]Full output saved to {output_file}[/dim]")
+        if error_file:
+            self.console.print(f"[dim]Full error output saved to {error_file}[/dim]")
+        
+        # Commands that finish before the first sample have nothing worth showing
+        if resources and resources['peak_rss']:
+            usage = f"{resources['cpu_seconds']:.2f}s CPU, peak {_format_bytes(resources['peak_rss'])} memory"
+            if resources['read_bytes'] is not None:
+                usage += (f", read {_format_bytes(resources['read_bytes'])}, "
+                          f"wrote {_format_bytes(resources['write_bytes'])}")
+            processes = resources['processes']
+            usage += f" ({processes} process{'es' if processes != 1 else ''})"
+            self.console.print(f"[dim]📊 {usage}[/dim]")
     
     def show_cancellation(self):
         """Show cancellation message"""
-        self.console.print("\n[yellow]Command cancelled by user[/yellow]")
\ No newline at end of file
+        self.console.print("\n[yellow]Command cancelled by user[/yellow]")
+
+
+def _format_bytes(size):
+    """Format a byte count as B, KB, MB or GB"""
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
@@ -1,18 +1,160 @@
 """
 Risk Analyzer - Classifies commands as SAFE, CAUTION, or CRITICAL
 """
+import os
+import re
+import tomllib
+from functools import lru_cache
 import config
+from safety.shell_parser import parse_command
+
+
+RISK_ORDER = [config.RISK_SAFE, config.RISK_CAUTION, config.RISK_CRITICAL]
+SAFE_COMMANDS = ['ls', 'dir', 'cat', 'type', 'echo', 'pwd', 'cd',
+                 'whoami', 'date', 'time', 'help', 'man', 'find', 'grep']
+WHITESPACE = re.compile(r"\s+")
+
+# Programs that run their standard input, or a file argument, as code
+INTERPRETERS = {'sh', 'bash', 'zsh', 'dash', 'ksh', 'fish', 'csh', 'tcsh', 'python', 'python3',
+                'perl', 'ruby', 'node', 'php', 'pwsh', 'powershell', 'iex', 'invoke-expression'}
+SOURCING = INTERPRETERS | {'source', '.', 'eval'}
+# Options that make an interpreter run an argument (inline code, a module or
+# a file) instead of its standard input; shells use -c, possibly in a cluster ('-xc')
+CODE_OPTIONS = {
+    'python': {'-c', '-m'}, 'python3': {'-c', '-m'}, 'perl': {'-e', '-E'}, 'ruby': {'-e'},
+    'node': {'-e', '--eval', '-p', '--print'}, 'php': {'-r', '-f'},
+    'pwsh': {'-c', '-command', '-f', '-file', '-encodedcommand'},
+    'powershell': {'-c', '-command', '-f', '-file', '-encodedcommand'},
+}
+OPTIONS_WITH_VALUE = {'-o', '+o', '-O', '+O', '-W', '-X'}  # 'bash -o pipefail', 'python -W ignore'
+# find actions that delete, write files or run other commands; 'find' alone only reads
+FIND_ACTIONS = {'-delete', '-exec', '-execdir', '-ok', '-okdir', '-fprint', '-fprint0', '-fprintf', '-fls'}
+OUTPUT_REDIRECTIONS = {'>', '>>', '>|', '&>', '&>>', '<>'}
+HARMLESS_TARGETS = {'/dev/null', '/dev/stdout', '/dev/stderr', '/dev/tty', 'nul'}
+DISK_DEVICE = re.compile(r"/dev/(sd|hd|vd|xvd|nvme|mmcblk|disk|rdisk)")
+
+
+def is_word_char(char):
+    """Characters that continue a command word ('-' so 'format' doesn't match '--format')"""
+    return char.isalnum() or char in "_-"
+
+
+def load_policy(path):
+    """
+    Load extra rules from a TOML policy file
+    
+    The file may contain 'critical' and 'caution' keyword lists and a
+    'safe_commands' list.
+    
+    Returns:
+        dict: The parsed policy
+        
+    Raises:
+        ValueError: If the file is not valid TOML
+    """
+    with open(path, 'rb') as f:
+        try:
+            return tomllib.load(f)
+        except tomllib.TOMLDecodeError as e:
+            raise ValueError(f"Invalid risk policy {path}: {e}") from e
 
 
 class RiskAnalyzer:
-    def __init__(self):
-        self.critical_keywords = config.CRITICAL_KEYWORDS
-        self.caution_keywords = config.CAUTION_KEYWORDS
+    def __init__(self, policy_file=None, cache_size=config.RISK_CACHE_SIZE):
+        """
+        Args:
+            policy_file (str): TOML file with extra rules
+                               (defaults to config.RISK_POLICY_FILE if it exists)
+            cache_size (int): Analyses of distinct commands kept for repeats
+        """
+        self.critical_keywords = list(config.CRITICAL_KEYWORDS)
+        self.caution_keywords = list(config.CAUTION_KEYWORDS)
+        self.safe_commands = list(SAFE_COMMANDS)
+        
+        policy_file = policy_file or config.RISK_POLICY_FILE
+        if policy_file and os.path.exists(policy_file):
+            policy = load_policy(policy_file)
+            self.critical_keywords += policy.get('critical', [])
+            self.caution_keywords += policy.get('caution', [])
+            self.safe_commands += policy.get('safe_commands', [])
         
+        self.matcher = self._compile()
+        self._safe = {command.lower() for command in self.safe_commands}
+        self._analyze = lru_cache(maxsize=cache_size)(self._analyze_uncached)
+    
+    def _compile(self):
+        """
+        Build one regex over every keyword, keeping each keyword's highest level
+        
+        The keywords are merged into a trie so the regex engine never retries
+        a shared prefix, and the whole scan runs in C however many rules there
+        are. A lookahead at every position finds overlapping hits too.
+        """
+        rules = {}
+        for level, keywords in ((config.RISK_CAUTION, self.caution_keywords),
+                                (config.RISK_CRITICAL, self.critical_keywords)):
+            for keyword in keywords:
+                pattern = WHITESPACE.sub(" ", keyword.lower()).strip()
+                if pattern:
+                    rules[pattern] = {'keyword': keyword, 'level': level}
+        self.rules = rules
+        
+        trie = {}
+        for pattern in rules:
+            node = trie
+            for char in pattern:
+                node = node.setdefault(char, {})
+            node[''] = _right_boundary(pattern)
+        return re.compile(f"(?=({_trie_regex(trie)}))") if trie else None
+    
+    def find_matches(self, command):
+        """
+        Find every keyword in a command, in one pass
+        
+        A keyword only matches as whole words: 'mv' doesn't match 'mvn' and
+        'format' doesn't match '--format'. A keyword ending in a flag may be
+        followed by more flag letters, so 'rm -r' matches 'rm -rv'.
+        
+        Returns:
+            list: {'keyword', 'level', 'start', 'end'} dicts, positions
+                  indexing the original command, longest hit first where
+                  hits overlap
+        """
+        if self.matcher is None:
+            return []
+        text, offsets = _normalize(command)
+        matches = []
+        for found in self.matcher.finditer(text):
+            start, end = found.span(1)
+            if start > 0 and is_word_char(text[start]) and is_word_char(text[start - 1]):
+                continue
+            rule = self.rules[found.group(1)]
+            matches.append({
+                'keyword': rule['keyword'],
+                'level': rule['level'],
+                'start': offsets[start],
+                'end': offsets[end - 1] + 1
+            })
+        
+        # Drop hits inside a longer hit of at least the same level ('rm -r' inside 'rm -rf')
+        kept = []
+        for match in matches:
+            if any(other['start'] <= match['start'] and match['end'] <= other['end']
+                   and RISK_ORDER.index(other['level']) >= RISK_ORDER.index(match['level'])
+                   for other in kept):
+                continue
+            kept.append(match)
+        return kept
+    
     def analyze_command(self, command):
         """
         Analyze a command and return its risk level
         
+        The command is split into its simple commands ('ls && curl x | sh'
+        is 'ls', 'curl x' and 'sh', the last fed by a pipe), including those
+        inside substitutions. Each is classified on its own and the riskiest
+        decides. Results are cached per command string.
+        
         Args:
             command (str): The command to analyze
             
@@ -20,51 +162,163 @@ class RiskAnalyzer:
             dict: {
                 'risk_level': str (SAFE/CAUTION/CRITICAL),
                 'reason': str,
-                'warnings': list
+                'warnings': list,
+                'matches': list (every keyword hit with its position),
+                'segments': list ({'command', 'operator', 'depth',
+                                   'risk_level', 'reason'} per simple command)
             }
         """
-        command_lower = command.lower()
+        return dict(self._analyze(command))
+    
+    def _analyze_uncached(self, command):
+        matches = self.find_matches(command)
         warnings = []
+        for match in matches:
+            if match['level'] == config.RISK_CRITICAL:
+                warnings.append(f"Contains dangerous operation: '{match['keyword']}' at {match['start']}")
+            else:
+                warnings.append(f"Modifies system state: '{match['keyword']}' at {match['start']}")
         
-        # Check for critical operations
-        for keyword in self.critical_keywords:
-            if keyword in command_lower:
-                warnings.append(f"Contains dangerous operation: '{keyword}'")
-                return {
-                    'risk_level': config.RISK_CRITICAL,
-                    'reason': f"Command contains critical operation: {keyword}",
-                    'warnings': warnings
-                }
-        
-        # Check for caution-level operations
-        for keyword in self.caution_keywords:
-            if keyword in command_lower:
-                warnings.append(f"Modifies system state: '{keyword}'")
-                return {
-                    'risk_level': config.RISK_CAUTION,
-                    'reason': f"Command will modify files or system: {keyword}",
-                    'warnings': warnings
-                }
-        
-        # Safe operations (read-only)
-        safe_commands = ['ls', 'dir', 'cat', 'type', 'echo', 'pwd', 'cd', 
-                        'whoami', 'date', 'time', 'help', 'man', 'find', 'grep']
-        
-        first_word = command_lower.split()[0] if command_lower.split() else ""
-        if any(first_word == safe_cmd for safe_cmd in safe_commands):
-            return {
-                'risk_level': config.RISK_SAFE,
-                'reason': "Read-only operation",
-                'warnings': []
-            }
+        try:
+            commands = parse_command(command)
+        except ValueError as e:
+            return self._analyze_unparsed(command, matches, warnings + [f"Could not parse command: {e}"])
+        
+        # Each keyword belongs to the innermost command containing it; text
+        # outside every command (a here-document body) to the one before it
+        hits = {id(cmd): [] for cmd in commands}
+        for match in matches:
+            containing = [cmd for cmd in commands if cmd.start <= match['start'] < cmd.end]
+            if containing:
+                owner = max(containing, key=lambda cmd: cmd.depth)
+            else:
+                owner = ([cmd for cmd in commands if cmd.start <= match['start']] or commands)[-1]
+            hits[id(owner)].append(match)
+        
+        segments = []
+        for cmd in commands:
+            segment = self._analyze_segment(command, cmd, hits[id(cmd)], warnings)
+            if segment:
+                segments.append(segment)
+        if not segments:
+            return self._analyze_unparsed(command, matches, warnings)
+        
+        top = max(segments, key=lambda segment: RISK_ORDER.index(segment['risk_level']))
+        reason = top['reason']
+        if len(segments) > 1 and top['risk_level'] != config.RISK_SAFE:
+            reason += f" (in '{top['command']}')"
+        return {
+            'risk_level': top['risk_level'],
+            'reason': reason,
+            'warnings': warnings,
+            'matches': matches,
+            'segments': segments
+        }
+    
+    def _analyze_segment(self, command, cmd, matches, warnings):
+        """
+        Classify one simple command
+        
+        Returns:
+            dict: The segment's entry for analyze_command, or None if it
+                  runs nothing ('done', 'for f in *')
+        """
+        findings = []
+        if matches:
+            level = max((m['level'] for m in matches), key=RISK_ORDER.index)
+            top = _unique(m['keyword'] for m in matches if m['level'] == level)
+            if level == config.RISK_CRITICAL:
+                findings.append((level, f"Command contains critical operation: {', '.join(top)}"))
+            else:
+                findings.append((level, f"Command will modify files or system: {', '.join(top)}"))
+        
+        name = cmd.name
+        arguments = cmd.command_words[1:]
+        if name in INTERPRETERS and cmd.piped and _runs_stdin(name, arguments):
+            findings.append((config.RISK_CRITICAL, f"Runs piped input as code: {name}"))
+            warnings.append(f"Output is piped into '{name}', which runs it as code")
+        if name in SOURCING and any(word.startswith(('<(', '$(', '`')) for word in arguments):
+            findings.append((config.RISK_CRITICAL, f"Runs the output of another command as code: {name}"))
+            warnings.append(f"'{name}' runs code produced by a substitution")
+        
+        if name == 'find':
+            actions = _unique(word for word in arguments if word in FIND_ACTIONS)
+            if actions:
+                findings.append((config.RISK_CAUTION, f"find acts on what it finds: {', '.join(actions)}"))
+        
+        if cmd.privilege_wrapper:
+            # Reading is not harmless when it can read anything: 'sudo cat /etc/shadow'
+            findings.append((config.RISK_CAUTION, f"Runs with elevated privileges: {cmd.privilege_wrapper}"))
+            warnings.append(f"Runs as another user (usually root) via {cmd.privilege_wrapper}")
+        
+        for operator, target in cmd.redirections:
+            operator = operator.lstrip('0123456789')
+            if operator == '>&' and (target.isdigit() or target == '-'):
+                continue  # Duplicates a descriptor ('2>&1')
+            if operator not in OUTPUT_REDIRECTIONS | {'>&'} or target.lower() in HARMLESS_TARGETS:
+                continue
+            if DISK_DEVICE.match(target):
+                findings.append((config.RISK_CRITICAL, f"Writes directly to disk device {target}"))
+            else:
+                findings.append((config.RISK_CAUTION, f"Writes to file: {target}"))
         
-        # Default to CAUTION for unknown commands
+        if not findings:
+            if not cmd.command_words:
+                return None
+            if name in self._safe:
+                findings.append((config.RISK_SAFE, "Read-only operation"))
+            else:
+                findings.append((config.RISK_CAUTION, "Unknown command - proceed with caution"))
+                warnings.append(f"'{name}' not recognized as safe")
+        
+        level = max((finding[0] for finding in findings), key=RISK_ORDER.index)
         return {
-            'risk_level': config.RISK_CAUTION,
-            'reason': "Unknown command - proceed with caution",
-            'warnings': ['Command not recognized as safe']
+            'command': command[cmd.start:cmd.end],
+            'operator': cmd.operator,
+            'depth': cmd.depth,
+            'risk_level': level,
+            'reason': "; ".join(_unique(reason for found, reason in findings if found == level))
         }
     
+    def _analyze_unparsed(self, command, matches, warnings):
+        """Whole-command keyword and first-word check, for commands the parser can't split"""
+        if matches:
+            risk_level = max((m['level'] for m in matches), key=RISK_ORDER.index)
+            top = _unique(m['keyword'] for m in matches if m['level'] == risk_level)
+            if risk_level == config.RISK_CRITICAL:
+                reason = f"Command contains critical operation: {', '.join(top)}"
+            else:
+                reason = f"Command will modify files or system: {', '.join(top)}"
+        else:
+            words = command.lower().split()
+            if words and words[0] in self._safe and not warnings:
+                risk_level, reason = config.RISK_SAFE, "Read-only operation"
+            else:
+                # Default to CAUTION for unknown commands
+                risk_level, reason = config.RISK_CAUTION, "Unknown command - proceed with caution"
+                warnings = warnings or ['Command not recognized as safe']
+        return {
+            'risk_level': risk_level,
+            'reason': reason,
+            'warnings': warnings,
+            'matches': matches,
+            'segments': []
+        }
+    
+    def analyze_many(self, commands):
+        """
+        Analyze a stream of commands
+        
+        Args:
+            commands (iterable): Command strings; consumed lazily
+            
+        Yields:
+            dict: analyze_command's result for each command, in order
+        """
+        analyze = self._analyze
+        for command in commands:
+            yield dict(analyze(command))
+    
     def get_risk_color(self, risk_level):
         """Get color code for risk level"""
         colors = {
@@ -81,4 +335,95 @@ class RiskAnalyzer:
             config.RISK_CAUTION: '⚠️',
             config.RISK_CRITICAL: '🚨'
         }
-        return emojis.get(risk_level, '❓')
\ No newline at end of file
+        return emojis.get(risk_level, '❓')
+
+
+def _runs_stdin(name, arguments):
+    """
+    Whether an interpreter run with these arguments executes its standard input
+    
+    It does unless it is given code, a module or a script file to run
+    instead; '-s' and '-' ask for stdin explicitly, whatever follows them
+    ('sh -s -- arg').
+    """
+    code_options = CODE_OPTIONS.get(name, {'-c'})
+    shell = name not in CODE_OPTIONS
+    skip = False
+    for index, word in enumerate(arguments):
+        if skip:
+            skip = False
+            continue
+        option = word.lower() if name in ('pwsh', 'powershell') else word
+        if option in ('-', '-s'):
+            return True
+        if option == '--':
+            return index + 1 == len(arguments)  # Anything after '--' is the script
+        if option in OPTIONS_WITH_VALUE:
+            skip = True
+            continue
+        if option in code_options:
+            return False
+        if shell and option.startswith('-') and not option.startswith('--') and 'c' in option[1:]:
+            return False
+        if not option.startswith(('-', '+')):
+            return False  # A script file
+    return True
+
+
+def _right_boundary(pattern):
+    """Lookahead that stops a keyword matching the start of a longer word"""
+    if not is_word_char(pattern[-1]):
+        return ""
+    if pattern.rsplit(" ", 1)[-1].startswith("-"):
+        return "(?![_-])"  # More flag letters may follow
+    return "(?![\\w-])"
+
+
+def _trie_regex(node):
+    """Regex for a keyword trie; longer keywords are tried before their prefixes"""
+    branches = [re.escape(char) + _trie_regex(child) for char, child in node.items() if char]
+    if '' in node:
+        branches.append(node[''])
+    if len(branches) == 1:
+        return branches[0]
+    return "(?:" + "|".join(branches) + ")"
+
+
+def _normalize(command):
+    """
+    Lowercase a command and collapse whitespace runs to single spaces
+    
+    Returns:
+        tuple: (normalized text, offsets) where offsets[i] is the index in
+               command of normalized character i
+    """
+    if command.isascii() and "  " not in command and not any(c in command for c in "\t\n\r\v\f"):
+        return command.lower(), range(len(command))  # Nothing to collapse; positions line up
+    
+    chars = []
+    offsets = []
+    previous_space = False
+    for index, char in enumerate(command):
+        if char.isspace():
+            if previous_space:
+                continue
+            previous_space = True
+            char = " "
+        else:
+            previous_space = False
+        lowered = char.lower()
+        chars.append(lowered)
+        offsets.extend([index] * len(lowered))
+    return "".join(chars), offsets
+
+
+def _unique(items):
+    """Items in first-seen order without duplicates"""
+    return list(dict.fromkeys(items))
+
+
+if __name__ == "__main__":
+    import sys
+    from safety.audit import main
+    
+    sys.exit(main())
@@ -0,0 +1,384 @@
+"""
+Shell Parser - Splits commands into simple commands, redirections and substitutions
+"""
+import os
+import re
+from functools import lru_cache
+import config
+
+
+# Longest first so '&&' wins over '&' and '>>' over '>'
+OPERATORS = ['&>>', ';;&', '<<<', '&&', '||', '|&', ';;', ';&', '>>', '<<', '<>', '>&', '<&', '&>', '>|',
+             '|', '&', ';', '(', ')', '<', '>']
+OPERATOR_CHARS = set("|&;()<>")
+OPERATOR = re.compile("|".join(map(re.escape, OPERATORS)))
+PLAIN = re.compile(r"[^\s|&;()<>\\'\"`$#]+")  # A run of characters that are only themselves
+SEPARATORS = {'&&', '||', '|', '|&', '&', ';', ';;', ';&', ';;&'}
+REDIRECTIONS = {'<', '>', '>>', '<<', '<<<', '<>', '>&', '<&', '&>', '&>>', '>|'}
+PIPES = {'|', '|&'}
+
+# Words that come before the command they run
+RESERVED_WORDS = {'if', 'then', 'else', 'elif', 'fi', 'do', 'done', 'while', 'until', '!', '{', '}'}
+HEADER_WORDS = {'for', 'case', 'select', 'function', 'esac'}  # Start segments that run nothing themselves
+WRAPPERS = {'sudo', 'doas', 'env', 'nohup', 'nice', 'ionice', 'time', 'command', 'builtin', 'exec',
+            'xargs', 'timeout', 'stdbuf', 'watch', 'strace'}
+PRIVILEGE_WRAPPERS = {'sudo', 'doas', 'pkexec'}  # Run the command as another user, usually root
+ASSIGNMENT = re.compile(r"[A-Za-z_][A-Za-z0-9_]*\+?=")
+
+
+class SimpleCommand:
+    """
+    One command of a list or pipeline, e.g. 'curl x' in 'ls && curl x | sh'
+
+    Attributes:
+        words (tuple): Words with quotes removed; substitutions are kept as written
+        operator (str): Operator joining it to the previous command ('' for the first)
+        redirections (tuple): (operator, target) pairs, the operator keeping any fd ('2>')
+        substitutions (tuple): Source of each $(...), `...` and <(...) in the words
+        start, end (int): Position of the command's source in the full command line
+        depth (int): 0 at top level, 1 inside a substitution, and so on
+        command_words (tuple): words without leading keywords, assignments and
+                               wrappers like sudo, so command_words[0] is what runs
+        privilege_wrapper (str): 'sudo', 'doas' or 'pkexec' if one of the stripped
+                                 wrappers runs the command as another user, else ''
+    """
+
+    def __init__(self, words, operator, redirections, substitutions, start, end, depth):
+        self.words = tuple(words)
+        self.operator = operator
+        self.redirections = tuple(redirections)
+        self.substitutions = tuple(substitutions)
+        self.start = start
+        self.end = end
+        self.depth = depth
+        self.command_words = _strip_prefixes(self.words)
+        prefix = self.words[:len(self.words) - len(self.command_words)]
+        self.privilege_wrapper = next(
+            (name for name in map(os.path.basename, prefix) if name in PRIVILEGE_WRAPPERS), ""
+        )
+
+    @property
+    def name(self):
+        """Base name of the program that runs, lowercased ('' if none)"""
+        if not self.command_words:
+            return ""
+        return os.path.basename(self.command_words[0]).lower()
+
+    @property
+    def piped(self):
+        """Whether this command reads the previous command's output"""
+        return self.operator in PIPES
+
+    def __repr__(self):
+        return f"SimpleCommand({self.words!r}, operator={self.operator!r}, depth={self.depth})"
+
+
+@lru_cache(maxsize=config.RISK_CACHE_SIZE)
+def parse_command(command, posix=not config.IS_WINDOWS):
+    """
+    Split a command line into its simple commands
+
+    Commands inside substitutions follow the command that contains them,
+    with a greater depth. Results are cached per command string.
+
+    Args:
+        command (str): The command line
+        posix (bool): Apply POSIX quoting; off on Windows, where backslashes
+                      are path separators and single quotes are literal
+
+    Returns:
+        tuple: SimpleCommand objects in source order
+
+    Raises:
+        ValueError: If quotes, substitutions or redirections are unfinished
+    """
+    return tuple(_parse(command, 0, 0, posix))
+
+
+def _parse(command, base, depth, posix):
+    """Group tokens into SimpleCommands; base offsets positions for substitutions"""
+    commands = []
+    current = None
+    nested = []
+    operator = ""
+    redirect = None
+
+    for token in _tokenize(command, posix):
+        kind, value, start, end = token[:4]
+        if kind == 'word':
+            if current is None:
+                current = {'words': [], 'redirections': [], 'substitutions': [], 'start': start}
+            if redirect:
+                current['redirections'].append((redirect, value))
+                redirect = None
+            else:
+                current['words'].append(value)
+            current['end'] = end
+            for inner, offset in token[4]:
+                current['substitutions'].append(inner)
+                nested += _parse(inner, base + offset, depth + 1, posix)
+        elif kind == 'redirect':
+            if redirect:
+                raise ValueError(f"Missing target after '{redirect}'")
+            if current is None:
+                current = {'words': [], 'redirections': [], 'substitutions': [], 'start': start}
+            redirect = value
+            current['end'] = end
+        else:
+            if redirect:
+                raise ValueError(f"Missing target after '{redirect}'")
+            if current is not None:
+                commands.append(_simple_command(current, operator, base, depth))
+                commands += nested
+                current, nested = None, []
+                operator = ";"
+            if value in SEPARATORS:
+                operator = value
+
+    if redirect:
+        raise ValueError(f"Missing target after '{redirect}'")
+    if current is not None:
+        commands.append(_simple_command(current, operator, base, depth))
+        commands += nested
+    return commands
+
+
+def _simple_command(current, operator, base, depth):
+    return SimpleCommand(current['words'], operator, current['redirections'], current['substitutions'],
+                         base + current['start'], base + current['end'], depth)
+
+
+def _tokenize(command, posix):
+    """
+    Split a command line into words and operators
+
+    Returns:
+        list: ('word', text, start, end, substitutions) with substitutions
+              as (source, offset) pairs, or ('op'/'redirect', operator, start, end)
+    """
+    tokens = []
+    heredocs = []  # Delimiters whose bodies start after the next newline
+    chars = []
+    substitutions = []
+    word_start = None
+    i, n = 0, len(command)
+
+    def flush(end):
+        nonlocal chars, substitutions, word_start
+        if word_start is not None:
+            value = "".join(chars)
+            if tokens and tokens[-1][0] == 'redirect' and tokens[-1][1].lstrip('0123456789') == '<<':
+                heredocs.append(value.lstrip('-'))  # '<<-EOF' reads as '<<' then '-EOF'
+            tokens.append(('word', value, word_start, end, tuple(substitutions)))
+        chars, substitutions, word_start = [], [], None
+
+    while i < n:
+        char = command[i]
+
+        if char == '\n':
+            flush(i)
+            tokens.append(('op', ';', i, i + 1))
+            i += 1
+            if heredocs:
+                i = _skip_heredocs(command, i, heredocs)
+                heredocs = []
+            continue
+        if char.isspace():
+            if word_start is not None:
+                flush(i)
+            i += 1
+            continue
+        if char == '#' and word_start is None:
+            newline = command.find('\n', i)
+            i = n if newline == -1 else newline
+            continue
+
+        if char in OPERATOR_CHARS and not (char in '<>' and command.startswith('(', i + 1)):
+            operator = OPERATOR.match(command, i).group()
+            if operator in REDIRECTIONS and word_start is not None and "".join(chars).isdigit():
+                # '2>' redirects a file descriptor; the digits are not a word
+                tokens.append(('redirect', "".join(chars) + operator, word_start, i + len(operator)))
+                chars, substitutions, word_start = [], [], None
+            else:
+                flush(i)
+                kind = 'redirect' if operator in REDIRECTIONS else 'op'
+                tokens.append((kind, operator, i, i + len(operator)))
+            i = tokens[-1][3]
+            continue
+
+        if word_start is None:
+            word_start = i
+
+        if char == '\\' and posix:
+            if command.startswith('\n', i + 1):
+                i += 2  # Line continuation
+                if not chars:
+                    word_start = None
+                continue
+            chars.append(command[i + 1:i + 2])
+            i += 2
+        elif char == "'" and posix:
+            close = command.find("'", i + 1)
+            if close == -1:
+                raise ValueError("Unbalanced quotes")
+            chars.append(command[i + 1:close])
+            i = close + 1
+        elif char == '"':
+            i = _double_quoted(command, i + 1, chars, substitutions, posix)
+        elif char in '$<>' and command.startswith('(', i + 1):
+            i = _substitution(command, i, chars, substitutions, posix)
+        elif char == '`':
+            i = _backquoted(command, i, chars, substitutions)
+        else:
+            plain = PLAIN.match(command, i)
+            end = plain.end() if plain else i + 1
+            chars.append(command[i:end])
+            i = end
+
+    flush(n)
+    return tokens
+
+
+def _double_quoted(command, i, chars, substitutions, posix):
+    """Read a double-quoted string from just after its opening quote; returns the index after it"""
+    n = len(command)
+    while i < n:
+        char = command[i]
+        if char == '"':
+            return i + 1
+        if char == '\\' and posix and command[i + 1:i + 2] in ('$', '`', '"', '\\', '\n'):
+            if command[i + 1] != '\n':
+                chars.append(command[i + 1])
+            i += 2
+        elif char == '$' and command.startswith('(', i + 1):
+            i = _substitution(command, i, chars, substitutions, posix)
+        elif char == '`':
+            i = _backquoted(command, i, chars, substitutions)
+        else:
+            chars.append(char)
+            i += 1
+    raise ValueError("Unbalanced quotes")
+
+
+def _substitution(command, i, chars, substitutions, posix):
+    """Read $(...), <(...) or >(...) starting at i; $((...)) is arithmetic, not a command"""
+    close = _closing_paren(command, i + 2, posix)
+    chars.append(command[i:close + 1])
+    if not command.startswith('$((', i):
+        substitutions.append((command[i + 2:close], i + 2))
+    return close + 1
+
+
+def _backquoted(command, i, chars, substitutions):
+    """Read `...` starting at i"""
+    close = i + 1
+    while close < len(command) and command[close] != '`':
+        close += 2 if command[close] == '\\' else 1
+    if close >= len(command):
+        raise ValueError("Unterminated backquote")
+    chars.append(command[i:close + 1])
+    substitutions.append((command[i + 1:close], i + 1))
+    return close + 1
+
+
+def _closing_paren(command, i, posix):
+    """Index of the ')' closing a '(' that ends just before i, skipping quoted text"""
+    depth = 1
+    n = len(command)
+    while i < n:
+        char = command[i]
+        if char == '\\' and posix:
+            i += 2
+            continue
+        if char == "'" and posix:
+            close = command.find("'", i + 1)
+            if close == -1:
+                break
+            i = close + 1
+            continue
+        if char == '"':
+            i = _double_quoted(command, i + 1, [], [], posix)
+            continue
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    raise ValueError("Unterminated command substitution")
+
+
+def _skip_heredocs(command, i, delimiters):
+    """Skip here-document bodies starting at i; returns the index after the last delimiter line"""
+    for delimiter in delimiters:
+        while i < len(command):
+            newline = command.find('\n', i)
+            end = len(command) if newline == -1 else newline
+            line = command[i:end]
+            i = end + 1
+            if line.lstrip('\t').rstrip() == delimiter:
+                break
+    return min(i, len(command))
+
+
+def _strip_prefixes(words):
+    """Drop leading keywords, variable assignments and wrapper commands with their options"""
+    index = 0
+    after_wrapper = False
+    while index < len(words):
+        word = words[index]
+        if word in RESERVED_WORDS or ASSIGNMENT.match(word):
+            index += 1
+        elif word in HEADER_WORDS:
+            return ()
+        elif (os.path.basename(word) if '/' in word else word) in WRAPPERS:
+            after_wrapper = True
+            index += 1
+        elif after_wrapper and (word.startswith('-') or word.replace('.', '').isdigit()):
+            index += 1  # sudo -E, nice -n 5, timeout 30
+        else:
+            break
+    return words[index:]
+
+
+def is_balanced(command, posix=not config.IS_WINDOWS):
+    """
+    Check that a command line's quotes, substitutions, subshells and { } groups are closed
+
+    Quoted text is skipped, and a ')' ending a case pattern needs no '('.
+    """
+    try:
+        tokens = _tokenize(command, posix)
+    except ValueError:
+        return False
+
+    parens = braces = cases = 0
+    command_start = True
+    for token in tokens:
+        kind, value = token[:2]
+        if kind == 'word':
+            if command_start:
+                if value == 'case':
+                    cases += 1
+                elif value == 'esac' and cases:
+                    cases -= 1
+                elif value == '{':
+                    braces += 1
+                elif value == '}':
+                    braces -= 1
+                    if braces < 0:
+                        return False
+            command_start = value in RESERVED_WORDS
+        elif value == '(':
+            parens += 1
+            command_start = True
+        elif value == ')':
+            if parens:
+                parens -= 1
+            elif not cases:
+                return False
+            command_start = True
+        elif kind == 'op':
+            command_start = True
+    return parens == 0 and braces == 0
@@ -100,11 +100,12 @@ def main():
     
     # Create requirements.txt if it doesn't exist
     if not os.path.exists('requirements.txt'):
-        requirements = """ollama>=0.1.0
+        requirements = """ollama>=0.4.0
 rich>=13.7.0
 prompt-toolkit>=3.0.43
 psutil>=5.9.0
 colorama>=0.4.6
+numpy>=1.24.0
 """
         create_file('requirements.txt', requirements)
     
@@ -0,0 +1,99 @@
+"""
+tm - Thin TerminalMate client
+Sends one request to the daemon started with `python main.py serve`, then
+previews, confirms and runs the command here, in the current directory.
+
+Usage:
+    python tm.py list big files
+"""
+import argparse
+import os
+import sys
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.daemon_client import DaemonConnection, DaemonUnavailable
+import config
+
+
+def main():
+    """Client entry point"""
+    parser = argparse.ArgumentParser(description="TerminalMate client (needs `python main.py serve`)")
+    parser.add_argument("request", nargs="+", help="What you want to do, in plain English")
+    parser.add_argument("--socket", default=None, help="Daemon socket (default from config)")
+    parser.add_argument("--no-cache", action="store_true", help="Skip the response cache")
+    parser.add_argument("--print", dest="print_only", action="store_true",
+                        help="Print the command and its risk level instead of running it")
+    args = parser.parse_args()
+
+    message = {
+        'op': 'generate',
+        'request': " ".join(args.request),
+        'cwd': os.getcwd(),
+        'use_cache': not args.no_cache
+    }
+    try:
+        connection = DaemonConnection(args.socket)
+    except DaemonUnavailable as e:
+        print(f"tm: {e}. Start it with: python main.py serve", file=sys.stderr)
+        return 2
+
+    with connection:
+        connection.send(message)
+        if args.print_only:
+            reply = connection.receive()
+        else:
+            # Load the UI while the daemon generates
+            from core.executor import CommandExecutor
+            from safety.confirmation import ConfirmationUI
+            reply = connection.receive()
+
+    if not reply['ok']:
+        print(f"tm: {reply['error']}", file=sys.stderr)
+        return 1
+    result = reply['result']
+    if result.get('error') or not result.get('command'):
+        print(f"tm: {result.get('explanation') or 'No command generated'}", file=sys.stderr)
+        return 1
+
+    if args.print_only:
+        print(f"{reply['risk']['risk_level']}\t{result['command']}")
+        return 0
+
+    executor = CommandExecutor(persistent_shell=False)
+    ui = ConfirmationUI()
+    is_valid, validation_msg = executor.validate_command(result['command'])
+    if not is_valid:
+        ui.console.print(f"[red]Invalid command: {validation_msg}[/red]")
+        return 1
+
+    if not ui.show_command_preview(result, reply['risk']):
+        ui.show_cancellation()
+        return 1
+
+    on_output = ui.show_output if config.STREAM_COMMAND_OUTPUT else None
+    try:
+        execution = executor.execute(result['command'], on_output=on_output)
+    finally:
+        executor.close()
+    error = execution['error']
+    if config.STREAM_COMMAND_OUTPUT and execution['return_code'] != -1:
+        error = None
+    ui.show_execution_result(
+        execution['success'],
+        execution['output'],
+        error,
+        streamed=config.STREAM_COMMAND_OUTPUT,
+        output_file=execution['output_file'],
+        error_file=execution['error_file'],
+        resources=execution['resources']
+    )
+    return 0 if execution['success'] else 1
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        sys.exit(130)
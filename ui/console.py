@@ -0,0 +1,9 @@
+"""
+Console - The Rich console shared by the whole application
+"""
+from rich.console import Console
+
+
+# One console, so every module prints through the same terminal state
+# (and the Console setup is paid once)
+console = Console()
@@ -0,0 +1,147 @@
+"""
+Speculative Input - Generates commands while the user is still typing
+"""
+import re
+import threading
+import time
+from prompt_toolkit import PromptSession
+from prompt_toolkit.formatted_text import HTML
+from prompt_toolkit.history import InMemoryHistory
+import config
+
+
+# Trailing words that don't change what a request asks for
+FILLER_WORDS = {"please", "pls", "now", "thanks", "thx", "here"}
+
+
+def normalize_request(text):
+    """
+    Reduce a request to the form used to compare it with a speculation
+
+    Case, repeated whitespace, trailing punctuation, trailing filler words
+    and a final plural 's' are ignored.
+    """
+    words = re.sub(r"[\s]+", " ", text.lower()).strip(" .!?,;").split(" ")
+    while words and words[-1] in FILLER_WORDS:
+        words.pop()
+    if words and len(words[-1]) > 3 and words[-1].endswith("s") and not words[-1].endswith("ss"):
+        words[-1] = words[-1][:-1]
+    return " ".join(words)
+
+
+class SpeculativeInput:
+    def __init__(self, llm, context_provider, debounce=None, min_chars=None, ignore=None):
+        """
+        Args:
+            llm (LLMEngine): Engine used for speculative generations
+            context_provider (callable): Returns the request context dict
+            debounce (float): Seconds of typing pause before speculating
+            min_chars (int): Minimum input length worth speculating on
+            ignore (callable): Returns True for text typed so far that will not
+                               go to the LLM (built-in commands)
+        """
+        self.llm = llm
+        self.context_provider = context_provider
+        self.ignore = ignore or (lambda text: False)
+        self.debounce = debounce if debounce is not None else config.SPECULATIVE_DEBOUNCE
+        self.min_chars = min_chars if min_chars is not None else config.SPECULATIVE_MIN_CHARS
+        self.session = PromptSession(history=InMemoryHistory())
+        self.session.default_buffer.on_text_changed += self._on_text_changed
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._timer = None
+        self._speculation = None
+
+    def ask(self, prompt_text):
+        """
+        Read one line of input, speculating on it in the background
+
+        Returns:
+            str: The entered text
+        """
+        self._discard()
+        return self.session.prompt(HTML(prompt_text))
+
+    def take(self, user_input):
+        """
+        Claim the speculative result for the submitted input
+
+        Returns:
+            tuple: (command_info, seconds saved) if a speculation matches the
+                   input, otherwise (None, 0.0)
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            speculation, self._speculation = self._speculation, None
+
+        if speculation is None or speculation['text'] != normalize_request(user_input):
+            if speculation is not None:
+                speculation['future'].cancel()
+            self.misses += 1
+            return None, 0.0
+
+        # Generation time that overlapped with typing is latency the user never sees
+        saved = (speculation['finished'] or time.perf_counter()) - speculation['started']
+        try:
+            result = speculation['future'].result()
+        except Exception:
+            self.misses += 1
+            return None, 0.0
+
+        if result.get('error'):
+            self.misses += 1
+            return None, 0.0
+
+        # Only now is the result cached and counted, as if generated for this input
+        self.llm.accept_speculation(result)
+        self.hits += 1
+        return result, saved
+
+    def _on_text_changed(self, buffer):
+        """Restart the debounce timer on every keystroke"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.debounce, self._speculate, [buffer.text])
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _speculate(self, text):
+        """Generate a command for the text typed so far, replacing any older speculation"""
+        stripped = text.strip()
+        if len(stripped) < self.min_chars or stripped.startswith('!') or self.ignore(stripped):
+            return
+
+        normalized = normalize_request(stripped)
+        with self._lock:
+            if self._speculation is not None:
+                if self._speculation['text'] == normalized:
+                    return
+                # Only the latest prefix is worth finishing
+                self._speculation['future'].cancel()
+
+            speculation = {
+                'text': normalized,
+                'started': time.perf_counter(),
+                'finished': None
+            }
+            # Half-typed requests must not end up in the caches or the metrics
+            speculation['future'] = self.llm.submit_command(stripped, self.context_provider(), speculative=True)
+            speculation['future'].add_done_callback(
+                lambda _: speculation.update(finished=time.perf_counter())
+            )
+            self._speculation = speculation
+
+    def _discard(self):
+        """Drop any speculation left over from the previous prompt"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._speculation is not None:
+                self._speculation['future'].cancel()
+                self._speculation = None
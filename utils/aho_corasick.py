@@ -0,0 +1,100 @@
+"""
+Aho-Corasick - Find many patterns in one pass over the text
+"""
+from collections import deque
+
+
+class AhoCorasick:
+    """
+    Multi-pattern substring matcher
+
+    Patterns are added with a value, compiled once with build(), and then
+    every occurrence of every pattern is found in time linear in the text
+    plus the number of matches, however many patterns there are.
+    """
+
+    def __init__(self, patterns=None):
+        """
+        Args:
+            patterns (iterable): Optional (pattern, value) pairs to add
+        """
+        self._goto = [{}]
+        self._fail = [0]
+        self._own = [[]]  # Per node: (pattern length, value) of patterns ending exactly here
+        self._outputs = [[]]  # Per node: own patterns plus those of its failure chain
+        self._built = False
+        self.size = 0
+        for pattern, value in patterns or ():
+            self.add(pattern, value)
+
+    def __len__(self):
+        return self.size
+
+    def add(self, pattern, value=None):
+        """Add a pattern; value defaults to the pattern itself"""
+        if not pattern:
+            raise ValueError("Empty pattern")
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._own.append([])
+            node = next_node
+        self._own[node].append((len(pattern), pattern if value is None else value))
+        self._built = False
+        self.size += 1
+
+    def build(self):
+        """Compute failure links (breadth-first); called automatically before matching"""
+        goto = self._goto
+        fail = self._fail
+        outputs = self._outputs = [list(own) for own in self._own]
+        queue = deque(goto[0].values())
+        for node in queue:
+            fail[node] = 0
+
+        while queue:
+            node = queue.popleft()
+            for char, child in goto[node].items():
+                queue.append(child)
+                fallback = fail[node]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                target = goto[fallback].get(char, 0)
+                fail[child] = target if target != child else 0
+                # Patterns that end at the failure node also end here
+                if outputs[fail[child]]:
+                    outputs[child] += outputs[fail[child]]
+        self._built = True
+
+    def iter_matches(self, text):
+        """
+        Find every pattern occurrence in text
+
+        Yields:
+            tuple: (start, end, value) for each occurrence, in order of end
+                   position; text[start:end] is the matched pattern
+        """
+        if not self._built:
+            self.build()
+
+        goto = self._goto
+        fail = self._fail
+        outputs = self._outputs
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if outputs[node]:
+                end = index + 1
+                for length, value in outputs[node]:
+                    yield end - length, end, value
+
+    def find_all(self, text):
+        """Return all matches as a list of (start, end, value)"""
+        return list(self.iter_matches(text))
@@ -0,0 +1,220 @@
+"""
+Instrumentation - Phase timers, fixed-size latency histograms and counters
+
+    from utils.instrumentation import metrics
+
+    with metrics.timer('generate') as timer:
+        ...
+    timer.ms  # Elapsed time, recorded under 'generate'
+
+    @metrics.timer('validate')
+    def validate_command(...): ...
+
+Histograms have fixed buckets, so memory does not grow with the number
+of requests. With instrumentation disabled, timers still measure (two
+perf_counter() calls) but record nothing.
+"""
+import bisect
+import functools
+import os
+import threading
+import time
+import config
+
+# Upper bounds in milliseconds, 25% apart from 0.1 ms to ~2 minutes, so
+# quantile estimates are off by at most a few percent; anything slower
+# lands in the overflow bucket
+BUCKETS_MS = tuple(round(0.1 * 1.25 ** i, 3) for i in range(64))
+
+
+class Histogram:
+    """Counts of observations per bucket, plus their count, sum and max"""
+
+    def __init__(self, bounds=BUCKETS_MS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """
+        Estimate a quantile by interpolating inside its bucket
+
+        Args:
+            q (float): Quantile in the range 0-1
+
+        Returns:
+            float: The estimate, never above the largest observation
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.bounds[index - 1] if index else 0.0
+                upper = self.bounds[index] if index < len(self.bounds) else self.max
+                estimate = lower + (upper - lower) * (rank - seen) / bucket_count
+                return min(estimate, self.max)
+            seen += bucket_count
+        return self.max
+
+    def summary(self):
+        """
+        Returns:
+            dict: {'count', 'mean', 'p50', 'p95', 'p99', 'max'}, like utils.stats.summarize
+        """
+        return {
+            'count': self.count,
+            'mean': self.sum / self.count if self.count else 0.0,
+            'p50': self.quantile(0.50),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+            'max': self.max
+        }
+
+
+class Timer:
+    """Times a block (context manager) or every call of a function (decorator)"""
+
+    __slots__ = ('metrics', 'name', 'start', 'ms')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+        self.start = None
+        self.ms = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.ms = (time.perf_counter() - self.start) * 1000
+        if self.metrics.enabled:
+            self.metrics.observe(self.name, self.ms)
+        return False
+
+    def __call__(self, function):
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            with Timer(self.metrics, self.name):
+                return function(*args, **kwargs)
+        return timed
+
+
+class Metrics:
+    """Named histograms (milliseconds) and counters, safe to share between threads"""
+
+    def __init__(self, enabled=None):
+        """
+        Args:
+            enabled (bool): Record anything at all (default config.INSTRUMENTATION_ENABLED)
+        """
+        self.enabled = config.INSTRUMENTATION_ENABLED if enabled is None else enabled
+        self.started = time.time()
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def timer(self, name):
+        """
+        Time a phase
+
+        Returns:
+            Timer: Use as `with metrics.timer(name) as t:` (t.ms afterwards)
+                   or as a decorator
+        """
+        return Timer(self, name)
+
+    def observe(self, name, ms):
+        """Record one duration in milliseconds"""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.observe(ms)
+
+    def increment(self, name, value=1):
+        """Add to a counter"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: {'phases': {name: Histogram.summary()}, 'counters': {name: value},
+                   'uptime': seconds since the metrics were created or reset}
+        """
+        with self._lock:
+            return {
+                'phases': {name: histogram.summary() for name, histogram in self._histograms.items()},
+                'counters': dict(self._counters),
+                'uptime': time.time() - self.started
+            }
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self.started = time.time()
+
+    def prometheus_text(self):
+        """Render every histogram and counter in the Prometheus text exposition format"""
+        lines = [
+            "# HELP terminalmate_phase_duration_seconds Time spent per phase",
+            "# TYPE terminalmate_phase_duration_seconds histogram"
+        ]
+        with self._lock:
+            for name, histogram in sorted(self._histograms.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(histogram.bounds, histogram.counts):
+                    cumulative += bucket_count
+                    lines.append(
+                        f'terminalmate_phase_duration_seconds_bucket{{phase="{name}",le="{bound / 1000:g}"}} {cumulative}'
+                    )
+                lines.append(f'terminalmate_phase_duration_seconds_bucket{{phase="{name}",le="+Inf"}} {histogram.count}')
+                lines.append(f'terminalmate_phase_duration_seconds_sum{{phase="{name}"}} {histogram.sum / 1000:.6f}')
+                lines.append(f'terminalmate_phase_duration_seconds_count{{phase="{name}"}} {histogram.count}')
+            for name, value in sorted(self._counters.items()):
+                lines.append(f"# TYPE terminalmate_{name}_total counter")
+                lines.append(f"terminalmate_{name}_total {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path=None):
+        """
+        Write prometheus_text() to a file, replacing it atomically so a
+        scraper (e.g. node_exporter's textfile collector) never reads half of it
+
+        Args:
+            path (str): Destination (default config.METRICS_FILE)
+
+        Returns:
+            str: The path written, or None if there is nowhere to write
+        """
+        path = path or config.METRICS_FILE
+        if not path or not self.enabled:
+            return None
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, 'w', encoding='utf-8') as output:
+            output.write(self.prometheus_text())
+        os.replace(temporary, path)
+        return path
+
+
+metrics = Metrics()  # Shared by the whole process
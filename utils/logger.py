@@ -0,0 +1,183 @@
+"""
+Logger - Structured JSONL event log, written off the main thread
+
+Events are queued by the calling thread and written by a background
+listener, so the REPL never waits on the disk. Each line is one JSON
+object: {"ts", "pid", "event", ...fields}. Phases that take time carry a
+"duration_ms" field, which `logs stats` aggregates per event.
+"""
+import atexit
+import gzip
+import json
+import logging
+import os
+import shutil
+import threading
+import config
+from utils.stats import summarize
+
+LOGGER_NAME = "terminalmate"
+# Left out of events unless config.LOG_COMMANDS is set
+_COMMAND_FIELDS = ('request', 'command', 'reason')
+
+_setup_lock = threading.Lock()
+_logger = None
+_listener = None
+
+
+def setup_logging(path=None):
+    """
+    Route TerminalMate's log records through a queue to a rotating JSONL file
+
+    Safe to call more than once; only the first call configures anything.
+    logging.handlers is imported here, on the first event, not at startup.
+
+    Args:
+        path (str): Log file (default config.LOG_FILE)
+
+    Returns:
+        logging.Logger: The TerminalMate logger
+    """
+    global _logger, _listener
+    with _setup_lock:
+        if _logger is not None:
+            return _logger
+
+        import logging.handlers
+        import queue
+
+        logger = logging.getLogger(LOGGER_NAME)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        if not config.ENABLE_LOGGING:
+            logger.addHandler(logging.NullHandler())
+            _logger = logger
+            return logger
+
+        path = path or config.LOG_FILE
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=config.LOG_MAX_BYTES, backupCount=config.LOG_BACKUP_COUNT,
+            encoding='utf-8', delay=True
+        )
+        file_handler.namer = _gzip_name
+        file_handler.rotator = _gzip_rotate
+        file_handler.setFormatter(JsonFormatter())
+
+        records = queue.SimpleQueue()
+        logger.addHandler(logging.handlers.QueueHandler(records))
+        _listener = logging.handlers.QueueListener(records, file_handler)
+        _listener.start()
+        atexit.register(shutdown_logging)
+        _logger = logger
+        return logger
+
+
+def shutdown_logging():
+    """Write out queued records and stop the background listener"""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+            _listener = None
+
+
+def log_event(event, **fields):
+    """
+    Queue one event for the log
+
+    Args:
+        event (str): Event name, e.g. 'generate' or 'execute'
+        **fields: JSON-serializable details; 'duration_ms' makes the event
+                  count as a timed phase in log_stats()
+    """
+    if not config.ENABLE_LOGGING:
+        return
+    if not config.LOG_COMMANDS:
+        for key in _COMMAND_FIELDS:
+            fields.pop(key, None)
+    (_logger or setup_logging()).info(event, extra={'fields': fields})
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as one JSON line"""
+
+    def format(self, record):
+        entry = {'ts': round(record.created, 3), 'pid': record.process, 'event': record.getMessage()}
+        entry.update(getattr(record, 'fields', {}))
+        return json.dumps(entry, default=str)
+
+
+def _gzip_name(name):
+    return name + ".gz"
+
+
+def _gzip_rotate(source, dest):
+    """Compress a full log segment; runs on the listener thread"""
+    with open(source, 'rb') as src, gzip.open(dest, 'wb') as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
+
+def log_files(path=None):
+    """
+    Get the log file and its rotated segments, oldest first
+
+    Returns:
+        list: Paths that exist
+    """
+    path = path or config.LOG_FILE
+    rotated = [f"{path}.{n}.gz" for n in range(config.LOG_BACKUP_COUNT, 0, -1)]
+    return [p for p in rotated + [path] if os.path.exists(p)]
+
+
+def read_events(path=None):
+    """
+    Yield every logged event, oldest first, across rotated segments
+
+    Lines that are not valid JSON (e.g. cut off by a crash) are skipped.
+    """
+    for file_path in log_files(path):
+        opener = gzip.open if file_path.endswith(".gz") else open
+        with opener(file_path, 'rt', encoding='utf-8') as log:
+            for line in log:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def log_stats(path=None):
+    """
+    Aggregate the log
+
+    Returns:
+        dict: {'events': int, 'first': ts or None, 'last': ts or None,
+               'phases': {event: summarize() of duration_ms},
+               'risk_levels': {level: count}, 'confirmed': int, 'declined': int,
+               'failed': int (executions with a non-zero exit code)}
+    """
+    durations = {}
+    stats = {'events': 0, 'first': None, 'last': None, 'risk_levels': {},
+             'confirmed': 0, 'declined': 0, 'failed': 0}
+    for event in read_events(path):
+        stats['events'] += 1
+        stats['first'] = stats['first'] or event.get('ts')
+        stats['last'] = event.get('ts')
+        name = event.get('event')
+        if 'duration_ms' in event:
+            durations.setdefault(name, []).append(event['duration_ms'])
+        if name == 'risk':
+            level = event.get('risk_level')
+            stats['risk_levels'][level] = stats['risk_levels'].get(level, 0) + 1
+        elif name == 'confirm':
+            stats['confirmed' if event.get('confirmed') else 'declined'] += 1
+        elif name == 'execute' and event.get('exit_code') != 0:
+            stats['failed'] += 1
+
+    stats['phases'] = {name: summarize(values) for name, values in durations.items()}
+    return stats
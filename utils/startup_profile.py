@@ -0,0 +1,107 @@
+"""
+Startup Profile - Where TerminalMate's startup time goes
+"""
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import config
+
+PROBE_MARKER = "__terminalmate_ready__"  # Printed by `main.py --startup-probe` at the first prompt
+
+
+def run_probe(script, importtime=False):
+    """
+    Start TerminalMate up to its first prompt in a child process
+
+    Args:
+        script (str): Path to main.py
+        importtime (bool): Run the child with -X importtime
+
+    Returns:
+        tuple: (ms from main.py starting to the prompt, ms from launching the
+                process to the prompt, the child's stderr)
+
+    Raises:
+        RuntimeError: If the child exits without reaching the prompt
+    """
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + [script, '--startup-probe']
+    # stderr goes to a file: -X importtime can write more than a pipe holds
+    with tempfile.TemporaryFile(mode='w+', encoding='utf-8') as stderr:
+        start = time.perf_counter()
+        process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                   stderr=stderr, text=True)
+        ready = wall = None
+        for line in process.stdout:
+            if line.startswith(PROBE_MARKER):
+                wall = (time.perf_counter() - start) * 1000
+                ready = float(line.split()[1])
+        process.wait()
+        stderr.seek(0)
+        errors = stderr.read()
+
+    if ready is None:
+        raise RuntimeError(f"Startup probe exited with {process.returncode}: {errors[-2000:]}")
+    return ready, wall, errors
+
+
+def parse_importtime(text):
+    """
+    Parse -X importtime output
+
+    Returns:
+        list: (module, self µs, cumulative µs, depth) per import up to the
+              probe marker, depth 0 for modules imported directly by the script
+    """
+    imports = []
+    for line in text.splitlines():
+        if line == PROBE_MARKER:
+            break  # Imported after the prompt appeared, in background threads
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        imports.append((name.strip(), int(own), int(cumulative), depth))
+    return imports
+
+
+def profile_startup(script, runs=3, top=12):
+    """
+    Print an import-time breakdown and the time to the first prompt
+
+    Args:
+        script (str): Path to main.py
+        runs (int): Timed startups; the median is reported
+        top (int): Rows per table
+
+    Returns:
+        int: 0 if startup is within config.STARTUP_TARGET_MS, else 1
+    """
+    from ui.console import console
+
+    # Timed without -X importtime, which slows every import down
+    timings = [run_probe(script)[:2] for _ in range(runs)]
+    ready = statistics.median(timing[0] for timing in timings)
+    wall = statistics.median(timing[1] for timing in timings)
+    imports = parse_importtime(run_probe(script, importtime=True)[2])
+
+    console.print("[bold cyan]Startup imports[/bold cyan] [dim](-X importtime, cumulative)[/dim]")
+    for name, own, cumulative, depth in sorted((i for i in imports if i[3] == 0), key=lambda i: -i[2])[:top]:
+        console.print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    console.print("\n[bold cyan]Slowest modules[/bold cyan] [dim](own time)[/dim]")
+    for name, own, cumulative, depth in sorted(imports, key=lambda i: -i[1])[:top]:
+        console.print(f"  {own / 1000:8.1f} ms  {name}")
+
+    total = sum(i[2] for i in imports if i[3] == 0) / 1000
+    console.print(f"\n  {len(imports)} modules, {total:.1f} ms importing")
+
+    target = config.STARTUP_TARGET_MS
+    color = "green" if ready <= target else "red"
+    console.print(
+        f"\n[bold]First prompt:[/bold] [{color}]{ready:.0f} ms[/{color}] after main.py starts "
+        f"(target {target} ms); {wall:.0f} ms including interpreter startup "
+        f"[dim](median of {runs})[/dim]"
+    )
+    return 0 if ready <= target else 1
@@ -0,0 +1,47 @@
+"""
+Statistics helpers for latency reporting
+"""
+import math
+
+
+def percentile(values, pct):
+    """
+    Compute a percentile using linear interpolation
+
+    Args:
+        values (list): Numeric samples (need not be sorted)
+        pct (float): Percentile in the range 0-100
+
+    Returns:
+        float: The interpolated percentile, or 0.0 for no samples
+    """
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    lower = math.floor(rank)
+    upper = math.ceil(rank)
+    if lower == upper:
+        return float(ordered[lower])
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def summarize(values):
+    """
+    Summarize latency samples
+
+    Returns:
+        dict: {'count', 'mean', 'p50', 'p95', 'p99', 'max'}
+    """
+    if not values:
+        return {'count': 0, 'mean': 0.0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'max': 0.0}
+
+    return {
+        'count': len(values),
+        'mean': sum(values) / len(values),
+        'p50': percentile(values, 50),
+        'p95': percentile(values, 95),
+        'p99': percentile(values, 99),
+        'max': max(values)
+    }